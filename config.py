@@ -51,6 +51,39 @@ class AppConfig:
     cache_enabled: bool = True
     cache_timeout_seconds: int = 300
     max_search_results: int = 1000
+    search_timeout_ms: int = 3000
+    search_workers: int = 5
+    background_workers: int = 2
+    fuzzy_similarity_threshold: float = 0.3
+    search_cache_ttl_seconds: int = 300
+    search_cache_max_entries: int = 500
+    slow_query_ms: int = 500
+    graph_index_ttl_seconds: int = 900
+    suggestion_index_ttl_seconds: int = 3600
+    local_search_enabled: bool = False
+    local_search_path: str = os.path.join(os.path.expanduser('~'), '.history_guide', 'search_index.db')
+    local_search_sync_seconds: int = 60
+    maintenance_batch_size: int = 5000
+    maintenance_lock_timeout_ms: int = 2000
+    maintenance_statement_timeout_ms: int = 1800000
+    maintenance_report_dir: str = os.path.join(os.path.expanduser('~'), '.history_guide', 'reports')
+    
+    # Настройки профилирования
+    profiling_enabled: bool = False
+    profile_dir: str = "profiles"
+    profile_top_n: int = 30
+    profile_min_duration_ms: int = 20
+    query_recording_enabled: bool = False
+    query_repeat_threshold: int = 3
+    query_report_file: str = "profiles/n_plus_one.log"
+    stall_watchdog_enabled: bool = True
+    stall_threshold_ms: int = 100
+    stall_keep_worst: int = 20
+    memory_profiling_enabled: bool = False
+    memory_top_n: int = 15
+    memory_trace_frames: int = 10
+    memory_min_growth_kb: int = 64
+    memory_leak_grace_seconds: int = 30
     
     # Настройки UI
     theme: str = "light"
@@ -86,6 +119,37 @@ APP_CONFIG = AppConfig(
     session_timeout_minutes=int(os.getenv('SESSION_TIMEOUT_MINUTES', '120')),
     cache_enabled=os.getenv('CACHE_ENABLED', 'True').lower() == 'true',
     cache_timeout_seconds=int(os.getenv('CACHE_TIMEOUT_SECONDS', '300')),
+    slow_query_ms=int(os.getenv('SLOW_QUERY_MS', '500')),
+    search_timeout_ms=int(os.getenv('SEARCH_TIMEOUT_MS', '3000')),
+    search_workers=int(os.getenv('SEARCH_WORKERS', '5')),
+    background_workers=int(os.getenv('BACKGROUND_WORKERS', '2')),
+    fuzzy_similarity_threshold=float(os.getenv('FUZZY_SIMILARITY_THRESHOLD', '0.3')),
+    search_cache_ttl_seconds=int(os.getenv('SEARCH_CACHE_TTL_SECONDS', '300')),
+    search_cache_max_entries=int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '500')),
+    graph_index_ttl_seconds=int(os.getenv('GRAPH_INDEX_TTL_SECONDS', '900')),
+    suggestion_index_ttl_seconds=int(os.getenv('SUGGESTION_INDEX_TTL_SECONDS', '3600')),
+    local_search_enabled=os.getenv('LOCAL_SEARCH', 'False').lower() == 'true',
+    local_search_path=os.getenv('LOCAL_SEARCH_PATH', os.path.join(os.path.expanduser('~'), '.history_guide', 'search_index.db')),
+    local_search_sync_seconds=int(os.getenv('LOCAL_SEARCH_SYNC_SECONDS', '60')),
+    maintenance_batch_size=int(os.getenv('MAINTENANCE_BATCH_SIZE', '5000')),
+    maintenance_lock_timeout_ms=int(os.getenv('MAINTENANCE_LOCK_TIMEOUT_MS', '2000')),
+    maintenance_statement_timeout_ms=int(os.getenv('MAINTENANCE_STATEMENT_TIMEOUT_MS', '1800000')),
+    maintenance_report_dir=os.getenv('MAINTENANCE_REPORT_DIR', os.path.join(os.path.expanduser('~'), '.history_guide', 'reports')),
+    profiling_enabled=os.getenv('PROFILE_ACTIONS', 'False').lower() == 'true',
+    profile_dir=os.getenv('PROFILE_DIR', 'profiles'),
+    profile_top_n=int(os.getenv('PROFILE_TOP_N', '30')),
+    profile_min_duration_ms=int(os.getenv('PROFILE_MIN_DURATION_MS', '20')),
+    query_recording_enabled=os.getenv('QUERY_RECORDING', 'False').lower() == 'true',
+    query_repeat_threshold=int(os.getenv('QUERY_REPEAT_THRESHOLD', '3')),
+    query_report_file=os.getenv('QUERY_REPORT_FILE', 'profiles/n_plus_one.log'),
+    stall_watchdog_enabled=os.getenv('STALL_WATCHDOG', 'True').lower() == 'true',
+    stall_threshold_ms=int(os.getenv('STALL_THRESHOLD_MS', '100')),
+    stall_keep_worst=int(os.getenv('STALL_KEEP_WORST', '20')),
+    memory_profiling_enabled=os.getenv('MEMORY_PROFILE', 'False').lower() == 'true',
+    memory_top_n=int(os.getenv('MEMORY_TOP_N', '15')),
+    memory_trace_frames=int(os.getenv('MEMORY_TRACE_FRAMES', '10')),
+    memory_min_growth_kb=int(os.getenv('MEMORY_MIN_GROWTH_KB', '64')),
+    memory_leak_grace_seconds=int(os.getenv('MEMORY_LEAK_GRACE_SECONDS', '30')),
     theme=os.getenv('UI_THEME', 'light'),
     language=os.getenv('UI_LANGUAGE', 'ru')
 )
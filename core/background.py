@@ -0,0 +1,9 @@
+"""
+Пул фоновых задач: прогрев кэшей, построение индексов, запись аудита, тяжелая аналитика
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from config import APP_CONFIG
+
+# Отдельно от пула поиска: фоновая работа не занимает потоки, на которые рассчитаны таймауты поиска
+background_executor = ThreadPoolExecutor(max_workers=APP_CONFIG.background_workers, thread_name_prefix='background')
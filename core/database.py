@@ -3,11 +3,81 @@ from psycopg_pool import ConnectionPool
 from contextlib import contextmanager
 from typing import Generator, Any, Dict, List, Optional, Union
 import logging
+import threading
 import time
-from config import DATABASE_CONFIG
+from config import DATABASE_CONFIG, APP_CONFIG
+from core.metrics import metrics
+from core import query_recorder
+from core.exceptions import QueryCancelledError
 
 logger = logging.getLogger(__name__)
 
+db_call_duration = metrics.histogram(
+    'db_call_duration_seconds', 'Длительность вызовов БД', ('kind', 'name'))
+db_call_errors = metrics.counter(
+    'db_call_errors_total', 'Ошибки вызовов БД', ('kind', 'name'))
+db_slow_calls = metrics.counter(
+    'db_slow_calls_total', 'Вызовы БД дольше порога SLOW_QUERY_MS', ('kind', 'name'))
+db_pool_wait = metrics.histogram(
+    'db_pool_wait_seconds', 'Ожидание соединения из пула')
+db_pool_size = metrics.gauge('db_pool_size', 'Размер пула соединений')
+db_pool_available = metrics.gauge('db_pool_available', 'Свободные соединения пула')
+db_pool_waiting = metrics.gauge('db_pool_requests_waiting', 'Запросы в очереди пула')
+
+class RecordingCursor(psycopg.Cursor):
+    """Курсор, передающий выполняемые запросы в активный журнал запросов"""
+    
+    def _query_text(self, query) -> str:
+        if isinstance(query, bytes):
+            return query.decode('utf-8', errors='replace')
+        if isinstance(query, str):
+            return query
+        return query.as_string(self)
+    
+    def execute(self, query, params=None, **kwargs):
+        if query_recorder.is_recording():
+            query_recorder.record_query(self._query_text(query))
+        return super().execute(query, params, **kwargs)
+    
+    def executemany(self, query, params_seq, **kwargs):
+        if query_recorder.is_recording():
+            query_recorder.record_query(self._query_text(query))
+        return super().executemany(query, params_seq, **kwargs)
+
+class QueryCancelScope:
+    """Соединения, занятые запросами одной операции; cancel() прерывает их на сервере из любого потока"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = set()
+        self.cancelled = False
+    
+    def attach(self, connection: psycopg.Connection) -> None:
+        """Регистрация соединения, выданного операции"""
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelledError("Операция отменена")
+            self._connections.add(connection)
+    
+    def detach(self, connection: psycopg.Connection) -> None:
+        """Соединение возвращается в пул и больше не отменяется"""
+        with self._lock:
+            self._connections.discard(connection)
+    
+    def cancel(self) -> None:
+        """Отмена операции: новые запросы не начинаются, выполняющиеся прерываются"""
+        with self._lock:
+            self.cancelled = True
+            # Под блокировкой: соединение не вернется в пул, пока ему отправляется отмена
+            for connection in self._connections:
+                try:
+                    connection.cancel()
+                except Exception as e:
+                    logger.warning(f"Failed to cancel query: {e}")
+
+# Область отмены запросов текущего потока
+_cancel_scopes = threading.local()
+
 class DatabaseConnection:
     _instance = None
     _pool = None
@@ -84,6 +154,9 @@ class DatabaseConnection:
             # Возвращаем исходное значение autocommit
             conn.autocommit = old_autocommit
             
+            # Курсоры соединения участвуют в записи запросов (поиск N+1)
+            conn.cursor_factory = RecordingCursor
+            
             # Устанавливаем уровень изоляции
             conn.isolation_level = psycopg.IsolationLevel.READ_COMMITTED
             
@@ -105,8 +178,11 @@ class DatabaseConnection:
             raise RuntimeError("Database pool is not initialized")
         
         connection = None
+        scope = getattr(_cancel_scopes, 'scope', None)
         try:
+            wait_start = time.perf_counter()
             connection = self._pool.getconn(timeout=30)  # 30 секунд таймаут
+            db_pool_wait.observe(time.perf_counter() - wait_start)
             
             # Проверяем состояние соединения
             if connection.closed:
@@ -114,6 +190,9 @@ class DatabaseConnection:
                 self._pool.putconn(connection, close=True)
                 connection = self._pool.getconn(timeout=30)
             
+            if scope is not None:
+                scope.attach(connection)
+            
             yield connection
             
             # Если есть активная транзакция, коммитим её
@@ -134,6 +213,8 @@ class DatabaseConnection:
             logger.error(f"Database error: {e}")
             raise
         finally:
+            if connection and scope is not None:
+                scope.detach(connection)
             if connection and self._pool:
                 try:
                     # Проверяем состояние соединения перед возвратом в пул
@@ -155,6 +236,16 @@ class DatabaseConnection:
                     except:
                         pass
     
+    @contextmanager
+    def cancel_scope(self, scope: QueryCancelScope) -> Generator[QueryCancelScope, None, None]:
+        """Запросы текущего потока внутри блока отменяются вызовом scope.cancel()"""
+        previous = getattr(_cancel_scopes, 'scope', None)
+        _cancel_scopes.scope = scope
+        try:
+            yield scope
+        finally:
+            _cancel_scopes.scope = previous
+    
     @contextmanager
     def get_cursor(self, autocommit: bool = False) -> Generator[psycopg.Cursor, None, None]:
         """Контекстный менеджер для получения курсора"""
@@ -180,10 +271,47 @@ class DatabaseConnection:
                 conn.rollback()
                 raise
     
+    @contextmanager
+    def _measure_call(self, kind: str, name: str):
+        """Замер длительности вызова БД для метрик"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            db_call_errors.inc(kind=kind, name=name)
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            db_call_duration.observe(duration, kind=kind, name=name)
+            if duration * 1000 >= APP_CONFIG.slow_query_ms:
+                db_slow_calls.inc(kind=kind, name=name)
+                logger.warning(f"Slow {kind} {name}: {duration * 1000:.1f} ms")
+    
+    @contextmanager
+    def record_queries(self, action: str, threshold: int = None):
+        """Запись запросов текущего потока в рамках логического действия"""
+        if threshold is None:
+            threshold = APP_CONFIG.query_repeat_threshold
+        with query_recorder.recording(action, threshold) as recorder:
+            yield recorder
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Статистика пула соединений с обновлением метрик"""
+        stats = self._pool.get_stats() if self._pool else {}
+        result = {
+            'pool_size': stats.get('pool_size', 0),
+            'pool_available': stats.get('pool_available', 0),
+            'requests_waiting': stats.get('requests_waiting', 0)
+        }
+        db_pool_size.set(result['pool_size'])
+        db_pool_available.set(result['pool_available'])
+        db_pool_waiting.set(result['requests_waiting'])
+        return result
+    
     def execute_procedure(self, procedure_name: str, params: Union[tuple, list] = None) -> List[Dict[str, Any]]:
         """Выполнение хранимой процедуры с возвратом результата"""
         with self.get_transaction() as conn:
-            with conn.cursor() as cursor:
+            with conn.cursor() as cursor, self._measure_call('procedure', procedure_name):
                 try:
                     if params:
                         cursor.execute(f"CALL {procedure_name}({', '.join(['%s'] * len(params))})", params)
@@ -202,7 +330,7 @@ class DatabaseConnection:
     def execute_function(self, function_name: str, params: Union[tuple, list] = None) -> List[Dict[str, Any]]:
         """Выполнение хранимой функции с возвратом результата"""
         with self.get_transaction() as conn:
-            with conn.cursor() as cursor:
+            with conn.cursor() as cursor, self._measure_call('function', function_name):
                 try:
                     if params:
                         if isinstance(params, (tuple, list)):
@@ -226,7 +354,7 @@ class DatabaseConnection:
     def execute_query(self, query: str, params: Union[tuple, list] = None, fetch_all: bool = True) -> List[Dict[str, Any]]:
         """Выполнение произвольного SQL запроса"""
         with self.get_transaction() as conn:
-            with conn.cursor() as cursor:
+            with conn.cursor() as cursor, self._measure_call('query', 'query'):
                 try:
                     if params:
                         cursor.execute(query, params)
@@ -264,16 +392,14 @@ class DatabaseConnection:
                 'database_name': result[1] if result else 'unknown',
                 'current_user': result[2] if result else 'unknown',
                 'server_time': result[3] if result else 'unknown',
-                'pool_size': self._pool.get_stats()['pool_size'] if self._pool else 0,
-                'pool_available': self._pool.get_stats()['pool_available'] if self._pool else 0
+                **self.pool_stats()
             }
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
             return {
                 'status': 'unhealthy',
                 'error': str(e),
-                'pool_size': self._pool.get_stats()['pool_size'] if self._pool else 0,
-                'pool_available': self._pool.get_stats()['pool_available'] if self._pool else 0
+                **self.pool_stats()
             }
     
     def close(self):
@@ -6,6 +6,10 @@ class DatabaseError(HistoryGuideException):
     """Ошибки работы с базой данных"""
     pass
 
+class QueryCancelledError(DatabaseError):
+    """Запрос отменен до завершения"""
+    pass
+
 class ValidationError(HistoryGuideException):
     """Ошибки валидации данных"""
     pass
@@ -0,0 +1,286 @@
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм по умолчанию (в секундах)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape_label_value(value: Any) -> str:
+    """Экранирование значения метки для текстового формата Prometheus"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_names: Sequence[str], label_values: Tuple, extra: Dict[str, str] = None) -> str:
+    """Форматирование набора меток в виде {name="value",...}"""
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.extend(f'{name}="{_escape_label_value(value)}"' for name, value in extra.items())
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    """Форматирование числового значения"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """Базовый класс метрики с набором меток"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, description: str = '', label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        """Ключ серии по значениям меток"""
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        """Строки текстового формата Prometheus"""
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Монотонно возрастающий счетчик"""
+
+    metric_type = 'counter'
+
+    def __init__(self, name: str, description: str = '', label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Увеличение счетчика"""
+        if amount < 0:
+            raise ValueError("Counter can only be increased")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Текущее значение серии"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def series(self) -> Dict[Tuple, float]:
+        """Снимок всех серий"""
+        with self._lock:
+            return dict(self._values)
+
+    def total(self) -> float:
+        """Сумма по всем сериям"""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(self.series().items())]
+
+class Gauge(_Metric):
+    """Произвольно изменяемое значение"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, description: str = '', label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        """Установка значения"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Увеличение значения"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Уменьшение значения"""
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        """Текущее значение серии"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def series(self) -> Dict[Tuple, float]:
+        """Снимок всех серий"""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(self.series().items())]
+
+class Histogram(_Metric):
+    """Распределение наблюдаемых величин по корзинам"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, description: str = '', label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Регистрация наблюдения"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'bucket_counts': [0] * len(self.buckets),
+                    'count': 0,
+                    'sum': 0.0,
+                    'max': 0.0
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['bucket_counts'][index] += 1
+                    break
+            series['count'] += 1
+            series['sum'] += value
+            series['max'] = max(series['max'], value)
+
+    def time(self, **labels) -> '_HistogramTimer':
+        """Контекстный менеджер для замера длительности блока"""
+        return _HistogramTimer(self, labels)
+
+    def series(self) -> Dict[Tuple, Dict[str, Any]]:
+        """Снимок всех серий (count, sum, max, avg)"""
+        with self._lock:
+            snapshot = {}
+            for key, series in self._series.items():
+                snapshot[key] = {
+                    'count': series['count'],
+                    'sum': series['sum'],
+                    'max': series['max'],
+                    'avg': series['sum'] / series['count'] if series['count'] else 0.0,
+                    'bucket_counts': list(series['bucket_counts'])
+                }
+            return snapshot
+
+    def top(self, limit: int = 10, sort_by: str = 'max') -> List[Dict[str, Any]]:
+        """Серии с наибольшими значениями (max, avg, sum или count)"""
+        rows = []
+        for key, stats in self.series().items():
+            row = dict(zip(self.label_names, key))
+            row.update({k: v for k, v in stats.items() if k != 'bucket_counts'})
+            rows.append(row)
+        rows.sort(key=lambda row: row[sort_by], reverse=True)
+        return rows[:limit]
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, stats in sorted(self.series().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, stats['bucket_counts']):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, {'le': _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key, {'le': '+Inf'})
+            lines.append(f"{self.name}_bucket{labels} {stats['count']}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(stats['sum'])}")
+            lines.append(f"{self.name}_count{labels} {stats['count']}")
+        return lines
+
+class _HistogramTimer:
+    """Замер длительности блока с записью в гистограмму"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start_time, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """Реестр метрик приложения (БД, кэш, аудит, UI)"""
+
+    _instance: Optional['MetricsRegistry'] = None
+    _initialized: bool = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._metrics: Dict[str, _Metric] = {}
+            self._lock = threading.Lock()
+            self._initialized = True
+
+    def _register(self, metric_class, name: str, description: str, label_names: Sequence[str], **kwargs) -> _Metric:
+        """Регистрация метрики (повторная регистрация возвращает существующую)"""
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, metric_class) or existing.label_names != tuple(label_names):
+                    raise ValueError(f"Metric {name} is already registered with a different type or labels")
+                return existing
+            metric = metric_class(name, description, label_names, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, description: str = '', label_names: Sequence[str] = ()) -> Counter:
+        """Получение или создание счетчика"""
+        return self._register(Counter, name, description, label_names)
+
+    def gauge(self, name: str, description: str = '', label_names: Sequence[str] = ()) -> Gauge:
+        """Получение или создание датчика"""
+        return self._register(Gauge, name, description, label_names)
+
+    def histogram(self, name: str, description: str = '', label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Получение или создание гистограммы"""
+        return self._register(Histogram, name, description, label_names, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Получение метрики по имени"""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render_prometheus(self) -> str:
+        """Текстовый снимок всех метрик в формате Prometheus"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+        lines = []
+        for metric in metrics:
+            if metric.description:
+                description = metric.description.replace('\\', '\\\\').replace('\n', '\\n')
+                lines.append(f"# HELP {metric.name} {description}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def export_snapshot(self, filename: str) -> str:
+        """Сохранение снимка метрик в файл"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        logger.info(f"Metrics snapshot exported to {filename}")
+        return filename
+
+
+# Глобальный реестр метрик
+metrics = MetricsRegistry()
@@ -0,0 +1,160 @@
+"""
+Запись запросов в рамках логического действия и поиск N+1
+"""
+
+import os
+import re
+import sys
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Порог повторов одного и того же запроса по умолчанию
+DEFAULT_REPEAT_THRESHOLD = 3
+
+# Модули, которые пропускаются при определении места вызова
+_SKIPPED_PATHS = (
+    os.sep + 'psycopg', os.sep + 'psycopg_pool', os.sep + 'contextlib',
+    os.path.join('core', ''), os.path.join('data_access', ''), os.path.join('utils', 'profiling')
+)
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r'%\(\w+\)s|%s|\$\d+')
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ARRAY_RE = re.compile(r'\[\s*\?(?:\s*,\s*\?)+\s*\]')
+_SPACE_RE = re.compile(r'\s+')
+
+class NPlusOneDetected(AssertionError):
+    """Обнаружены повторяющиеся однотипные запросы (N+1)"""
+    pass
+
+def fingerprint_query(query: str) -> str:
+    """Отпечаток запроса: литералы и параметры заменяются на ?"""
+    text = _COMMENT_RE.sub(' ', query)
+    text = _STRING_RE.sub('?', text)
+    text = _PARAM_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _LIST_RE.sub('(?...)', text)
+    text = _ARRAY_RE.sub('[?...]', text)
+    return _SPACE_RE.sub(' ', text).strip().lower()
+
+def _call_site(depth: int = 2) -> str:
+    """Ближайшие кадры стека вне слоя доступа к данным (вызов и вызывающий его код)"""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if not any(part in filename for part in _SKIPPED_PATHS):
+            frames.append(f"{os.path.relpath(filename)}:{frame.f_lineno} ({frame.f_code.co_name})")
+        frame = frame.f_back
+    return ' <- '.join(frames) if frames else 'unknown'
+
+class QueryRecorder:
+    """Журнал запросов одного логического действия"""
+
+    def __init__(self, action: str, threshold: int = DEFAULT_REPEAT_THRESHOLD):
+        self.action = action
+        self.threshold = threshold
+        self.calls: Counter = Counter()
+        self.sites: Dict[str, Counter] = {}
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def record(self, query: str, site: str) -> None:
+        """Регистрация выполненного запроса"""
+        fingerprint = fingerprint_query(query)
+        with self._lock:
+            self.total += 1
+            self.calls[fingerprint] += 1
+            self.sites.setdefault(fingerprint, Counter())[site] += 1
+
+    def detections(self) -> List[Dict[str, Any]]:
+        """Однотипные запросы, повторенные больше порога"""
+        with self._lock:
+            return [
+                {
+                    'fingerprint': fingerprint,
+                    'count': count,
+                    'call_sites': self.sites[fingerprint].most_common(3)
+                }
+                for fingerprint, count in self.calls.most_common()
+                if count > self.threshold
+            ]
+
+    def report(self) -> str:
+        """Текстовый отчет о найденных N+1"""
+        detections = self.detections()
+        lines = [f"Action: {self.action} — {self.total} queries, "
+                 f"{len(self.calls)} distinct, {len(detections)} repeated more than {self.threshold} times"]
+        for detection in detections:
+            lines.append(f"  {detection['count']}x {detection['fingerprint']}")
+            for site, count in detection['call_sites']:
+                lines.append(f"      {count}x at {site}")
+        return '\n'.join(lines)
+
+    def assert_no_n_plus_one(self) -> None:
+        """Проверка для тестов: падает при обнаружении N+1"""
+        if self.detections():
+            raise NPlusOneDetected(self.report())
+
+_local = threading.local()
+
+def _active_recorders() -> List[QueryRecorder]:
+    """Стек активных журналов текущего потока"""
+    recorders = getattr(_local, 'recorders', None)
+    if recorders is None:
+        recorders = _local.recorders = []
+    return recorders
+
+def is_recording() -> bool:
+    """Идет ли запись запросов в текущем потоке"""
+    return bool(getattr(_local, 'recorders', None))
+
+def record_query(query: str) -> None:
+    """Запись запроса во все активные журналы текущего потока"""
+    if not query or not query.strip():
+        return
+    site = _call_site()
+    for recorder in _active_recorders():
+        recorder.record(query, site)
+
+@contextmanager
+def recording(action: str, threshold: Optional[int] = None):
+    """Контекст записи запросов логического действия"""
+    recorder = QueryRecorder(action, DEFAULT_REPEAT_THRESHOLD if threshold is None else threshold)
+    recorders = _active_recorders()
+    recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        recorders.remove(recorder)
+
+@contextmanager
+def expect_no_n_plus_one(action: str = 'test', threshold: Optional[int] = None):
+    """Контекст для тестов: после выхода проверяет отсутствие N+1"""
+    with recording(action, threshold) as recorder:
+        yield recorder
+    recorder.assert_no_n_plus_one()
+
+def write_report(recorder: QueryRecorder, filename: str) -> None:
+    """Дописывание отчета в файл, если найдены N+1"""
+    if not recorder.detections():
+        return
+
+    report = recorder.report()
+    logger.warning(f"N+1 queries detected\n{report}")
+    try:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(f"[{datetime.now().isoformat(timespec='seconds')}] {report}\n\n")
+    except Exception as e:
+        logger.error(f"Failed to write query report to {filename}: {e}")
@@ -8,6 +8,7 @@ from .source_repository import SourceRepository
 from .audit_repository import AuditRepository
 from .moderation_repository import ModerationRepository
 from .relationships_repository import RelationshipsRepository
+from .search_repository import SearchRepository
 
 __all__ = [
     'BaseRepository',
@@ -19,5 +20,6 @@ __all__ = [
     'SourceRepository',
     'AuditRepository',
     'ModerationRepository',
-    'RelationshipsRepository'
+    'RelationshipsRepository',
+    'SearchRepository'
 ]
\ No newline at end of file
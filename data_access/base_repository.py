@@ -1,11 +1,47 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional, Tuple
 import logging
+from psycopg import errors as pg_errors
 from core.database import DatabaseConnection
-from core.exceptions import DatabaseError, ValidationError
+from core.exceptions import DatabaseError, QueryCancelledError, ValidationError
+from utils.transliteration import is_latin_only, latin_to_cyrillic
+from config import APP_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Нечеткий поиск (database/fuzzy_search.sql): колонки результата и нормализованное название
+# (выражение должно совпадать с выражением триграммного индекса таблицы)
+FUZZY_SEARCH_TABLES = {
+    'persons': (
+        "t.person_id, t.name, t.surname, t.patronymic, concat_ws(' ', t.name, t.surname, t.patronymic) AS full_name, "
+        "t.date_of_birth, t.date_of_death, t.biography, t.country_id",
+        "public.person_search_name(t.name, t.surname, t.patronymic)"
+    ),
+    'countries': (
+        "t.country_id, t.name, t.capital, t.foundation_date, t.dissolution_date, t.description",
+        "public.search_normalize(t.name)"
+    ),
+    'events': (
+        "t.event_id, t.name, t.description, t.start_date, t.end_date, t.location, t.event_type, t.parent_id",
+        "public.search_normalize(t.name)"
+    ),
+    'documents': (
+        "t.document_id, t.name, t.creating_date, length(t.content) AS content_length, left(t.content, 500) AS content",
+        "public.search_normalize(t.name)"
+    ),
+    'sources': (
+        "t.source_id, t.name, t.author, t.publication_date, t.type, t.url",
+        "public.search_normalize(t.name)"
+    )
+}
+
+# Век года даты (до н. э. — отрицательный, для пустой даты — NULL)
+CENTURY_SQL = ("CASE WHEN extract(year FROM {0}) > 0 THEN (extract(year FROM {0})::int + 99) / 100 "
+               "ELSE -((99 - extract(year FROM {0})::int) / 100) END")
+
+# Фасеты с целочисленными значениями (остальные — строки)
+INT_FACETS = {'country', 'century'}
+
 class BaseRepository(ABC):
     """Базовый класс для всех репозиториев"""
     
@@ -26,4 +62,98 @@ class BaseRepository(ABC):
             return self.db.execute_procedure(procedure_name, params)
         except Exception as e:
             logger.error(f"Error executing procedure {procedure_name}: {e}")
-            raise DatabaseError(f"Database operation failed: {str(e)}")
\ No newline at end of file
+            raise DatabaseError(f"Database operation failed: {str(e)}")
+    
+    def _search_fuzzy(self, table: str, search_text: str, similarity_threshold: float = None,
+                      offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Нечеткий поиск по триграммам названия (устойчив к опечаткам, ё/е и латинице)"""
+        columns, name_expression = FUZZY_SEARCH_TABLES[table]
+        if similarity_threshold is None:
+            similarity_threshold = APP_CONFIG.fuzzy_similarity_threshold
+        if is_latin_only(search_text):
+            search_text = latin_to_cyrillic(search_text)
+        
+        try:
+            with self.db.get_cursor() as cursor:
+                # Порог оператора <% действует до конца транзакции
+                cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                               (str(similarity_threshold),))
+                cursor.execute(f"""
+                    SELECT {columns},
+                           word_similarity(public.search_normalize(%(search_text)s), {name_expression}) AS similarity,
+                           COUNT(*) OVER () AS total_count
+                    FROM public.{table} t
+                    WHERE public.search_normalize(%(search_text)s) <%% {name_expression}
+                    ORDER BY similarity DESC, t.name
+                    OFFSET %(offset)s LIMIT %(limit)s
+                """, {'search_text': search_text, 'offset': offset, 'limit': limit})
+                
+                result_columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(result_columns, row)) for row in cursor.fetchall()]
+        except QueryCancelledError:
+            raise
+        except pg_errors.QueryCanceled as e:
+            raise QueryCancelledError(f"Нечеткий поиск прерван: {e}") from e
+        except Exception as e:
+            logger.error(f"Error in fuzzy search over {table}: {e}")
+            raise DatabaseError(f"Database operation failed: {str(e)}") from e
+    
+    def _fuzzy_fallback(self, table: str, search_text: str, similarity_threshold: float = None,
+                        offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Нечеткий поиск вместо пустого полнотекстового результата (без ошибки, если pg_trgm не установлен)"""
+        try:
+            return self._search_fuzzy(table, search_text, similarity_threshold, offset, limit)
+        except DatabaseError as e:
+            # Пустой результат только без database/fuzzy_search.sql; отмена и прочие ошибки передаются выше
+            if isinstance(e.__cause__, (pg_errors.UndefinedFunction, pg_errors.UndefinedObject)):
+                logger.warning(f"Fuzzy search over {table} is unavailable: {e}")
+                return []
+            raise
+    
+    def _search_fulltext_or_fuzzy(self, table: str, function_name: str, args: tuple, search_text: str,
+                                  offset: int = 0, limit: int = 20,
+                                  similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """Страница полнотекстового поиска; нечеткий поиск, если полнотекстовый не нашел ничего
+        
+        Решение не зависит от страницы: пустая страница за концом полнотекстовой выдачи остается пустой,
+        а выдача нечеткого поиска листается с тем же смещением.
+        """
+        results = self._execute_function(function_name, (*args, offset, limit))
+        if results:
+            return results
+        if offset > 0 and self._execute_function(function_name, (*args, 0, 1)):
+            return results
+        return self._fuzzy_fallback(table, search_text, similarity_threshold, offset, limit)
+    
+    def _fetch_facets(self, base_query: str, facet_queries: List[Tuple[str, str]],
+                      params: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Счетчики всех фасетов одним запросом
+        
+        base_query материализуется как f; каждый запрос фасета возвращает (значение, подпись, ключ сущности),
+        сущности считаются один раз на значение даже при нескольких связях.
+        """
+        facet_rows = '\n UNION ALL '.join(
+            f"SELECT '{facet}', v.value::text, v.label::text, v.entity_key::text "
+            f"FROM ({query}) AS v(value, label, entity_key)"
+            for facet, query in facet_queries
+        )
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(f"""
+                    WITH f AS MATERIALIZED ({base_query})
+                    SELECT r.facet, r.value, r.label, COUNT(DISTINCT r.entity_key)
+                    FROM ({facet_rows}) AS r(facet, value, label, entity_key)
+                    GROUP BY r.facet, r.value, r.label
+                    ORDER BY r.facet, COUNT(DISTINCT r.entity_key) DESC, r.label
+                """, params)
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error computing facets: {e}")
+            raise DatabaseError(f"Database operation failed: {str(e)}")
+        
+        facets = {facet: [] for facet, _ in facet_queries}
+        for facet, value, label, count in rows:
+            if value is not None and facet in INT_FACETS:
+                value = int(value)
+            facets[facet].append({'value': value, 'label': label, 'count': count})
+        return facets
\ No newline at end of file
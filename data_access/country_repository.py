@@ -78,9 +78,13 @@ class CountryRepository(BaseRepository):
         """Получение списка стран для выпадающих списков"""
         return self._execute_function('sp_get_countries_dropdown', (existing_only,))
     
-    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
-        """Полнотекстовый поиск стран"""
-        return self._execute_function('sp_search_countries_fulltext', (search_text, offset, limit))
+    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20,
+                       fuzzy: bool = False, similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск стран; нечеткий по названию при fuzzy или пустом результате"""
+        if fuzzy:
+            return self._search_fuzzy('countries', search_text, similarity_threshold, offset, limit)
+        return self._search_fulltext_or_fuzzy('countries', 'sp_search_countries_fulltext', (search_text,), search_text,
+                                              offset, limit, similarity_threshold)
     
     def get_statistics(self) -> Dict[str, Any]:
         """Получение статистики по странам"""
@@ -1,6 +1,20 @@
 from typing import List, Dict, Any, Optional
 from datetime import date
-from .base_repository import BaseRepository
+import logging
+from .base_repository import BaseRepository, CENTURY_SQL
+from core.exceptions import DatabaseError
+from utils.highlighting import MARK_START, MARK_STOP
+
+logger = logging.getLogger(__name__)
+
+# Выделение найденных слов во фрагментах (маркеры, HTML строится на клиенте) и разделитель фрагментов ts_headline
+SNIPPET_START_SEL = MARK_START
+SNIPPET_STOP_SEL = MARK_STOP
+SNIPPET_DELIMITER = '\u241e'
+# Сколько текста документа просматривается при построении фрагментов
+SNIPPET_CONTENT_LIMIT = 200000
+# Сколько содержимого документа попадает в search_index.document (database/search_index.sql)
+SEARCH_INDEX_CONTENT_LIMIT = 200000
 
 class DocumentRepository(BaseRepository):
     """Репозиторий для работы с документами"""
@@ -15,6 +29,59 @@ class DocumentRepository(BaseRepository):
             person_id, event_id, content_search, sort_by
         ))
     
+    def get_documents_facets(self, search_term: str = None, creating_year_from: int = None,
+                             creating_year_to: int = None, person_id: int = None, event_id: int = None,
+                             content_search: str = None,
+                             use_search_index: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Счетчики по векам создания, типам и странам связанных событий для фильтров списка документов
+        
+        Фасет века не учитывает диапазон лет создания, чтобы показывать число документов каждого века.
+        Фильтр по тексту совпадает с фильтром sp_get_documents; с единым индексом (use_search_index)
+        содержимое разбирается только у найденных им документов и у документов длиннее индексируемой части.
+        """
+        content_match = "to_tsvector('russian', d.content) @@ websearch_to_tsquery('russian', %(content_search)s::text)"
+        if use_search_index:
+            content_match = f"""(d.document_id IN (
+                       SELECT si.entity_id FROM public.search_index si
+                       WHERE si.entity_type = 'DOCUMENT'
+                         AND si.document @@ websearch_to_tsquery('russian', %(content_search)s::text))
+                   OR octet_length(d.content) > {SEARCH_INDEX_CONTENT_LIMIT})
+                  AND {content_match}"""
+        
+        base_query = f"""
+            SELECT d.document_id AS entity_key, d.creating_date,
+                   (%(creating_year_from)s::int IS NULL OR extract(year FROM d.creating_date) >= %(creating_year_from)s::int)
+                   AND (%(creating_year_to)s::int IS NULL OR extract(year FROM d.creating_date) <= %(creating_year_to)s::int)
+                   AS years_ok
+            FROM public.documents d
+            WHERE (%(search_term)s::text IS NULL OR d.name ILIKE '%%' || %(search_term)s::text || '%%')
+              AND (%(person_id)s::int IS NULL OR EXISTS (
+                   SELECT 1 FROM public.documents_persons dp
+                   WHERE dp.document_id = d.document_id AND dp.person_id = %(person_id)s::int))
+              AND (%(event_id)s::int IS NULL OR EXISTS (
+                   SELECT 1 FROM public.documents_events de
+                   WHERE de.document_id = d.document_id AND de.event_id = %(event_id)s::int))
+              AND (%(content_search)s::text IS NULL OR {content_match})
+        """
+        facet_queries = [
+            ('century', f"SELECT {CENTURY_SQL.format('f.creating_date')}, NULL, f.entity_key FROM f"),
+            ('event_type', "SELECT e.event_type, e.event_type, f.entity_key FROM f "
+                           "JOIN public.documents_events de ON de.document_id = f.entity_key "
+                           "JOIN public.events e ON e.event_id = de.event_id WHERE f.years_ok"),
+            ('country', "SELECT ce.country_id, c.name, f.entity_key FROM f "
+                        "JOIN public.documents_events de ON de.document_id = f.entity_key "
+                        "JOIN public.countries_events ce ON ce.event_id = de.event_id "
+                        "JOIN public.countries c ON c.country_id = ce.country_id WHERE f.years_ok")
+        ]
+        return self._fetch_facets(base_query, facet_queries, {
+            'search_term': search_term or None,
+            'creating_year_from': creating_year_from,
+            'creating_year_to': creating_year_to,
+            'person_id': person_id,
+            'event_id': event_id,
+            'content_search': content_search or None
+        })
+    
     def get_by_id(self, document_id: int) -> Optional[Dict[str, Any]]:
         """Получение документа по ID"""
         result = self._execute_function('sp_get_document_by_id', (document_id,))
@@ -71,15 +138,56 @@ class DocumentRepository(BaseRepository):
         return self._execute_function('sp_get_document_events', (document_id, offset, limit))
     
     def search_fulltext(self, search_text: str, search_in_content: bool = True,
-                       offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
-        """Полнотекстовый поиск документов"""
-        return self._execute_function('sp_search_documents_fulltext', (search_text, search_in_content, offset, limit))
+                       offset: int = 0, limit: int = 20, fuzzy: bool = False,
+                       similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск документов; нечеткий по названию при fuzzy или пустом результате"""
+        if fuzzy:
+            return self._search_fuzzy('documents', search_text, similarity_threshold, offset, limit)
+        return self._search_fulltext_or_fuzzy('documents', 'sp_search_documents_fulltext',
+                                              (search_text, search_in_content), search_text,
+                                              offset, limit, similarity_threshold)
     
     def get_search_snippets(self, document_id: int, search_text: str,
                            snippet_count: int = 3, snippet_length: int = 150) -> List[Dict[str, Any]]:
         """Получение фрагментов текста с выделением найденных слов"""
         return self._execute_function('sp_get_document_search_snippets', (document_id, search_text, snippet_count, snippet_length))
     
+    def get_search_snippets_batch(self, document_ids: List[int], search_text: str,
+                                  snippet_count: int = 3, snippet_length: int = 150) -> Dict[int, List[str]]:
+        """Фрагменты с выделением найденных слов для нескольких документов одним запросом"""
+        if not document_ids:
+            return {}
+        
+        # Длина фрагмента задается в символах, ts_headline ограничивает ее словами
+        max_words = max(5, snippet_length // 7)
+        options = (f'MaxFragments={snippet_count}, MaxWords={max_words}, MinWords={max(3, max_words // 3)}, '
+                   f'StartSel="{SNIPPET_START_SEL}", StopSel="{SNIPPET_STOP_SEL}", '
+                   f'FragmentDelimiter="{SNIPPET_DELIMITER}"')
+        
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT d.document_id,
+                           ts_headline('russian', left(d.content, %(content_limit)s),
+                                       websearch_to_tsquery('russian', %(search_text)s), %(options)s)
+                    FROM public.documents d
+                    WHERE d.document_id = ANY(%(document_ids)s)
+                """, {
+                    'content_limit': SNIPPET_CONTENT_LIMIT,
+                    'search_text': search_text,
+                    'options': options,
+                    'document_ids': list(document_ids)
+                })
+                
+                return {
+                    document_id: [fragment.strip() for fragment in (headline or '').split(SNIPPET_DELIMITER)
+                                  if fragment.strip()]
+                    for document_id, headline in cursor.fetchall()
+                }
+        except Exception as e:
+            logger.error(f"Error getting document snippets: {e}")
+            raise DatabaseError(f"Database operation failed: {str(e)}")
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Получение статистики по документам"""
         result = self._execute_function('sp_get_documents_statistics')
@@ -1,6 +1,6 @@
 from typing import List, Dict, Any, Optional
 from datetime import date
-from .base_repository import BaseRepository
+from .base_repository import BaseRepository, CENTURY_SQL
 
 class EventRepository(BaseRepository):
     """Репозиторий для работы с событиями"""
@@ -18,6 +18,59 @@ class EventRepository(BaseRepository):
             parent_id, country_id, person_id, only_root_events
         ))
     
+    def get_events_facets(self, search_term: str = None, event_type: str = None, location: str = None,
+                          start_year_from: int = None, start_year_to: int = None,
+                          end_year_from: int = None, end_year_to: int = None,
+                          parent_id: int = None, country_id: int = None, person_id: int = None,
+                          only_root_events: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Счетчики по типам, векам начала, странам и типам источников для фильтров списка событий
+        
+        Фасеты типа и страны не учитывают собственный выбранный фильтр.
+        """
+        base_query = """
+            SELECT e.event_id AS entity_key, e.event_type, e.start_date,
+                   (%(event_type)s::text IS NULL OR e.event_type = %(event_type)s::text) AS type_ok,
+                   (%(country_id)s::int IS NULL OR EXISTS (
+                        SELECT 1 FROM public.countries_events ce
+                        WHERE ce.event_id = e.event_id AND ce.country_id = %(country_id)s::int)) AS country_ok
+            FROM public.events e
+            WHERE (%(search_term)s::text IS NULL OR e.name ILIKE '%%' || %(search_term)s::text || '%%')
+              AND (%(location)s::text IS NULL OR e.location ILIKE '%%' || %(location)s::text || '%%')
+              AND (%(start_year_from)s::int IS NULL OR extract(year FROM e.start_date) >= %(start_year_from)s::int)
+              AND (%(start_year_to)s::int IS NULL OR extract(year FROM e.start_date) <= %(start_year_to)s::int)
+              AND (%(end_year_from)s::int IS NULL OR extract(year FROM e.end_date) >= %(end_year_from)s::int)
+              AND (%(end_year_to)s::int IS NULL OR extract(year FROM e.end_date) <= %(end_year_to)s::int)
+              AND (%(parent_id)s::int IS NULL OR e.parent_id = %(parent_id)s::int)
+              AND (%(person_id)s::int IS NULL OR EXISTS (
+                   SELECT 1 FROM public.events_persons ep
+                   WHERE ep.event_id = e.event_id AND ep.person_id = %(person_id)s::int))
+              AND (NOT %(only_root_events)s OR e.parent_id IS NULL)
+        """
+        facet_queries = [
+            ('event_type', "SELECT f.event_type, f.event_type, f.entity_key FROM f WHERE f.country_ok"),
+            ('century', f"SELECT {CENTURY_SQL.format('f.start_date')}, NULL, f.entity_key FROM f "
+                        "WHERE f.type_ok AND f.country_ok"),
+            ('country', "SELECT ce.country_id, c.name, f.entity_key FROM f "
+                        "JOIN public.countries_events ce ON ce.event_id = f.entity_key "
+                        "JOIN public.countries c ON c.country_id = ce.country_id WHERE f.type_ok"),
+            ('source_type', "SELECT s.type, s.type, f.entity_key FROM f "
+                            "JOIN public.events_sources es ON es.event_id = f.entity_key "
+                            "JOIN public.sources s ON s.source_id = es.source_id WHERE f.type_ok AND f.country_ok")
+        ]
+        return self._fetch_facets(base_query, facet_queries, {
+            'search_term': search_term or None,
+            'event_type': event_type or None,
+            'location': location or None,
+            'start_year_from': start_year_from,
+            'start_year_to': start_year_to,
+            'end_year_from': end_year_from,
+            'end_year_to': end_year_to,
+            'parent_id': parent_id,
+            'country_id': country_id,
+            'person_id': person_id,
+            'only_root_events': bool(only_root_events)
+        })
+    
     def get_by_id(self, event_id: int) -> Optional[Dict[str, Any]]:
         """Получение события по ID"""
         result = self._execute_function('sp_get_event_by_id', (event_id,))
@@ -97,9 +150,13 @@ class EventRepository(BaseRepository):
         """Получение источников, связанных с событием"""
         return self._execute_function('sp_get_event_sources', (event_id, offset, limit))
     
-    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
-        """Полнотекстовый поиск событий"""
-        return self._execute_function('sp_search_events_fulltext', (search_text, offset, limit))
+    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20,
+                       fuzzy: bool = False, similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск событий; нечеткий по названию при fuzzy или пустом результате"""
+        if fuzzy:
+            return self._search_fuzzy('events', search_text, similarity_threshold, offset, limit)
+        return self._search_fulltext_or_fuzzy('events', 'sp_search_events_fulltext', (search_text,), search_text,
+                                              offset, limit, similarity_threshold)
     
     def get_timeline(self, year_from: int = None, year_to: int = None,
                     event_type: str = None, limit: int = 100) -> List[Dict[str, Any]]:
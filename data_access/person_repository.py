@@ -1,6 +1,6 @@
 from typing import List, Dict, Any, Optional
 from datetime import date
-from .base_repository import BaseRepository
+from .base_repository import BaseRepository, CENTURY_SQL
 from models.person import Person
 
 class PersonRepository(BaseRepository):
@@ -16,6 +16,44 @@ class PersonRepository(BaseRepository):
             death_year_from, death_year_to, alive_only
         ))
     
+    def get_persons_facets(self, search_term: str = None, country_id: int = None,
+                           birth_year_from: int = None, birth_year_to: int = None,
+                           death_year_from: int = None, death_year_to: int = None,
+                           alive_only: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Счетчики по странам, векам рождения и типам событий для фильтров списка персон
+        
+        Фасет страны не учитывает выбранную страну, чтобы показывать число персон каждой страны.
+        """
+        base_query = """
+            SELECT p.person_id AS entity_key, p.country_id, p.date_of_birth,
+                   (%(country_id)s::int IS NULL OR p.country_id = %(country_id)s::int) AS country_ok
+            FROM public.persons p
+            WHERE (%(search_term)s::text IS NULL
+                   OR concat_ws(' ', p.name, p.patronymic, p.surname) ILIKE '%%' || %(search_term)s::text || '%%')
+              AND (%(birth_year_from)s::int IS NULL OR extract(year FROM p.date_of_birth) >= %(birth_year_from)s::int)
+              AND (%(birth_year_to)s::int IS NULL OR extract(year FROM p.date_of_birth) <= %(birth_year_to)s::int)
+              AND (%(death_year_from)s::int IS NULL OR extract(year FROM p.date_of_death) >= %(death_year_from)s::int)
+              AND (%(death_year_to)s::int IS NULL OR extract(year FROM p.date_of_death) <= %(death_year_to)s::int)
+              AND (NOT %(alive_only)s OR p.date_of_death IS NULL)
+        """
+        facet_queries = [
+            ('country', "SELECT f.country_id, c.name, f.entity_key FROM f "
+                        "LEFT JOIN public.countries c ON c.country_id = f.country_id"),
+            ('century', f"SELECT {CENTURY_SQL.format('f.date_of_birth')}, NULL, f.entity_key FROM f WHERE f.country_ok"),
+            ('event_type', "SELECT e.event_type, e.event_type, f.entity_key FROM f "
+                           "JOIN public.events_persons ep ON ep.person_id = f.entity_key "
+                           "JOIN public.events e ON e.event_id = ep.event_id WHERE f.country_ok")
+        ]
+        return self._fetch_facets(base_query, facet_queries, {
+            'search_term': search_term or None,
+            'country_id': country_id,
+            'birth_year_from': birth_year_from,
+            'birth_year_to': birth_year_to,
+            'death_year_from': death_year_from,
+            'death_year_to': death_year_to,
+            'alive_only': bool(alive_only)
+        })
+    
     def get_by_id(self, person_id: int) -> Optional[Dict[str, Any]]:
         """Получение персоны по ID"""
         result = self._execute_function('sp_get_person_by_id', (person_id,))
@@ -79,9 +117,13 @@ class PersonRepository(BaseRepository):
         """Получение документов, связанных с персоной"""
         return self._execute_function('sp_get_person_documents', (person_id, offset, limit))
     
-    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
-        """Полнотекстовый поиск персон"""
-        return self._execute_function('sp_search_persons_fulltext', (search_text, offset, limit))
+    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20,
+                       fuzzy: bool = False, similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск персон; нечеткий по названию при fuzzy или пустом результате"""
+        if fuzzy:
+            return self._search_fuzzy('persons', search_text, similarity_threshold, offset, limit)
+        return self._search_fulltext_or_fuzzy('persons', 'sp_search_persons_fulltext', (search_text,), search_text,
+                                              offset, limit, similarity_threshold)
     
     def get_statistics(self) -> Dict[str, Any]:
         """Получение статистики по персонам"""
@@ -1,9 +1,89 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterator, Iterable, Callable
+import logging
+from psycopg import errors as pg_errors
 from .base_repository import BaseRepository
+from core.exceptions import DatabaseError, QueryCancelledError
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Таблицы сущностей: тип сущности -> (таблица, первичный ключ)
+ENTITY_TABLES = {
+    'PERSON': ('persons', 'person_id'),
+    'EVENT': ('events', 'event_id'),
+    'COUNTRY': ('countries', 'country_id'),
+    'DOCUMENT': ('documents', 'document_id'),
+    'SOURCE': ('sources', 'source_id'),
+}
+
+# Таблицы связей: таблица -> (тип первой сущности, колонка, тип второй сущности, колонка)
+LINK_TABLES = {
+    'events_persons': ('PERSON', 'person_id', 'EVENT', 'event_id'),
+    'countries_events': ('COUNTRY', 'country_id', 'EVENT', 'event_id'),
+    'documents_persons': ('DOCUMENT', 'document_id', 'PERSON', 'person_id'),
+    'documents_events': ('DOCUMENT', 'document_id', 'EVENT', 'event_id'),
+    'events_sources': ('EVENT', 'event_id', 'SOURCE', 'source_id'),
+}
+
+# Выражение отображаемого имени сущности (алиас таблицы — t)
+ENTITY_NAME_EXPRESSIONS = {
+    'PERSON': "concat_ws(' ', t.name, t.surname)",
+    'EVENT': 't.name',
+    'COUNTRY': 't.name',
+    'DOCUMENT': 't.name',
+    'SOURCE': 't.name',
+}
+
+# Счетчики степени: тип сущности -> [(колонка счетчика, таблица, колонка ссылки на сущность)]
+DEGREE_COUNTERS = {
+    'PERSON': [('events_count', 'events_persons', 'person_id'),
+               ('documents_count', 'documents_persons', 'person_id')],
+    'EVENT': [('persons_count', 'events_persons', 'event_id'),
+              ('countries_count', 'countries_events', 'event_id'),
+              ('documents_count', 'documents_events', 'event_id'),
+              ('sources_count', 'events_sources', 'event_id')],
+    'COUNTRY': [('events_count', 'countries_events', 'country_id'),
+                ('persons_count', 'persons', 'country_id')],
+    'DOCUMENT': [('persons_count', 'documents_persons', 'document_id'),
+                 ('events_count', 'documents_events', 'document_id')],
+    'SOURCE': [('events_count', 'events_sources', 'source_id')],
+}
+
+# Колонки счетчиков таблицы relationship_degrees
+DEGREE_COLUMNS = ('persons_count', 'events_count', 'countries_count', 'documents_count', 'sources_count')
+
+# Диапазон id сущностей, пересчитываемый одной короткой транзакцией при перестройке степеней
+DEGREES_REBUILD_RANGE = 5000
+
+# Колонки названия в рейтинге самых связанных
+MOST_CONNECTED_NAME_COLUMNS = {
+    'PERSON': ('name', 'surname'),
+    'EVENT': ('name',),
+    'COUNTRY': ('name',),
+    'DOCUMENT': ('name',),
+    'SOURCE': ('name', 'author'),
+}
+
+# Связи: (тип сущности, связь) -> (таблица связей, колонка сущности, колонка связанной сущности, тип связанной сущности)
+RELATIONS = {
+    ('PERSON', 'events'): ('events_persons', 'person_id', 'event_id', 'EVENT'),
+    ('PERSON', 'documents'): ('documents_persons', 'person_id', 'document_id', 'DOCUMENT'),
+    ('EVENT', 'persons'): ('events_persons', 'event_id', 'person_id', 'PERSON'),
+    ('EVENT', 'countries'): ('countries_events', 'event_id', 'country_id', 'COUNTRY'),
+    ('EVENT', 'documents'): ('documents_events', 'event_id', 'document_id', 'DOCUMENT'),
+    ('EVENT', 'sources'): ('events_sources', 'event_id', 'source_id', 'SOURCE'),
+    ('COUNTRY', 'events'): ('countries_events', 'country_id', 'event_id', 'EVENT'),
+    ('DOCUMENT', 'persons'): ('documents_persons', 'document_id', 'person_id', 'PERSON'),
+    ('DOCUMENT', 'events'): ('documents_events', 'document_id', 'event_id', 'EVENT'),
+    ('SOURCE', 'events'): ('events_sources', 'source_id', 'event_id', 'EVENT'),
+}
 
 class RelationshipsRepository(BaseRepository):
     """Репозиторий для управления связями many-to-many между сущностями"""
     
+    # Наличие таблицы степеней проверяется один раз
+    _degrees_available = None
+    
     # ========================================
     # УПРАВЛЕНИЕ СВЯЗЯМИ ПЕРСОН И СОБЫТИЙ
     # ========================================
@@ -443,112 +523,387 @@ class RelationshipsRepository(BaseRepository):
     # МАССОВЫЕ ОПЕРАЦИИ СО СВЯЗЯМИ
     # ========================================
     
-    def batch_link_persons_to_event(self, person_ids: List[int], event_id: int, user_id: int) -> Dict[str, Any]:
-        """Массовое связывание персон с событием"""
-        success_count = 0
-        failed_ids = []
-        
-        for person_id in person_ids:
-            if self.link_person_to_event(person_id, event_id, user_id):
-                success_count += 1
-            else:
-                failed_ids.append(person_id)
+    def _batch_link(self, entity_type: str, entity_id: int, relation: str, linked_ids: List[int],
+                    user_id: int, action_type: str, description: str) -> Dict[str, Any]:
+        """Массовое связывание одним INSERT ... SELECT FROM unnest с одной записью аудита"""
+        link_table, own_column, linked_column, linked_type = RELATIONS[(entity_type, relation)]
+        own_table, own_pk = ENTITY_TABLES[entity_type]
+        linked_table, linked_pk = ENTITY_TABLES[linked_type]
+        requested_ids = list(dict.fromkeys(int(linked_id) for linked_id in linked_ids))
         
-        return {
-            'success_count': success_count,
-            'failed_count': len(failed_ids),
-            'failed_ids': failed_ids,
-            'total_requested': len(person_ids)
+        result = {
+            'success_count': 0,
+            'failed_count': len(requested_ids),
+            'failed_ids': requested_ids,
+            'total_requested': len(linked_ids),
+            'linked_ids': [],
+            'already_linked_ids': [],
+            'missing_ids': []
         }
+        if not requested_ids:
+            return result
+        
+        try:
+            with self.db.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    # Проверка существования, вставка и пропуск существующих связей одним запросом
+                    cursor.execute(f"""
+                        WITH requested AS (
+                            SELECT DISTINCT unnest(%(ids)s::bigint[]) AS id
+                        ),
+                        valid AS (
+                            SELECT r.id
+                            FROM requested r
+                            JOIN public.{linked_table} t ON t.{linked_pk} = r.id
+                            WHERE EXISTS (SELECT 1 FROM public.{own_table} o WHERE o.{own_pk} = %(entity_id)s)
+                        ),
+                        inserted AS (
+                            INSERT INTO public.{link_table} ({own_column}, {linked_column})
+                            SELECT %(entity_id)s, v.id
+                            FROM valid v
+                            WHERE NOT EXISTS (
+                                SELECT 1 FROM public.{link_table} l
+                                WHERE l.{own_column} = %(entity_id)s AND l.{linked_column} = v.id
+                            )
+                            ON CONFLICT DO NOTHING
+                            RETURNING {linked_column}
+                        )
+                        SELECT ARRAY(SELECT id FROM valid), ARRAY(SELECT {linked_column} FROM inserted)
+                    """, {'ids': requested_ids, 'entity_id': entity_id})
+                    valid_ids, inserted_ids = cursor.fetchone()
+                    
+                    # Одна сводная запись аудита на весь пакет
+                    if inserted_ids:
+                        cursor.execute(
+                            "SELECT sp_log_user_action(%s, %s, %s, %s, %s)",
+                            (user_id, action_type, entity_type, entity_id,
+                             f'{description}: связано {len(inserted_ids)} из {len(requested_ids)}')
+                        )
+                    
+                    conn.commit()
+        except Exception as e:
+            logger.error(f"Error batch linking {relation} to {entity_type} {entity_id}: {e}")
+            return result
+        
+        valid_set = set(valid_ids)
+        inserted_set = set(inserted_ids)
+        result.update({
+            'success_count': len(inserted_set),
+            'failed_ids': [linked_id for linked_id in requested_ids if linked_id not in inserted_set],
+            'linked_ids': [linked_id for linked_id in requested_ids if linked_id in inserted_set],
+            'already_linked_ids': [linked_id for linked_id in requested_ids
+                                   if linked_id in valid_set and linked_id not in inserted_set],
+            'missing_ids': [linked_id for linked_id in requested_ids if linked_id not in valid_set]
+        })
+        result['failed_count'] = len(result['failed_ids'])
+        return result
+    
+    def batch_link_persons_to_event(self, person_ids: List[int], event_id: int, user_id: int) -> Dict[str, Any]:
+        """Массовое связывание персон с событием"""
+        return self._batch_link('EVENT', event_id, 'persons', person_ids, user_id,
+                                'BATCH_PERSONS_EVENT_LINKED', 'Массовое связывание персон с событием')
     
     def batch_link_countries_to_event(self, country_ids: List[int], event_id: int, user_id: int) -> Dict[str, Any]:
         """Массовое связывание стран с событием"""
-        success_count = 0
-        failed_ids = []
-        
-        for country_id in country_ids:
-            if self.link_country_to_event(country_id, event_id, user_id):
-                success_count += 1
-            else:
-                failed_ids.append(country_id)
-        
-        return {
-            'success_count': success_count,
-            'failed_count': len(failed_ids),
-            'failed_ids': failed_ids,
-            'total_requested': len(country_ids)
-        }
+        return self._batch_link('EVENT', event_id, 'countries', country_ids, user_id,
+                                'BATCH_COUNTRIES_EVENT_LINKED', 'Массовое связывание стран с событием')
     
     def batch_link_documents_to_person(self, document_ids: List[int], person_id: int, user_id: int) -> Dict[str, Any]:
         """Массовое связывание документов с персоной"""
-        success_count = 0
-        failed_ids = []
+        return self._batch_link('PERSON', person_id, 'documents', document_ids, user_id,
+                                'BATCH_DOCUMENTS_PERSON_LINKED', 'Массовое связывание документов с персоной')
+    
+    def batch_link_sources_to_event(self, source_ids: List[int], event_id: int, user_id: int) -> Dict[str, Any]:
+        """Массовое связывание источников с событием"""
+        return self._batch_link('EVENT', event_id, 'sources', source_ids, user_id,
+                                'BATCH_SOURCES_EVENT_LINKED', 'Массовое связывание источников с событием')
+    
+    def apply_relationship_changes(self, entity_type: str, entity_id: int, relation: str, user_id: int,
+                                   add_ids: List[int] = None, remove_ids: List[int] = None,
+                                   replace: bool = False) -> Dict[str, Any]:
+        """Применение изменений связей одним запросом в одной транзакции с одной записью аудита
+        
+        При replace=True add_ids считается полным желаемым набором: все прочие связи удаляются.
+        """
+        link_table, own_column, linked_column, linked_type = RELATIONS[(entity_type, relation)]
+        own_table, own_pk = ENTITY_TABLES[entity_type]
+        linked_table, linked_pk = ENTITY_TABLES[linked_type]
+        add_ids = list(dict.fromkeys(int(linked_id) for linked_id in (add_ids or [])))
+        remove_ids = list(dict.fromkeys(int(linked_id) for linked_id in (remove_ids or [])))
         
-        for document_id in document_ids:
-            if self.link_document_to_person(document_id, person_id, user_id):
-                success_count += 1
-            else:
-                failed_ids.append(document_id)
+        try:
+            with self.db.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"""
+                        WITH requested AS (
+                            SELECT DISTINCT unnest(%(add_ids)s::bigint[]) AS id
+                        ),
+                        valid AS (
+                            SELECT r.id
+                            FROM requested r
+                            JOIN public.{linked_table} t ON t.{linked_pk} = r.id
+                            WHERE EXISTS (SELECT 1 FROM public.{own_table} o WHERE o.{own_pk} = %(entity_id)s)
+                        ),
+                        deleted AS (
+                            DELETE FROM public.{link_table} l
+                            WHERE l.{own_column} = %(entity_id)s
+                              AND ((%(replace)s AND l.{linked_column} <> ALL(%(add_ids)s::bigint[]))
+                                   OR l.{linked_column} = ANY(%(remove_ids)s::bigint[]))
+                            RETURNING l.{linked_column}
+                        ),
+                        inserted AS (
+                            INSERT INTO public.{link_table} ({own_column}, {linked_column})
+                            SELECT %(entity_id)s, v.id
+                            FROM valid v
+                            WHERE NOT EXISTS (
+                                SELECT 1 FROM public.{link_table} l
+                                WHERE l.{own_column} = %(entity_id)s AND l.{linked_column} = v.id
+                            )
+                            ON CONFLICT DO NOTHING
+                            RETURNING {linked_column}
+                        )
+                        SELECT ARRAY(SELECT id FROM requested EXCEPT SELECT id FROM valid),
+                               ARRAY(SELECT {linked_column} FROM inserted),
+                               ARRAY(SELECT {linked_column} FROM deleted)
+                    """, {'add_ids': add_ids, 'remove_ids': remove_ids,
+                          'entity_id': entity_id, 'replace': replace})
+                    missing_ids, added_ids, removed_ids = cursor.fetchone()
+                    
+                    if added_ids or removed_ids:
+                        cursor.execute(
+                            "SELECT sp_log_user_action(%s, %s, %s, %s, %s)",
+                            (user_id, 'RELATIONSHIPS_SYNCED' if replace else 'RELATIONSHIPS_CHANGED',
+                             entity_type, entity_id,
+                             f'Связи {relation}: добавлено {len(added_ids)}, удалено {len(removed_ids)}')
+                        )
+                    
+                    conn.commit()
+        except Exception as e:
+            logger.error(f"Error applying {relation} changes to {entity_type} {entity_id}: {e}")
+            raise DatabaseError(f"Не удалось изменить связи: {e}")
         
         return {
-            'success_count': success_count,
-            'failed_count': len(failed_ids),
-            'failed_ids': failed_ids,
-            'total_requested': len(document_ids)
+            'added_ids': sorted(added_ids),
+            'removed_ids': sorted(removed_ids),
+            'missing_ids': sorted(missing_ids),
+            'added_count': len(added_ids),
+            'removed_count': len(removed_ids)
         }
     
-    def batch_link_sources_to_event(self, source_ids: List[int], event_id: int, user_id: int) -> Dict[str, Any]:
-        """Массовое связывание источников с событием"""
-        success_count = 0
-        failed_ids = []
+    def sync_relationships(self, entity_type: str, entity_id: int, relation: str,
+                           desired_ids: List[int], user_id: int) -> Dict[str, Any]:
+        """Приведение набора связей сущности к желаемому"""
+        return self.apply_relationship_changes(entity_type, entity_id, relation, user_id,
+                                               add_ids=desired_ids, replace=True)
+    
+    def iter_all_links(self, batch_size: int = 10000) -> Iterator[Tuple[str, int, str, int]]:
+        """Потоковое чтение всех связей (тип, id, тип, id) через серверные курсоры"""
+        with self.db.get_connection() as conn:
+            for table, (type_a, column_a, type_b, column_b) in LINK_TABLES.items():
+                with conn.cursor(name=f'links_{table}') as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(f"SELECT {column_a}, {column_b} FROM public.{table}")
+                    for id_a, id_b in cursor:
+                        yield type_a, id_a, type_b, id_b
+    
+    def iter_link_batches(self, table: str, batch_size: int = 10000) -> Iterator[List[Tuple[int, int]]]:
+        """Потоковое чтение таблицы связей пакетами через серверный курсор"""
+        _, column_a, _, column_b = LINK_TABLES[table]
+        with self.db.get_connection() as conn:
+            with conn.cursor(name=f'export_{table}') as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"SELECT {column_a}, {column_b} FROM public.{table} ORDER BY {column_a}, {column_b}")
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    yield batch
+    
+    # ========================================
+    # ОБХОД ГРАФА СВЯЗЕЙ
+    # ========================================
+    
+    def traverse_relationships(self, entity_type: str, entity_id: int, max_depth: int = 2,
+                               edge_types: List[str] = None, target_types: List[str] = None,
+                               offset: int = 0, limit: int = 50,
+                               include_paths: bool = False) -> Dict[str, Any]:
+        """Окрестность сущности в пределах max_depth шагов одним рекурсивным запросом"""
+        tables = [table for table in LINK_TABLES if not edge_types or table in edge_types]
         
-        for source_id in source_ids:
-            if self.link_event_to_source(event_id, source_id, user_id):
-                success_count += 1
-            else:
-                failed_ids.append(source_id)
+        # Ребра в обе стороны по разрешенным таблицам связей
+        edge_selects = []
+        for table in tables:
+            type_a, column_a, type_b, column_b = LINK_TABLES[table]
+            edge_selects.append(f"SELECT '{type_a}'::text, {column_a}::bigint, '{type_b}'::text, {column_b}::bigint "
+                                f"FROM public.{table}")
+            edge_selects.append(f"SELECT '{type_b}'::text, {column_b}::bigint, '{type_a}'::text, {column_a}::bigint "
+                                f"FROM public.{table}")
         
-        return {
-            'success_count': success_count,
-            'failed_count': len(failed_ids),
-            'failed_ids': failed_ids,
-            'total_requested': len(source_ids)
+        # Родитель нужен только для восстановления путей; без него UNION схлопывает повторы узлов
+        parent_columns = "w.entity_type, w.entity_id" if include_paths else "NULL::text, NULL::bigint"
+        name_cases = ' '.join(
+            f"WHEN '{type_name}' THEN (SELECT {ENTITY_NAME_EXPRESSIONS[type_name]} FROM public.{table} t "
+            f"WHERE t.{pk} = p.entity_id)"
+            for type_name, (table, pk) in ENTITY_TABLES.items()
+        )
+        
+        query = f"""
+            WITH RECURSIVE edges(src_type, src_id, dst_type, dst_id) AS (
+                {' UNION ALL '.join(edge_selects)}
+            ),
+            walk(entity_type, entity_id, depth, parent_type, parent_id) AS (
+                SELECT %(entity_type)s::text, %(entity_id)s::bigint, 0, NULL::text, NULL::bigint
+                UNION
+                SELECT e.dst_type, e.dst_id, w.depth + 1, {parent_columns}
+                FROM walk w
+                JOIN edges e ON e.src_type = w.entity_type AND e.src_id = w.entity_id
+                WHERE w.depth < %(max_depth)s
+            ),
+            nearest AS (
+                -- Минимальная глубина каждого узла и канонический родитель на кратчайшем пути
+                SELECT DISTINCT ON (entity_type, entity_id) entity_type, entity_id, depth, parent_type, parent_id
+                FROM walk
+                ORDER BY entity_type, entity_id, depth, parent_type, parent_id
+            ),
+            matched AS (
+                SELECT * FROM nearest
+                WHERE depth > 0
+                  AND (%(target_types)s::text[] IS NULL OR entity_type = ANY(%(target_types)s::text[]))
+            ),
+            page AS (
+                SELECT * FROM matched
+                ORDER BY depth, entity_type, entity_id
+                OFFSET %(offset)s LIMIT %(limit)s
+            ),
+            paths(target_type, target_id, entity_type, entity_id, path) AS (
+                SELECT p.entity_type, p.entity_id, p.entity_type, p.entity_id,
+                       ARRAY[p.entity_type || ':' || p.entity_id]
+                FROM page p
+                WHERE %(include_paths)s
+                UNION ALL
+                SELECT x.target_type, x.target_id, n.parent_type, n.parent_id,
+                       (n.parent_type || ':' || n.parent_id) || x.path
+                FROM paths x
+                JOIN nearest n ON n.entity_type = x.entity_type AND n.entity_id = x.entity_id
+                WHERE n.parent_type IS NOT NULL
+            )
+            SELECT p.entity_type, p.entity_id, p.depth,
+                   CASE p.entity_type {name_cases} END AS display_name,
+                   (SELECT x.path FROM paths x
+                    WHERE x.target_type = p.entity_type AND x.target_id = p.entity_id
+                    ORDER BY array_length(x.path, 1) DESC LIMIT 1) AS path,
+                   c.total_count
+            -- Общее число приходит и для пустой страницы (одна строка без узла)
+            FROM (SELECT COUNT(*) AS total_count FROM matched) c
+            LEFT JOIN page p ON true
+            ORDER BY p.depth, p.entity_type, p.entity_id
+        """
+        
+        params = {
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'max_depth': max_depth,
+            'target_types': list(target_types) if target_types else None,
+            'offset': offset,
+            'limit': limit,
+            'include_paths': include_paths
         }
+        
+        result = {'results': [], 'total_count': 0, 'offset': offset, 'limit': limit, 'max_depth': max_depth}
+        if not tables:
+            return result
+        
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(query, params)
+                for row_type, row_id, depth, display_name, path, total_count in cursor.fetchall():
+                    result['total_count'] = total_count
+                    if row_type is None:
+                        continue
+                    entry = {
+                        'entity_type': row_type,
+                        'entity_id': row_id,
+                        'depth': depth,
+                        'display_name': display_name
+                    }
+                    if include_paths:
+                        entry['path'] = [
+                            (step_type, int(step_id))
+                            for step_type, step_id in (step.split(':', 1) for step in (path or []))
+                        ]
+                    result['results'].append(entry)
+        except Exception as e:
+            logger.error(f"Error traversing relationships from {entity_type} {entity_id}: {e}")
+            raise DatabaseError(f"Не удалось выполнить обход связей: {e}")
+        
+        return result
     
     # ========================================
     # АНАЛИЗ СВЯЗЕЙ
     # ========================================
     
+    def _relation_count_columns(self, entity_type: str, id_expression: str) -> List[Tuple[str, str]]:
+        """Подзапросы подсчета связей сущности по каждому типу связи"""
+        return [
+            (relation, f"(SELECT COUNT(*) FROM public.{link_table} l WHERE l.{own_column} = {id_expression})")
+            for (own_type, relation), (link_table, own_column, _, _) in RELATIONS.items()
+            if own_type == entity_type
+        ]
+    
+    def get_entity_names(self, entity_type: str, entity_ids: List[int]) -> Dict[int, str]:
+        """Отображаемые имена набора сущностей одним запросом"""
+        table, pk = ENTITY_TABLES[entity_type]
+        entity_ids = list(dict.fromkeys(int(entity_id) for entity_id in entity_ids))
+        if not entity_ids:
+            return {}
+        
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    f"SELECT t.{pk}, {ENTITY_NAME_EXPRESSIONS[entity_type]} FROM public.{table} t "
+                    f"WHERE t.{pk} = ANY(%s)",
+                    (entity_ids,)
+                )
+                return dict(cursor.fetchall())
+        except Exception as e:
+            logger.error(f"Error getting {entity_type} names: {e}")
+            return {}
+    
     def get_entity_relationships_summary(self, entity_type: str, entity_id: int) -> Dict[str, Any]:
-        """Получение сводки по связям сущности"""
+        """Получение сводки по связям сущности (все счетчики одним запросом)"""
         summary = {
             'entity_type': entity_type,
             'entity_id': entity_id,
             'relationships': {}
         }
         
-        if entity_type == 'PERSON':
-            summary['relationships']['events'] = len(self.get_person_events_links(entity_id))
-            summary['relationships']['documents'] = len(self.get_person_documents_links(entity_id))
-        
-        elif entity_type == 'EVENT':
-            summary['relationships']['persons'] = len(self.get_event_persons_links(entity_id))
-            summary['relationships']['countries'] = len(self.get_event_countries_links(entity_id))
-            summary['relationships']['documents'] = len(self.get_event_documents_links(entity_id))
-            summary['relationships']['sources'] = len(self.get_event_sources_links(entity_id))
-        
-        elif entity_type == 'COUNTRY':
-            summary['relationships']['events'] = len(self.get_country_events_links(entity_id))
-        
-        elif entity_type == 'DOCUMENT':
-            summary['relationships']['persons'] = len(self.get_document_persons_links(entity_id))
-            summary['relationships']['events'] = len(self.get_document_events_links(entity_id))
-        
-        elif entity_type == 'SOURCE':
-            summary['relationships']['events'] = len(self.get_source_events_links(entity_id))
-        
+        counts = self.get_relationship_counts(entity_type, [entity_id])
+        summary['relationships'] = counts.get(entity_id, {})
         return summary
     
+    def get_relationship_counts(self, entity_type: str, entity_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """Количество связей каждого типа для набора сущностей одним запросом"""
+        columns = self._relation_count_columns(entity_type, 'ids.id')
+        entity_ids = list(dict.fromkeys(int(entity_id) for entity_id in entity_ids))
+        if not columns or not entity_ids:
+            return {}
+        
+        try:
+            with self.db.get_cursor() as cursor:
+                select_list = ', '.join(f"{subquery} AS {relation}" for relation, subquery in columns)
+                cursor.execute(
+                    f"SELECT ids.id, {select_list} FROM unnest(%s::bigint[]) AS ids(id)",
+                    (entity_ids,)
+                )
+                relations = [relation for relation, _ in columns]
+                return {
+                    row[0]: dict(zip(relations, row[1:]))
+                    for row in cursor.fetchall()
+                }
+        except Exception as e:
+            logger.error(f"Error counting relationships for {entity_type} {entity_ids[:10]}: {e}")
+            return {}
+    
     def find_related_entities(self, entity_type: str, entity_id: int, relation_type: str) -> List[int]:
         """Поиск связанных сущностей по типу связи"""
         relationships_map = {
@@ -569,82 +924,62 @@ class RelationshipsRepository(BaseRepository):
             return func(entity_id)
         return []
     
+    def _degree_counts_query(self, entity_type: str = None, id_range: bool = False) -> str:
+        """Фактические счетчики связей (без размножения строк JOIN-ами)
+        
+        id_range ограничивает сущности параметрами %(low)s (NULL — без нижней границы) и %(high)s.
+        """
+        range_filter = (" AND (%(low)s::bigint IS NULL OR {0} >= %(low)s::bigint) AND {0} < %(high)s"
+                        if id_range else "")
+        selects = [
+            f"SELECT '{counted_type}' AS entity_type, {column} AS entity_id, '{counter}' AS counter, COUNT(*) AS cnt "
+            f"FROM public.{table} WHERE {column} IS NOT NULL{range_filter.format(column)} GROUP BY {column}"
+            for counted_type, counters in DEGREE_COUNTERS.items()
+            if entity_type is None or counted_type == entity_type
+            for counter, table, column in counters
+        ]
+        pivot = ', '.join(
+            f"COALESCE(SUM(cnt) FILTER (WHERE counter = '{counter}'), 0)::integer AS {counter}"
+            for counter in DEGREE_COLUMNS
+        )
+        return (f"SELECT entity_type, entity_id, {pivot}, SUM(cnt)::integer AS total_connections "
+                f"FROM ({' UNION ALL '.join(selects)}) counts GROUP BY entity_type, entity_id")
+    
+    def _degrees_table_exists(self) -> bool:
+        """Установлена ли таблица relationship_degrees (database/relationship_degrees.sql)"""
+        if self._degrees_available is None:
+            try:
+                with self.db.get_cursor() as cursor:
+                    cursor.execute("SELECT to_regclass('public.relationship_degrees') IS NOT NULL")
+                    self._degrees_available = cursor.fetchone()[0]
+                if not self._degrees_available:
+                    logger.warning("relationship_degrees table is missing, degrees are computed on the fly")
+            except Exception as e:
+                logger.error(f"Error checking relationship_degrees table: {e}")
+                return False
+        return self._degrees_available
+    
     def get_most_connected_entities(self, entity_type: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Получение самых связанных сущностей"""
+        """Получение самых связанных сущностей (top-k по индексу таблицы степеней)"""
+        if entity_type not in DEGREE_COUNTERS:
+            return []
+        
+        table, pk = ENTITY_TABLES[entity_type]
+        name_columns = ', '.join(f"t.{column}" for column in MOST_CONNECTED_NAME_COLUMNS[entity_type])
+        counters = ', '.join(f"d.{counter}" for counter, _, _ in DEGREE_COUNTERS[entity_type])
+        source = ("public.relationship_degrees" if self._degrees_table_exists()
+                  else f"({self._degree_counts_query()})")
+        
         try:
             with self.db.get_cursor() as cursor:
-                if entity_type == 'PERSON':
-                    cursor.execute("""
-                        SELECT p.person_id, p.name, p.surname,
-                               COUNT(DISTINCT ep.event_id) as events_count,
-                               COUNT(DISTINCT dp.document_id) as documents_count,
-                               (COUNT(DISTINCT ep.event_id) + COUNT(DISTINCT dp.document_id)) as total_connections
-                        FROM public.persons p
-                        LEFT JOIN public.events_persons ep ON p.person_id = ep.person_id
-                        LEFT JOIN public.documents_persons dp ON p.person_id = dp.person_id
-                        GROUP BY p.person_id, p.name, p.surname
-                        ORDER BY total_connections DESC
-                        LIMIT %s
-                    """, (limit,))
-                
-                elif entity_type == 'EVENT':
-                    cursor.execute("""
-                        SELECT e.event_id, e.name,
-                               COUNT(DISTINCT ep.person_id) as persons_count,
-                               COUNT(DISTINCT ce.country_id) as countries_count,
-                               COUNT(DISTINCT de.document_id) as documents_count,
-                               COUNT(DISTINCT es.source_id) as sources_count,
-                               (COUNT(DISTINCT ep.person_id) + COUNT(DISTINCT ce.country_id) + 
-                                COUNT(DISTINCT de.document_id) + COUNT(DISTINCT es.source_id)) as total_connections
-                        FROM public.events e
-                        LEFT JOIN public.events_persons ep ON e.event_id = ep.event_id
-                        LEFT JOIN public.countries_events ce ON e.event_id = ce.event_id
-                        LEFT JOIN public.documents_events de ON e.event_id = de.event_id
-                        LEFT JOIN public.events_sources es ON e.event_id = es.event_id
-                        GROUP BY e.event_id, e.name
-                        ORDER BY total_connections DESC
-                        LIMIT %s
-                    """, (limit,))
-                
-                elif entity_type == 'COUNTRY':
-                    cursor.execute("""
-                        SELECT c.country_id, c.name,
-                               COUNT(DISTINCT ce.event_id) as events_count,
-                               COUNT(DISTINCT p.person_id) as persons_count,
-                               (COUNT(DISTINCT ce.event_id) + COUNT(DISTINCT p.person_id)) as total_connections
-                        FROM public.countries c
-                        LEFT JOIN public.countries_events ce ON c.country_id = ce.country_id
-                        LEFT JOIN public.persons p ON c.country_id = p.country_id
-                        GROUP BY c.country_id, c.name
-                        ORDER BY total_connections DESC
-                        LIMIT %s
-                    """, (limit,))
-                
-                elif entity_type == 'DOCUMENT':
-                    cursor.execute("""
-                        SELECT d.document_id, d.name,
-                               COUNT(DISTINCT dp.person_id) as persons_count,
-                               COUNT(DISTINCT de.event_id) as events_count,
-                               (COUNT(DISTINCT dp.person_id) + COUNT(DISTINCT de.event_id)) as total_connections
-                        FROM public.documents d
-                        LEFT JOIN public.documents_persons dp ON d.document_id = dp.document_id
-                        LEFT JOIN public.documents_events de ON d.document_id = de.document_id
-                        GROUP BY d.document_id, d.name
-                        ORDER BY total_connections DESC
-                        LIMIT %s
-                    """, (limit,))
-                
-                elif entity_type == 'SOURCE':
-                    cursor.execute("""
-                        SELECT s.source_id, s.name, s.author,
-                               COUNT(DISTINCT es.event_id) as events_count,
-                               COUNT(DISTINCT es.event_id) as total_connections
-                        FROM public.sources s
-                        LEFT JOIN public.events_sources es ON s.source_id = es.source_id
-                        GROUP BY s.source_id, s.name, s.author
-                        ORDER BY total_connections DESC
-                        LIMIT %s
-                    """, (limit,))
+                cursor.execute(f"""
+                    SELECT t.{pk}, {name_columns}, {counters}, d.total_connections
+                    FROM {source} d
+                    JOIN public.{table} t ON t.{pk} = d.entity_id
+                    WHERE d.entity_type = %s AND d.total_connections > 0
+                    ORDER BY d.total_connections DESC, d.entity_id
+                    LIMIT %s
+                """, (entity_type, limit))
                 
                 columns = [desc[0] for desc in cursor.description]
                 rows = cursor.fetchall()
@@ -654,71 +989,266 @@ class RelationshipsRepository(BaseRepository):
             logger.error(f"Error getting most connected entities for {entity_type}: {e}")
             return []
     
-    def cleanup_orphaned_relationships(self, user_id: int) -> Dict[str, int]:
-        """Очистка висячих связей (ссылки на несуществующие сущности)"""
-        cleanup_stats = {
-            'events_persons_cleaned': 0,
-            'countries_events_cleaned': 0,
-            'documents_persons_cleaned': 0,
-            'documents_events_cleaned': 0,
-            'events_sources_cleaned': 0
-        }
-        
+    def check_relationship_degrees(self, sample_limit: int = 20) -> Dict[str, Any]:
+        """Сверка таблицы степеней с фактическими связями"""
+        columns = ', '.join(DEGREE_COLUMNS + ('total_connections',))
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(f"""
+                    WITH actual AS ({self._degree_counts_query()}),
+                    stored AS (
+                        SELECT entity_type, entity_id, {columns}
+                        FROM public.relationship_degrees
+                        WHERE total_connections <> 0 OR {' OR '.join(f"{c} <> 0" for c in DEGREE_COLUMNS)}
+                    ),
+                    mismatched AS (
+                        SELECT COALESCE(a.entity_type, s.entity_type) AS entity_type,
+                               COALESCE(a.entity_id, s.entity_id) AS entity_id,
+                               COALESCE(s.total_connections, 0) AS stored_total,
+                               COALESCE(a.total_connections, 0) AS actual_total
+                        FROM actual a
+                        FULL JOIN stored s ON s.entity_type = a.entity_type AND s.entity_id = a.entity_id
+                        WHERE ROW({', '.join(f"a.{c}" for c in DEGREE_COLUMNS + ('total_connections',))})
+                              IS DISTINCT FROM
+                              ROW({', '.join(f"s.{c}" for c in DEGREE_COLUMNS + ('total_connections',))})
+                    )
+                    SELECT entity_type, entity_id, stored_total, actual_total, COUNT(*) OVER () AS mismatched_count
+                    FROM mismatched
+                    ORDER BY entity_type, entity_id
+                    LIMIT %s
+                """, (sample_limit,))
+                
+                rows = cursor.fetchall()
+                return {
+                    'consistent': not rows,
+                    'mismatched_count': rows[0][4] if rows else 0,
+                    'samples': [
+                        {'entity_type': row[0], 'entity_id': row[1], 'stored_total': row[2], 'actual_total': row[3]}
+                        for row in rows
+                    ]
+                }
+        except Exception as e:
+            logger.error(f"Error checking relationship degrees: {e}")
+            raise DatabaseError(f"Не удалось сверить таблицу степеней: {e}")
+    
+    def rebuild_relationship_degrees(self, range_size: int = DEGREES_REBUILD_RANGE) -> int:
+        """Перестройка таблицы степеней по фактическим связям диапазонами id (число исправленных строк)"""
+        rebuilt = 0
+        try:
+            for entity_type, counters in DEGREE_COUNTERS.items():
+                max_ids = ', '.join(f"(SELECT max({column}) FROM public.{table})" for _, table, column in counters)
+                with self.db.get_cursor() as cursor:
+                    cursor.execute(f"""
+                        SELECT GREATEST({max_ids},
+                                        (SELECT max(entity_id) FROM public.relationship_degrees WHERE entity_type = %s))
+                    """, (entity_type,))
+                    max_id = cursor.fetchone()[0]
+                if max_id is None:
+                    continue
+                
+                # Первый диапазон включает и неположительные id
+                low, high = None, range_size
+                while True:
+                    rebuilt += self._rebuild_degrees_range(entity_type, low, high)
+                    if high > max_id:
+                        break
+                    low, high = high, high + range_size
+            self._degrees_available = True
+            return rebuilt
+        except Exception as e:
+            logger.error(f"Error rebuilding relationship degrees: {e}")
+            raise DatabaseError(f"Не удалось перестроить таблицу степеней: {e}")
+    
+    def _rebuild_degrees_range(self, entity_type: str, low: int, high: int) -> int:
+        """Пересчет степеней одного диапазона id короткой транзакцией"""
+        columns = DEGREE_COLUMNS + ('total_connections',)
+        column_list = ', '.join(columns)
+        params = {'entity_type': entity_type, 'low': low, 'high': high}
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                # Блокировка ждет незавершенные изменения связей: их триггеры применяются
+                # до пересчета или после него, но не теряются между снимком и записью
+                cursor.execute("LOCK TABLE public.relationship_degrees IN EXCLUSIVE MODE")
+                cursor.execute(f"""
+                    INSERT INTO public.relationship_degrees AS d (entity_type, entity_id, {column_list})
+                    SELECT entity_type, entity_id, {column_list}
+                    FROM ({self._degree_counts_query(entity_type, id_range=True)}) actual
+                    ON CONFLICT (entity_type, entity_id) DO UPDATE
+                    SET {', '.join(f"{column} = EXCLUDED.{column}" for column in columns)}
+                    WHERE ROW({', '.join(f"d.{column}" for column in columns)})
+                          IS DISTINCT FROM ROW({', '.join(f"EXCLUDED.{column}" for column in columns)})
+                """, params)
+                changed = cursor.rowcount
+                
+                cursor.execute(f"""
+                    DELETE FROM public.relationship_degrees d
+                    WHERE d.entity_type = %(entity_type)s
+                      AND (%(low)s::bigint IS NULL OR d.entity_id >= %(low)s::bigint) AND d.entity_id < %(high)s
+                      AND NOT EXISTS (SELECT 1 FROM ({self._degree_counts_query(entity_type, id_range=True)}) actual
+                                      WHERE actual.entity_id = d.entity_id)
+                """, params)
+                changed += cursor.rowcount
+            conn.commit()
+        return changed
+    
+    def bulk_import_links(self, batches: Iterable[Tuple[str, List[Tuple[int, int]]]],
+                          progress_callback: Callable[[str, int], None] = None,
+                          invalid_sample_limit: int = 20) -> Dict[str, Dict[str, Any]]:
+        """Массовая загрузка связей: COPY во временную таблицу и слияние с проверкой ссылок"""
+        stats = {}
         try:
             with self.db.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Очистка events_persons
-                    cursor.execute("""
-                        DELETE FROM public.events_persons ep
-                        WHERE NOT EXISTS (SELECT 1 FROM public.events e WHERE e.event_id = ep.event_id)
-                           OR NOT EXISTS (SELECT 1 FROM public.persons p WHERE p.person_id = ep.person_id)
-                    """)
-                    cleanup_stats['events_persons_cleaned'] = cursor.rowcount
-                    
-                    # Очистка countries_events
-                    cursor.execute("""
-                        DELETE FROM public.countries_events ce
-                        WHERE NOT EXISTS (SELECT 1 FROM public.countries c WHERE c.country_id = ce.country_id)
-                           OR NOT EXISTS (SELECT 1 FROM public.events e WHERE e.event_id = ce.event_id)
-                    """)
-                    cleanup_stats['countries_events_cleaned'] = cursor.rowcount
-                    
-                    # Очистка documents_persons
-                    cursor.execute("""
-                        DELETE FROM public.documents_persons dp
-                        WHERE NOT EXISTS (SELECT 1 FROM public.documents d WHERE d.document_id = dp.document_id)
-                           OR NOT EXISTS (SELECT 1 FROM public.persons p WHERE p.person_id = dp.person_id)
-                    """)
-                    cleanup_stats['documents_persons_cleaned'] = cursor.rowcount
-                    
-                    # Очистка documents_events
+                    # Загрузка и слияние миллионов строк не укладываются в общий statement_timeout соединений пула
+                    cursor.execute(f"SET LOCAL statement_timeout = {int(APP_CONFIG.maintenance_statement_timeout_ms)}")
                     cursor.execute("""
-                        DELETE FROM public.documents_events de
-                        WHERE NOT EXISTS (SELECT 1 FROM public.documents d WHERE d.document_id = de.document_id)
-                           OR NOT EXISTS (SELECT 1 FROM public.events e WHERE e.event_id = de.event_id)
+                        CREATE TEMP TABLE link_import (
+                            link_table text NOT NULL,
+                            id_a bigint NOT NULL,
+                            id_b bigint NOT NULL
+                        ) ON COMMIT DROP
                     """)
-                    cleanup_stats['documents_events_cleaned'] = cursor.rowcount
                     
-                    # Очистка events_sources
-                    cursor.execute("""
-                        DELETE FROM public.events_sources es
-                        WHERE NOT EXISTS (SELECT 1 FROM public.events e WHERE e.event_id = es.event_id)
-                           OR NOT EXISTS (SELECT 1 FROM public.sources s WHERE s.source_id = es.source_id)
-                    """)
-                    cleanup_stats['events_sources_cleaned'] = cursor.rowcount
-                    
-                    # Логируем очистку
-                    total_cleaned = sum(cleanup_stats.values())
-                    if total_cleaned > 0:
-                        cursor.execute(
-                            "SELECT sp_log_user_action(%s, %s, %s, %s, %s)",
-                            (user_id, 'RELATIONSHIPS_CLEANUP', 'SYSTEM', None,
-                             f'Очищено висячих связей: {total_cleaned}')
-                        )
-                    
-                    conn.commit()
-                    return cleanup_stats
+                    staged = 0
+                    with cursor.copy("COPY link_import (link_table, id_a, id_b) FROM STDIN") as copy:
+                        for table, pairs in batches:
+                            for id_a, id_b in pairs:
+                                copy.write_row((table, id_a, id_b))
+                            staged += len(pairs)
+                            if progress_callback is not None:
+                                progress_callback('staging', staged)
+                    cursor.execute("ANALYZE link_import")
                     
+                    # Слияние по таблицам: ссылки проверяются полусоединением с таблицами сущностей
+                    for table, (type_a, column_a, type_b, column_b) in LINK_TABLES.items():
+                        table_a, pk_a = ENTITY_TABLES[type_a]
+                        table_b, pk_b = ENTITY_TABLES[type_b]
+                        cursor.execute(f"""
+                            WITH candidates AS (
+                                SELECT DISTINCT id_a, id_b FROM link_import WHERE link_table = %(table)s
+                            ),
+                            checked AS (
+                                SELECT c.id_a, c.id_b,
+                                       EXISTS (SELECT 1 FROM public.{table_a} a WHERE a.{pk_a} = c.id_a)
+                                       AND EXISTS (SELECT 1 FROM public.{table_b} b WHERE b.{pk_b} = c.id_b) AS is_valid
+                                FROM candidates c
+                            ),
+                            inserted AS (
+                                INSERT INTO public.{table} ({column_a}, {column_b})
+                                SELECT id_a, id_b FROM checked WHERE is_valid
+                                ON CONFLICT DO NOTHING
+                                RETURNING 1
+                            )
+                            SELECT (SELECT COUNT(*) FROM link_import WHERE link_table = %(table)s),
+                                   (SELECT COUNT(*) FROM candidates),
+                                   (SELECT COUNT(*) FROM checked WHERE NOT is_valid),
+                                   (SELECT COUNT(*) FROM inserted),
+                                   ARRAY(SELECT ARRAY[id_a, id_b] FROM checked WHERE NOT is_valid
+                                         ORDER BY id_a, id_b LIMIT %(sample_limit)s)
+                        """, {'table': table, 'sample_limit': invalid_sample_limit})
+                        rows, unique, missing, inserted, invalid_sample = cursor.fetchone()
+                        if rows == 0:
+                            continue
+                        
+                        stats[table] = {
+                            'rows': rows,
+                            'duplicates': rows - unique,
+                            'missing': missing,
+                            'inserted': inserted,
+                            'already_linked': unique - missing - inserted,
+                            'invalid_sample': [tuple(pair) for pair in invalid_sample]
+                        }
+                        if progress_callback is not None:
+                            progress_callback(table, inserted)
+                
+                conn.commit()
+            return stats
+        except (ValueError, QueryCancelledError):
+            raise
+        except pg_errors.QueryCanceled as e:
+            raise QueryCancelledError(f"Импорт связей прерван: {e}") from e
         except Exception as e:
-            logger.error(f"Error cleaning up orphaned relationships: {e}")
-            return cleanup_stats
\ No newline at end of file
+            logger.error(f"Error importing relationships: {e}")
+            raise DatabaseError(f"Не удалось импортировать связи: {e}")
+    
+    def estimate_link_counts(self) -> Dict[str, int]:
+        """Оценка числа строк в таблицах связей по статистике планировщика"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT relname, GREATEST(reltuples, 0)::bigint
+                    FROM pg_class
+                    WHERE relnamespace = 'public'::regnamespace AND relname = ANY(%s)
+                """, (list(LINK_TABLES),))
+                return dict(cursor.fetchall())
+        except Exception as e:
+            logger.error(f"Error estimating link table sizes: {e}")
+            return {}
+    
+    def process_orphaned_links_chunk(self, table: str, after_key: Tuple[int, int] = None,
+                                     batch_size: int = 5000, delete: bool = False,
+                                     lock_timeout_ms: int = 2000) -> Dict[str, Any]:
+        """Поиск (и удаление) висячих связей в одном диапазоне ключей короткой транзакцией"""
+        type_a, column_a, type_b, column_b = LINK_TABLES[table]
+        table_a, pk_a = ENTITY_TABLES[type_a]
+        table_b, pk_b = ENTITY_TABLES[type_b]
+        
+        # Диапазон ключей идет по первичному ключу таблицы связей (column_a, column_b)
+        key_filter = (f"WHERE (l.{column_a}, l.{column_b}) > (%(after_a)s, %(after_b)s)"
+                      if after_key else "")
+        deleted = f"""
+            , deleted AS (
+                DELETE FROM public.{table} l
+                USING found f
+                WHERE l.{column_a} = f.id_a AND l.{column_b} = f.id_b
+                  AND (f.missing_a OR f.missing_b)
+                RETURNING l.{column_a} AS id_a, l.{column_b} AS id_b
+            )
+        """ if delete else ""
+        orphans_source = "found f JOIN deleted d USING (id_a, id_b)" if delete else "found f"
+        
+        query = f"""
+            WITH chunk AS (
+                SELECT l.{column_a} AS id_a, l.{column_b} AS id_b
+                FROM public.{table} l
+                {key_filter}
+                ORDER BY l.{column_a}, l.{column_b}
+                LIMIT %(batch_size)s
+            ),
+            found AS (
+                SELECT c.id_a, c.id_b,
+                       NOT EXISTS (SELECT 1 FROM public.{table_a} a WHERE a.{pk_a} = c.id_a) AS missing_a,
+                       NOT EXISTS (SELECT 1 FROM public.{table_b} b WHERE b.{pk_b} = c.id_b) AS missing_b
+                FROM chunk c
+            )
+            {deleted}
+            SELECT 'orphan' AS kind, f.id_a::bigint, f.id_b::bigint, f.missing_a, f.missing_b
+            FROM {orphans_source}
+            WHERE f.missing_a OR f.missing_b
+            UNION ALL
+            SELECT 'last', id_a, id_b, NULL, NULL
+            FROM (SELECT id_a, id_b FROM chunk ORDER BY id_a DESC, id_b DESC LIMIT 1) last_key
+            UNION ALL
+            SELECT 'scanned', COUNT(*), NULL, NULL, NULL FROM chunk
+        """
+        params = {
+            'after_a': after_key[0] if after_key else None,
+            'after_b': after_key[1] if after_key else None,
+            'batch_size': batch_size
+        }
+        
+        chunk = {'orphans': [], 'last_key': None, 'scanned': 0}
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                # Не ждем долго блокировок редакторов — фрагмент будет повторен
+                cursor.execute(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+                cursor.execute(query, params)
+                for kind, id_a, id_b, missing_a, missing_b in cursor.fetchall():
+                    if kind == 'orphan':
+                        chunk['orphans'].append((id_a, id_b, missing_a, missing_b))
+                    elif kind == 'last':
+                        chunk['last_key'] = (id_a, id_b)
+                    else:
+                        chunk['scanned'] = id_a
+            conn.commit()
+        return chunk
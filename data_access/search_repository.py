@@ -0,0 +1,247 @@
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+from datetime import datetime, timedelta
+import logging
+from .base_repository import BaseRepository, CENTURY_SQL
+from .relationships_repository import ENTITY_TABLES
+from core.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Конфигурация полнотекстового поиска (совпадает с database/search_index.sql)
+SEARCH_CONFIG = 'russian'
+
+# Срок хранения записей об удалении (совпадает с database/search_index.sql)
+DELETED_RETENTION = timedelta(days=30)
+
+# Запас при выборке изменений: updated_at — время начала транзакции, которая может
+# зафиксироваться позже отметки предыдущей синхронизации
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Диапазон id сущностей, перестраиваемый одной короткой транзакцией
+REBUILD_RANGE_SIZE = 1000
+
+class SearchRepository(BaseRepository):
+    """Репозиторий единого поискового индекса по всем типам сущностей"""
+
+    # Наличие таблицы индекса проверяется один раз
+    _index_available = None
+
+    def index_available(self) -> bool:
+        """Установлен ли единый индекс (database/search_index.sql)"""
+        if self._index_available is None:
+            try:
+                with self.db.get_cursor() as cursor:
+                    cursor.execute("SELECT to_regclass('public.search_index') IS NOT NULL")
+                    SearchRepository._index_available = cursor.fetchone()[0]
+                if not self._index_available:
+                    logger.warning("search_index table is missing, global search uses per-type functions")
+            except Exception as e:
+                logger.error(f"Error checking search_index table: {e}")
+                return False
+        return self._index_available
+
+    def search(self, search_text: str, entity_types: List[str] = None,
+               limit_per_type: int = 20) -> Dict[str, Any]:
+        """Ранжированный поиск по всем типам одним запросом: лучшие совпадения каждого типа и фасеты"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(f"""
+                    WITH matches AS (
+                        SELECT si.entity_type, si.entity_id, si.title, si.subtitle, si.body,
+                               ts_rank_cd(si.document, q.query, 32) AS rank
+                        FROM public.search_index si,
+                             websearch_to_tsquery('{SEARCH_CONFIG}', %(search_text)s) AS q(query)
+                        WHERE si.document @@ q.query
+                          AND (%(types)s::text[] IS NULL OR si.entity_type = ANY(%(types)s::text[]))
+                    ),
+                    ranked AS (
+                        SELECT m.*,
+                               row_number() OVER (PARTITION BY m.entity_type ORDER BY m.rank DESC, m.entity_id) AS position,
+                               COUNT(*) OVER (PARTITION BY m.entity_type) AS type_total
+                        FROM matches m
+                    )
+                    SELECT entity_type, entity_id, title, subtitle, body, rank, type_total
+                    FROM ranked
+                    WHERE position <= %(limit_per_type)s
+                    ORDER BY rank DESC, entity_type, entity_id
+                """, {
+                    'search_text': search_text,
+                    'types': list(entity_types) if entity_types else None,
+                    'limit_per_type': limit_per_type
+                })
+
+                columns = [desc[0] for desc in cursor.description]
+                items = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                facets = {item['entity_type']: item['type_total'] for item in items}
+                return {'items': items, 'facets': facets}
+        except Exception as e:
+            logger.error(f"Error searching unified index: {e}")
+            raise DatabaseError(f"Ошибка поиска: {e}")
+
+    def get_facets(self, search_text: str, entity_types: List[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Счетчики найденного по типам сущностей, типам событий, векам, странам и типам источников"""
+        base_query = f"""
+            SELECT si.entity_type, si.entity_id, si.entity_type || ':' || si.entity_id AS entity_key
+            FROM public.search_index si,
+                 websearch_to_tsquery('{SEARCH_CONFIG}', %(search_text)s) AS q(query)
+            WHERE si.document @@ q.query
+              AND (%(types)s::text[] IS NULL OR si.entity_type = ANY(%(types)s::text[]))
+        """
+        century = CENTURY_SQL.format('coalesce(e.start_date, p.date_of_birth, d.creating_date)')
+        facet_queries = [
+            ('entity_type', "SELECT f.entity_type, NULL, f.entity_key FROM f"),
+            ('event_type', "SELECT e.event_type, e.event_type, f.entity_key FROM f "
+                           "JOIN public.events e ON f.entity_type = 'EVENT' AND e.event_id = f.entity_id"),
+            ('century', f"SELECT {century}, NULL, f.entity_key FROM f "
+                        "LEFT JOIN public.events e ON f.entity_type = 'EVENT' AND e.event_id = f.entity_id "
+                        "LEFT JOIN public.persons p ON f.entity_type = 'PERSON' AND p.person_id = f.entity_id "
+                        "LEFT JOIN public.documents d ON f.entity_type = 'DOCUMENT' AND d.document_id = f.entity_id "
+                        "WHERE f.entity_type IN ('EVENT', 'PERSON', 'DOCUMENT')"),
+            ('country', "SELECT c.country_id, c.name, f.entity_key FROM f "
+                        "JOIN public.persons p ON f.entity_type = 'PERSON' AND p.person_id = f.entity_id "
+                        "JOIN public.countries c ON c.country_id = p.country_id"),
+            ('country', "SELECT c.country_id, c.name, f.entity_key FROM f "
+                        "JOIN public.countries_events ce ON f.entity_type = 'EVENT' AND ce.event_id = f.entity_id "
+                        "JOIN public.countries c ON c.country_id = ce.country_id"),
+            ('source_type', "SELECT s.type, s.type, f.entity_key FROM f "
+                            "JOIN public.sources s ON f.entity_type = 'SOURCE' AND s.source_id = f.entity_id")
+        ]
+        return self._fetch_facets(base_query, facet_queries, {
+            'search_text': search_text,
+            'types': list(entity_types) if entity_types else None
+        })
+    
+    def iter_suggestion_entries(self, batch_size: int = 10000) -> Iterator[Tuple[str, int, str, int]]:
+        """Названия всех сущностей с весом популярности (числом связей) для индекса подсказок"""
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('public.relationship_degrees') IS NOT NULL")
+                with_degrees = cursor.fetchone()[0]
+            
+            weight = ("COALESCE((SELECT d.total_connections FROM public.relationship_degrees d "
+                      "WHERE d.entity_type = n.entity_type AND d.entity_id = n.entity_id), 0)"
+                      if with_degrees else "0")
+            
+            with conn.cursor(name='suggestion_entries') as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"""
+                    SELECT n.entity_type, n.entity_id, n.title, {weight}
+                    FROM (
+                        SELECT 'PERSON' AS entity_type, person_id::bigint AS entity_id,
+                               concat_ws(' ', name, patronymic, surname) AS title
+                        FROM public.persons
+                        UNION ALL SELECT 'COUNTRY', country_id, name FROM public.countries
+                        UNION ALL SELECT 'EVENT', event_id, name FROM public.events
+                        UNION ALL SELECT 'DOCUMENT', document_id, name FROM public.documents
+                        UNION ALL SELECT 'SOURCE', source_id, name FROM public.sources
+                    ) n
+                """)
+                yield from cursor
+    
+    def get_server_time(self) -> datetime:
+        """Текущее время сервера (отметка синхронизации локального индекса)"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("SELECT now()")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error getting server time: {e}")
+            raise DatabaseError(f"Ошибка получения времени сервера: {e}")
+    
+    def iter_index_changes(self, since: Optional[datetime] = None,
+                           batch_size: int = 5000) -> Iterator[Tuple[str, int, str, str, str]]:
+        """Строки единого индекса, измененные после отметки (все строки, если отметки нет)"""
+        with self.db.get_connection() as conn:
+            with conn.cursor(name='search_index_changes') as cursor:
+                cursor.itersize = batch_size
+                cursor.execute("""
+                    SELECT entity_type, entity_id, title, subtitle, body
+                    FROM public.search_index
+                    WHERE %(since)s::timestamptz IS NULL OR updated_at > %(since)s::timestamptz - %(overlap)s
+                """, {'since': since, 'overlap': SYNC_OVERLAP})
+                yield from cursor
+    
+    def get_deleted_since(self, since: datetime) -> List[Tuple[str, int]]:
+        """Сущности, удаленные после отметки"""
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT entity_type, entity_id
+                    FROM public.search_index_deleted
+                    WHERE deleted_at > %s - %s
+                """, (since, SYNC_OVERLAP))
+                return [(entity_type, entity_id) for entity_type, entity_id in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting deleted index entries: {e}")
+            raise DatabaseError(f"Ошибка получения удаленных записей индекса: {e}")
+    
+    def rebuild_index(self, range_size: int = REBUILD_RANGE_SIZE) -> int:
+        """Сверка индекса с представлением search_index_source диапазонами id (число измененных строк)"""
+        rebuilt = 0
+        try:
+            for entity_type, (table, pk) in ENTITY_TABLES.items():
+                with self.db.get_cursor() as cursor:
+                    cursor.execute(f"""
+                        SELECT GREATEST((SELECT max({pk}) FROM public.{table}),
+                                        (SELECT max(entity_id) FROM public.search_index WHERE entity_type = %s))
+                    """, (entity_type,))
+                    max_id = cursor.fetchone()[0]
+                
+                if max_id is None:
+                    continue
+                
+                # Первый диапазон включает и неположительные id
+                low, high = None, range_size
+                while True:
+                    rebuilt += self._rebuild_range(entity_type, low, high)
+                    if high > max_id:
+                        break
+                    low, high = high, high + range_size
+            SearchRepository._index_available = True
+            return rebuilt
+        except Exception as e:
+            logger.error(f"Error rebuilding search index: {e}")
+            raise DatabaseError(f"Не удалось перестроить поисковый индекс: {e}")
+    
+    def _rebuild_range(self, entity_type: str, low: Optional[int], high: int) -> int:
+        """Обновление строк индекса одного диапазона id; записи сущностей ждут только этот диапазон"""
+        params = {'entity_type': entity_type, 'low': low, 'high': high}
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                # Блокировка ждет незавершенные изменения сущностей, иначе строка триггера
+                # могла бы быть перезаписана данными из более раннего снимка
+                cursor.execute("LOCK TABLE public.search_index IN EXCLUSIVE MODE")
+                cursor.execute("""
+                    INSERT INTO public.search_index AS si (entity_type, entity_id, title, subtitle, body, document)
+                    SELECT entity_type, entity_id, title, subtitle, body, document
+                    FROM public.search_index_source
+                    WHERE entity_type = %(entity_type)s
+                      AND (%(low)s::bigint IS NULL OR entity_id >= %(low)s::bigint) AND entity_id < %(high)s
+                    ON CONFLICT (entity_type, entity_id) DO UPDATE
+                    SET title = EXCLUDED.title,
+                        subtitle = EXCLUDED.subtitle,
+                        body = EXCLUDED.body,
+                        document = EXCLUDED.document,
+                        updated_at = now()
+                    WHERE (si.title, si.subtitle, si.body, si.document)
+                          IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.subtitle, EXCLUDED.body, EXCLUDED.document)
+                """, params)
+                changed = cursor.rowcount
+                
+                # Строки удаленных без триггера сущностей попадают в журнал удалений для локальных индексов
+                cursor.execute("""
+                    WITH stale AS (
+                        DELETE FROM public.search_index si
+                        WHERE si.entity_type = %(entity_type)s
+                          AND (%(low)s::bigint IS NULL OR si.entity_id >= %(low)s::bigint) AND si.entity_id < %(high)s
+                          AND NOT EXISTS (SELECT 1 FROM public.search_index_source s
+                                          WHERE s.entity_type = si.entity_type AND s.entity_id = si.entity_id)
+                        RETURNING si.entity_type, si.entity_id
+                    )
+                    INSERT INTO public.search_index_deleted (entity_type, entity_id)
+                    SELECT entity_type, entity_id FROM stale
+                    ON CONFLICT (entity_type, entity_id) DO UPDATE SET deleted_at = now()
+                """, params)
+                changed += cursor.rowcount
+            conn.commit()
+        return changed
@@ -71,9 +71,13 @@ class SourceRepository(BaseRepository):
         """Получение событий, связанных с источником"""
         return self._execute_function('sp_get_source_events', (source_id, offset, limit))
     
-    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
-        """Полнотекстовый поиск источников"""
-        return self._execute_function('sp_search_sources_fulltext', (search_text, offset, limit))
+    def search_fulltext(self, search_text: str, offset: int = 0, limit: int = 20,
+                       fuzzy: bool = False, similarity_threshold: float = None) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск источников; нечеткий по названию при fuzzy или пустом результате"""
+        if fuzzy:
+            return self._search_fuzzy('sources', search_text, similarity_threshold, offset, limit)
+        return self._search_fulltext_or_fuzzy('sources', 'sp_search_sources_fulltext', (search_text,), search_text,
+                                              offset, limit, similarity_threshold)
     
     def get_statistics(self) -> Dict[str, Any]:
         """Получение статистики по источникам"""
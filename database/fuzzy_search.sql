@@ -0,0 +1,27 @@
+-- Нечеткий поиск по названиям сущностей на триграммах (pg_trgm).
+-- Выражения индексов совпадают с FUZZY_NAME_EXPRESSIONS в data_access/base_repository.py,
+-- поэтому оператор <% в BaseRepository._search_fuzzy использует эти индексы.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Нормализация для сравнения: нижний регистр, ё → е
+CREATE OR REPLACE FUNCTION public.search_normalize(value text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT lower(translate(coalesce(value, ''), 'ёЁ', 'еЕ'))
+$$;
+
+CREATE OR REPLACE FUNCTION public.person_search_name(name text, surname text, patronymic text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT public.search_normalize(concat_ws(' ', name, surname, patronymic))
+$$;
+
+CREATE INDEX IF NOT EXISTS persons_name_trgm_idx
+    ON public.persons USING gin (public.person_search_name(name, surname, patronymic) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS countries_name_trgm_idx
+    ON public.countries USING gin (public.search_normalize(name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS events_name_trgm_idx
+    ON public.events USING gin (public.search_normalize(name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS documents_name_trgm_idx
+    ON public.documents USING gin (public.search_normalize(name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS sources_name_trgm_idx
+    ON public.sources USING gin (public.search_normalize(name) gin_trgm_ops);
@@ -0,0 +1,120 @@
+-- Предагрегированные степени сущностей для рейтингов «самых связанных».
+-- Счетчики поддерживаются триггерами уровня оператора на таблицах связей,
+-- поэтому пакетные вставки обновляют каждую сущность одним UPSERT.
+-- Сверка и перестройка: RelationshipService.check_relationship_degrees / rebuild_relationship_degrees.
+
+CREATE TABLE IF NOT EXISTS public.relationship_degrees (
+    entity_type       varchar(20) NOT NULL,
+    entity_id         bigint      NOT NULL,
+    persons_count     integer     NOT NULL DEFAULT 0,
+    events_count      integer     NOT NULL DEFAULT 0,
+    countries_count   integer     NOT NULL DEFAULT 0,
+    documents_count   integer     NOT NULL DEFAULT 0,
+    sources_count     integer     NOT NULL DEFAULT 0,
+    total_connections integer     NOT NULL DEFAULT 0,
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+-- Top-k по типу сущности читается прямо из индекса
+CREATE INDEX IF NOT EXISTS relationship_degrees_top_idx
+    ON public.relationship_degrees (entity_type, total_connections DESC, entity_id);
+
+-- Аргументы триггера — тройки (тип сущности, колонка ссылки на сущность, колонка счетчика).
+-- При UPDATE применяется только разность старых и новых значений ссылки (EXCEPT ALL):
+-- правка других колонок (например, биографии персоны) не трогает relationship_degrees.
+CREATE OR REPLACE FUNCTION public.relationship_degrees_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    i integer;
+    change record;
+    changed_refs text;
+BEGIN
+    FOR change IN
+        SELECT 'old_rows' AS rows_name, -1 AS sign, 'new_rows' AS other_rows WHERE TG_OP IN ('DELETE', 'UPDATE')
+        UNION ALL
+        SELECT 'new_rows', 1, 'old_rows' WHERE TG_OP IN ('INSERT', 'UPDATE')
+    LOOP
+        FOR i IN 0 .. TG_NARGS / 3 - 1 LOOP
+            changed_refs := format('SELECT r.%1$I FROM %2$I r WHERE r.%1$I IS NOT NULL',
+                                   TG_ARGV[i * 3 + 1], change.rows_name);
+            IF TG_OP = 'UPDATE' THEN
+                changed_refs := changed_refs || format(' EXCEPT ALL SELECT r.%1$I FROM %2$I r WHERE r.%1$I IS NOT NULL',
+                                                       TG_ARGV[i * 3 + 1], change.other_rows);
+            END IF;
+
+            EXECUTE format(
+                'INSERT INTO public.relationship_degrees AS d (entity_type, entity_id, %1$I, total_connections)
+                 SELECT %2$L, c.entity_id, %3$s * COUNT(*), %3$s * COUNT(*)
+                 FROM (%4$s) AS c(entity_id)
+                 GROUP BY c.entity_id
+                 ON CONFLICT (entity_type, entity_id) DO UPDATE
+                 SET %1$I = d.%1$I + EXCLUDED.%1$I,
+                     total_connections = d.total_connections + EXCLUDED.total_connections',
+                TG_ARGV[i * 3 + 2], TG_ARGV[i * 3], change.sign, changed_refs
+            );
+        END LOOP;
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+-- Таблицы переходов допускают только одно событие на триггер
+DO $$
+DECLARE
+    spec record;
+BEGIN
+    FOR spec IN
+        SELECT * FROM (VALUES
+            ('events_persons',    '''PERSON'', ''person_id'', ''events_count'', ''EVENT'', ''event_id'', ''persons_count'''),
+            ('countries_events',  '''COUNTRY'', ''country_id'', ''events_count'', ''EVENT'', ''event_id'', ''countries_count'''),
+            ('documents_persons', '''DOCUMENT'', ''document_id'', ''persons_count'', ''PERSON'', ''person_id'', ''documents_count'''),
+            ('documents_events',  '''DOCUMENT'', ''document_id'', ''events_count'', ''EVENT'', ''event_id'', ''documents_count'''),
+            ('events_sources',    '''EVENT'', ''event_id'', ''sources_count'', ''SOURCE'', ''source_id'', ''events_count'''),
+            ('persons',           '''COUNTRY'', ''country_id'', ''persons_count''')
+        ) AS t(table_name, args)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', spec.table_name || '_degrees_ins', spec.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', spec.table_name || '_degrees_upd', spec.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', spec.table_name || '_degrees_del', spec.table_name);
+
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON public.%I REFERENCING NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION public.relationship_degrees_apply(%s)',
+                       spec.table_name || '_degrees_ins', spec.table_name, spec.args);
+        EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON public.%I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION public.relationship_degrees_apply(%s)',
+                       spec.table_name || '_degrees_upd', spec.table_name, spec.args);
+        EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON public.%I REFERENCING OLD TABLE AS old_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION public.relationship_degrees_apply(%s)',
+                       spec.table_name || '_degrees_del', spec.table_name, spec.args);
+    END LOOP;
+END;
+$$;
+
+-- Начальное заполнение (повторный запуск приводит счетчики к фактическим значениям)
+BEGIN;
+LOCK TABLE public.relationship_degrees IN EXCLUSIVE MODE;
+DELETE FROM public.relationship_degrees;
+INSERT INTO public.relationship_degrees
+    (entity_type, entity_id, persons_count, events_count, countries_count, documents_count, sources_count, total_connections)
+SELECT entity_type, entity_id,
+       COALESCE(SUM(cnt) FILTER (WHERE counter = 'persons_count'), 0),
+       COALESCE(SUM(cnt) FILTER (WHERE counter = 'events_count'), 0),
+       COALESCE(SUM(cnt) FILTER (WHERE counter = 'countries_count'), 0),
+       COALESCE(SUM(cnt) FILTER (WHERE counter = 'documents_count'), 0),
+       COALESCE(SUM(cnt) FILTER (WHERE counter = 'sources_count'), 0),
+       SUM(cnt)
+FROM (
+    SELECT 'PERSON' AS entity_type, person_id AS entity_id, 'events_count' AS counter, COUNT(*) AS cnt FROM public.events_persons GROUP BY person_id
+    UNION ALL SELECT 'EVENT', event_id, 'persons_count', COUNT(*) FROM public.events_persons GROUP BY event_id
+    UNION ALL SELECT 'COUNTRY', country_id, 'events_count', COUNT(*) FROM public.countries_events GROUP BY country_id
+    UNION ALL SELECT 'EVENT', event_id, 'countries_count', COUNT(*) FROM public.countries_events GROUP BY event_id
+    UNION ALL SELECT 'DOCUMENT', document_id, 'persons_count', COUNT(*) FROM public.documents_persons GROUP BY document_id
+    UNION ALL SELECT 'PERSON', person_id, 'documents_count', COUNT(*) FROM public.documents_persons GROUP BY person_id
+    UNION ALL SELECT 'DOCUMENT', document_id, 'events_count', COUNT(*) FROM public.documents_events GROUP BY document_id
+    UNION ALL SELECT 'EVENT', event_id, 'documents_count', COUNT(*) FROM public.documents_events GROUP BY event_id
+    UNION ALL SELECT 'EVENT', event_id, 'sources_count', COUNT(*) FROM public.events_sources GROUP BY event_id
+    UNION ALL SELECT 'SOURCE', source_id, 'events_count', COUNT(*) FROM public.events_sources GROUP BY source_id
+    UNION ALL SELECT 'COUNTRY', country_id, 'persons_count', COUNT(*) FROM public.persons WHERE country_id IS NOT NULL GROUP BY country_id
+) counts
+GROUP BY entity_type, entity_id;
+COMMIT;
@@ -0,0 +1,125 @@
+-- Единый поисковый индекс по всем типам сущностей.
+-- Строки поддерживаются построчными триггерами на таблицах сущностей,
+-- поиск выполняется одним ранжированным запросом (SearchRepository.search).
+-- Перестройка: SearchService.rebuild_search_index.
+-- Локальные индексы клиентов синхронизируются по updated_at и таблице удалений
+-- search_index_deleted (SearchService.sync_local_index).
+
+CREATE TABLE IF NOT EXISTS public.search_index (
+    entity_type varchar(20) NOT NULL,
+    entity_id   bigint      NOT NULL,
+    title       text        NOT NULL,
+    subtitle    text,
+    body        text,
+    document    tsvector    NOT NULL,
+    updated_at  timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS search_index_document_idx ON public.search_index USING gin (document);
+CREATE INDEX IF NOT EXISTS search_index_updated_at_idx ON public.search_index (updated_at);
+
+-- Удаленные сущности (хранятся 30 дней; более старые локальные индексы синхронизируются полностью)
+CREATE TABLE IF NOT EXISTS public.search_index_deleted (
+    entity_type varchar(20) NOT NULL,
+    entity_id   bigint      NOT NULL,
+    deleted_at  timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS search_index_deleted_at_idx ON public.search_index_deleted (deleted_at);
+
+-- Содержимое индекса: веса A — названия и имена, B — уточняющие поля, C/D — тексты
+CREATE OR REPLACE VIEW public.search_index_source AS
+SELECT 'PERSON'::varchar(20) AS entity_type,
+       p.person_id::bigint AS entity_id,
+       concat_ws(' ', p.name, p.patronymic, p.surname) AS title,
+       concat_ws(' — ', to_char(p.date_of_birth, 'YYYY'), to_char(p.date_of_death, 'YYYY')) AS subtitle,
+       left(p.biography, 300) AS body,
+       setweight(to_tsvector('russian', concat_ws(' ', p.name, p.patronymic, p.surname)), 'A') ||
+       setweight(to_tsvector('russian', coalesce(p.biography, '')), 'C') AS document
+FROM public.persons p
+UNION ALL
+SELECT 'COUNTRY', c.country_id, c.name, c.capital, left(c.description, 300),
+       setweight(to_tsvector('russian', c.name), 'A') ||
+       setweight(to_tsvector('russian', coalesce(c.capital, '')), 'B') ||
+       setweight(to_tsvector('russian', coalesce(c.description, '')), 'C')
+FROM public.countries c
+UNION ALL
+SELECT 'EVENT', e.event_id, e.name, e.location, left(e.description, 300),
+       setweight(to_tsvector('russian', e.name), 'A') ||
+       setweight(to_tsvector('russian', concat_ws(' ', e.location, e.event_type)), 'B') ||
+       setweight(to_tsvector('russian', coalesce(e.description, '')), 'C')
+FROM public.events e
+UNION ALL
+-- Текст документа ограничен, чтобы не упереться в предельный размер tsvector
+SELECT 'DOCUMENT', d.document_id, d.name, to_char(d.creating_date, 'DD.MM.YYYY'), left(d.content, 300),
+       setweight(to_tsvector('russian', d.name), 'A') ||
+       setweight(to_tsvector('russian', left(coalesce(d.content, ''), 200000)), 'D')
+FROM public.documents d
+UNION ALL
+SELECT 'SOURCE', s.source_id, s.name, s.author, NULL,
+       setweight(to_tsvector('russian', s.name), 'A') ||
+       setweight(to_tsvector('russian', coalesce(s.author, '')), 'B') ||
+       setweight(to_tsvector('russian', coalesce(s.type, '')), 'C')
+FROM public.sources s;
+
+-- Аргументы триггера: тип сущности и колонка первичного ключа
+CREATE OR REPLACE FUNCTION public.search_index_sync() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_id bigint;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_id := (to_jsonb(OLD) ->> TG_ARGV[1])::bigint;
+        DELETE FROM public.search_index WHERE entity_type = TG_ARGV[0] AND entity_id = v_id;
+        INSERT INTO public.search_index_deleted (entity_type, entity_id)
+        VALUES (TG_ARGV[0], v_id)
+        ON CONFLICT (entity_type, entity_id) DO UPDATE SET deleted_at = now();
+        DELETE FROM public.search_index_deleted WHERE deleted_at < now() - interval '30 days';
+        RETURN NULL;
+    END IF;
+
+    v_id := (to_jsonb(NEW) ->> TG_ARGV[1])::bigint;
+    DELETE FROM public.search_index_deleted WHERE entity_type = TG_ARGV[0] AND entity_id = v_id;
+    INSERT INTO public.search_index (entity_type, entity_id, title, subtitle, body, document)
+    SELECT entity_type, entity_id, title, subtitle, body, document
+    FROM public.search_index_source
+    WHERE entity_type = TG_ARGV[0] AND entity_id = v_id
+    ON CONFLICT (entity_type, entity_id) DO UPDATE
+    SET title = EXCLUDED.title,
+        subtitle = EXCLUDED.subtitle,
+        body = EXCLUDED.body,
+        document = EXCLUDED.document,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS persons_search_index ON public.persons;
+CREATE TRIGGER persons_search_index AFTER INSERT OR UPDATE OR DELETE ON public.persons
+    FOR EACH ROW EXECUTE FUNCTION public.search_index_sync('PERSON', 'person_id');
+
+DROP TRIGGER IF EXISTS countries_search_index ON public.countries;
+CREATE TRIGGER countries_search_index AFTER INSERT OR UPDATE OR DELETE ON public.countries
+    FOR EACH ROW EXECUTE FUNCTION public.search_index_sync('COUNTRY', 'country_id');
+
+DROP TRIGGER IF EXISTS events_search_index ON public.events;
+CREATE TRIGGER events_search_index AFTER INSERT OR UPDATE OR DELETE ON public.events
+    FOR EACH ROW EXECUTE FUNCTION public.search_index_sync('EVENT', 'event_id');
+
+DROP TRIGGER IF EXISTS documents_search_index ON public.documents;
+CREATE TRIGGER documents_search_index AFTER INSERT OR UPDATE OR DELETE ON public.documents
+    FOR EACH ROW EXECUTE FUNCTION public.search_index_sync('DOCUMENT', 'document_id');
+
+DROP TRIGGER IF EXISTS sources_search_index ON public.sources;
+CREATE TRIGGER sources_search_index AFTER INSERT OR UPDATE OR DELETE ON public.sources
+    FOR EACH ROW EXECUTE FUNCTION public.search_index_sync('SOURCE', 'source_id');
+
+-- Начальное заполнение (повторный запуск пересобирает индекс)
+BEGIN;
+LOCK TABLE public.search_index IN EXCLUSIVE MODE;
+DELETE FROM public.search_index;
+INSERT INTO public.search_index (entity_type, entity_id, title, subtitle, body, document)
+SELECT entity_type, entity_id, title, subtitle, body, document FROM public.search_index_source;
+COMMIT;
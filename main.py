@@ -4,6 +4,8 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from ui.main_window import MainWindow
 from ui.auth.login_window import LoginWindow
+from ui.stall_watchdog import StallWatchdog
+from ui.window_tracker import WindowLifecycleTracker
 from core.database import DatabaseConnection
 from core.auth import AuthService
 from config import APP_CONFIG
@@ -29,6 +31,15 @@ def main():
     app.setApplicationName(APP_CONFIG.app_name)
     app.setApplicationVersion(APP_CONFIG.version)
     
+    # Сторож зависаний GUI-потока
+    if APP_CONFIG.stall_watchdog_enabled:
+        stall_watchdog = StallWatchdog(parent=app)
+        stall_watchdog.start()
+    
+    # Отслеживание памяти окон (режим профилирования памяти)
+    if APP_CONFIG.memory_profiling_enabled:
+        window_tracker = WindowLifecycleTracker(parent=app)
+        window_tracker.install(app)
     
     try:
         # Инициализация подключения к БД
@@ -64,6 +75,11 @@ def main():
         logger.critical(f"Traceback: {traceback.format_exc()}")
         return 1
     finally:
+        if 'stall_watchdog' in locals():
+            stall_watchdog.stop()
+        if 'window_tracker' in locals():
+            window_tracker.uninstall(app)
+        
         # Закрытие подключения к БД
         try:
             if 'db' in locals():
@@ -1,7 +1,10 @@
-from typing import Dict, Any, List
+from concurrent.futures import Future
+from typing import Dict, Any, List, Callable
 from datetime import datetime, timedelta
 from .base_service import BaseService
+from core.background import background_executor
 from data_access import PersonRepository, CountryRepository, EventRepository, DocumentRepository, SourceRepository, AuditRepository, RelationshipsRepository
+from utils.graph_analytics import graph_analytics
 
 class AnalyticsService(BaseService):
     """Сервис для аналитики и статистики"""
@@ -15,6 +18,9 @@ class AnalyticsService(BaseService):
         self.source_repo = SourceRepository()
         self.audit_repo = AuditRepository()
         self.rel_repo = RelationshipsRepository()
+        
+        from services.relationship_service import RelationshipService
+        self.relationship_service = RelationshipService()
     
     def get_dashboard_statistics(self, user_id: int) -> Dict[str, Any]:
         """Получение основной статистики для дашборда"""
@@ -57,6 +63,62 @@ class AnalyticsService(BaseService):
             }
         }
     
+    def get_graph_analytics(self, user_id: int, limit: int = 10) -> Dict[str, Any]:
+        """Аналитика всего графа связей: центральность, связующие сущности, изолированные кластеры"""
+        limit = min(50, max(1, limit))
+        
+        # Индекс перестраивается по TTL, метрики пересчитываются только при смене его версии
+        self.relationship_service.get_graph_index()
+        
+        central_persons = graph_analytics.top_central('PERSON', limit)
+        bridges = graph_analytics.top_bridges(limit=limit)
+        clusters = graph_analytics.isolated_clusters(limit)
+        
+        # Имена подгружаются одним запросом на тип сущности
+        wanted: Dict[str, set] = {}
+        for entity in central_persons + bridges:
+            wanted.setdefault(entity['entity_type'], set()).add(entity['entity_id'])
+        for cluster in clusters:
+            for entity_type, entity_id in cluster['sample']:
+                wanted.setdefault(entity_type, set()).add(entity_id)
+        names = {
+            entity_type: self.rel_repo.get_entity_names(entity_type, list(ids))
+            for entity_type, ids in wanted.items()
+        }
+        
+        for entity in central_persons + bridges:
+            entity['name'] = names[entity['entity_type']].get(entity['entity_id'], '')
+        for cluster in clusters:
+            cluster['sample'] = [
+                {'entity_type': entity_type, 'entity_id': entity_id,
+                 'name': names[entity_type].get(entity_id, '')}
+                for entity_type, entity_id in cluster['sample']
+            ]
+        
+        self._log_action(user_id, 'GRAPH_ANALYTICS_VIEWED', description='Просмотр аналитики графа связей')
+        
+        return {
+            'summary': graph_analytics.summary(),
+            'central_persons': central_persons,
+            'bridges': bridges,
+            'isolated_clusters': clusters
+        }
+    
+    def start_graph_analytics(self, user_id: int, on_finished: Callable[[Dict[str, Any]], None],
+                              on_error: Callable[[Exception], None], limit: int = 10) -> Future:
+        """Фоновый расчет аналитики графа; обратные вызовы выполняются в потоке пула"""
+        return background_executor.submit(self._run_graph_analytics, user_id, limit, on_finished, on_error)
+    
+    def _run_graph_analytics(self, user_id: int, limit: int, on_finished: Callable[[Dict[str, Any]], None],
+                             on_error: Callable[[Exception], None]) -> None:
+        # Построение индекса графа и пересчет метрик занимают секунды на полном графе
+        try:
+            analytics = self.get_graph_analytics(user_id, limit)
+        except Exception as e:
+            on_error(e)
+            return
+        on_finished(analytics)
+    
     def get_content_quality_report(self, admin_id: int) -> Dict[str, Any]:
         """Отчет о качестве контента (для админов)"""
         self._validate_user_permissions(admin_id, 3)
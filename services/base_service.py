@@ -1,14 +1,27 @@
 from abc import ABC
 from typing import Dict, Any, Optional, List
 import logging
+import time
 from core.exceptions import ValidationError, AuthorizationError, EntityNotFoundError
 from data_access import AuditRepository
+from core.metrics import metrics
+from utils.profiling import instrument_methods
+from utils.date_helpers import century_label
 
 logger = logging.getLogger(__name__)
 
+audit_writes = metrics.counter('audit_writes_total', 'Записи журнала аудита', ('status',))
+audit_write_duration = metrics.histogram('audit_write_duration_seconds', 'Длительность записи в журнал аудита')
+audit_in_flight = metrics.gauge('audit_writes_in_flight', 'Выполняющиеся записи в журнал аудита')
+
 class BaseService(ABC):
     """Базовый класс для всех бизнес-сервисов"""
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Публичные методы сервисов профилируются как отдельные действия
+        instrument_methods(cls, f"service.{cls.__name__}")
+    
     def __init__(self):
         self.audit_repo = AuditRepository()
     
@@ -26,10 +39,24 @@ class BaseService(ABC):
         
         return True
     
+    def _format_facets(self, facets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Подписи фасетов для фильтров: века по порядку, пустые значения — «не указано»"""
+        for facet, values in facets.items():
+            for value in values:
+                if facet == 'century':
+                    value['label'] = century_label(value['value'])
+                elif value['label'] is None:
+                    value['label'] = value['value'] if value['value'] is not None else "Не указано"
+            if facet == 'century':
+                values.sort(key=lambda value: (value['value'] is None, value['value'] or 0))
+        return facets
+    
     def _log_action(self, user_id: int, action_type: str, entity_type: str = None,
                    entity_id: int = None, description: str = None,
                    old_values: Dict[str, Any] = None, new_values: Dict[str, Any] = None) -> None:
         """Логирование действий пользователя"""
+        audit_in_flight.inc()
+        start_time = time.perf_counter()
         try:
             self.audit_repo.log_user_action(
                 user_id=user_id,
@@ -40,8 +67,13 @@ class BaseService(ABC):
                 old_values=old_values,
                 new_values=new_values
             )
+            audit_writes.inc(status='ok')
         except Exception as e:
+            audit_writes.inc(status='error')
             logger.error(f"Failed to log action: {e}")
+        finally:
+            audit_in_flight.dec()
+            audit_write_duration.observe(time.perf_counter() - start_time)
     
     def _validate_required_fields(self, data: Dict[str, Any], required_fields: List[str]) -> None:
         """Проверка обязательных полей"""
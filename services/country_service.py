@@ -4,6 +4,7 @@ from .base_service import BaseService
 from data_access import CountryRepository, RelationshipsRepository
 from core.exceptions import ValidationError, EntityNotFoundError
 from  utils.date_helpers import safe_date_convert
+from utils.change_feed import entity_changes
 class CountryService(BaseService):
     """Сервис для работы со странами"""
     
@@ -121,6 +122,7 @@ class CountryService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'COUNTRY_CREATED_DIRECT', 'COUNTRY', result['country_id'],
                             f'Прямое создание страны: {country_data["name"]}')
+            entity_changes.publish('COUNTRY', result['country_id'], 'CREATE', country_data)
         
         return result
     
@@ -264,5 +266,6 @@ class CountryService(BaseService):
             self._log_action(moderator_id, 'COUNTRY_UPDATED_DIRECT', 'COUNTRY', country_id,
                             f'Прямое обновление страны: {existing_country["name"]}',
                             old_values, new_values)
+            entity_changes.publish('COUNTRY', country_id, 'UPDATE', country_data)
         
         return result
\ No newline at end of file
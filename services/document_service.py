@@ -1,9 +1,10 @@
 from typing import Dict, Any, List, Optional
 from datetime import date
 from .base_service import BaseService
-from data_access import DocumentRepository, RelationshipsRepository
-from core.exceptions import ValidationError, EntityNotFoundError
+from data_access import DocumentRepository, RelationshipsRepository, SearchRepository
+from core.exceptions import ValidationError, EntityNotFoundError, DatabaseError
 from  utils.date_helpers import safe_date_convert
+from utils.change_feed import entity_changes
 class DocumentService(BaseService):
     """Сервис для работы с документами"""
     
@@ -11,6 +12,7 @@ class DocumentService(BaseService):
         super().__init__()
         self.document_repo = DocumentRepository()
         self.rel_repo = RelationshipsRepository()
+        self.search_repo = SearchRepository()
     
     def get_documents(self, user_id: int, filters: Dict[str, Any] = None) -> Dict[str, Any]:
         """Получение списка документов с фильтрацией"""
@@ -27,27 +29,40 @@ class DocumentService(BaseService):
         if creating_year_from and creating_year_to and creating_year_from > creating_year_to:
             raise ValidationError("Начальный год создания не может быть больше конечного")
         
+        list_filters = {
+            'search_term': filters.get('search_term'),
+            'creating_year_from': creating_year_from,
+            'creating_year_to': creating_year_to,
+            'person_id': filters.get('person_id'),
+            'event_id': filters.get('event_id'),
+            'content_search': filters.get('content_search')
+        }
+        
         # Получаем данные
         documents = self.document_repo.get_documents(
             offset=offset,
             limit=limit,
-            search_term=filters.get('search_term'),
-            creating_year_from=creating_year_from,
-            creating_year_to=creating_year_to,
-            person_id=filters.get('person_id'),
-            event_id=filters.get('event_id'),
-            content_search=filters.get('content_search'),
-            sort_by=filters.get('sort_by', 'date_desc')
+            sort_by=filters.get('sort_by', 'date_desc'),
+            **list_filters
         )
         
         self._log_action(user_id, 'DOCUMENTS_LIST_VIEWED', description='Просмотр списка документов')
         
-        return {
+        result = {
             'documents': documents,
             'total_count': documents[0]['total_count'] if documents else 0,
             'offset': offset,
             'limit': limit
         }
+        
+        # Фасеты по векам, типам и странам связанных событий
+        if filters.get('with_facets'):
+            use_search_index = bool(list_filters['content_search']) and self.search_repo.index_available()
+            result['facets'] = self._format_facets(
+                self.document_repo.get_documents_facets(use_search_index=use_search_index, **list_filters)
+            )
+        
+        return result
     
     def get_document_details(self, user_id: int, document_id: int) -> Dict[str, Any]:
         """Получение детальной информации о документе"""
@@ -111,6 +126,7 @@ class DocumentService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'DOCUMENT_CREATED_DIRECT', 'DOCUMENT', result['document_id'],
                             f'Прямое создание документа: {document_data["name"]}')
+            entity_changes.publish('DOCUMENT', result['document_id'], 'CREATE', document_data)
         
         return result
     
@@ -164,6 +180,7 @@ class DocumentService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'DOCUMENT_UPDATED_DIRECT', 'DOCUMENT', document_id,
                             f'Прямое обновление документа: {existing_document["name"]}')
+            entity_changes.publish('DOCUMENT', document_id, 'UPDATE', document_data)
         
         return result
     
@@ -184,8 +201,9 @@ class DocumentService(BaseService):
         return result
     
     def search_documents(self, user_id: int, search_text: str, search_in_content: bool = True,
-                        offset: int = 0, limit: int = 20) -> Dict[str, Any]:
-        """Полнотекстовый поиск документов"""
+                        offset: int = 0, limit: int = 20, snippet_count: int = 2,
+                        snippet_length: int = 200) -> Dict[str, Any]:
+        """Полнотекстовый поиск документов (при поиске по содержимому — с фрагментами текста)"""
         if not search_text or len(search_text.strip()) < 2:
             raise ValidationError("Поисковый запрос должен содержать минимум 2 символа")
         
@@ -195,6 +213,9 @@ class DocumentService(BaseService):
         
         results = self.document_repo.search_fulltext(search_text.strip(), search_in_content, offset, limit)
         
+        if results and search_in_content and snippet_count > 0:
+            self._attach_snippets(results, search_text.strip(), snippet_count, snippet_length)
+        
         self._log_action(user_id, 'DOCUMENTS_SEARCH', description=f'Поиск документов: "{search_text}"')
         
         return {
@@ -220,6 +241,35 @@ class DocumentService(BaseService):
         
         return snippets
     
+    def get_documents_snippets(self, user_id: int, document_ids: List[int], search_text: str,
+                               snippet_count: int = 3, snippet_length: int = 150) -> Dict[int, List[Dict[str, Any]]]:
+        """Фрагменты с выделением найденных слов для нескольких документов одним запросом"""
+        if not search_text or len(search_text.strip()) < 2:
+            raise ValidationError("Поисковый запрос должен содержать минимум 2 символа")
+        
+        fragments = self.document_repo.get_search_snippets_batch(
+            document_ids, search_text.strip(), snippet_count, snippet_length
+        )
+        
+        self._log_action(user_id, 'DOCUMENT_SNIPPETS_VIEWED',
+                        description=f'Просмотр фрагментов {len(fragments)} документов для поиска: "{search_text}"')
+        
+        return {document_id: [{'snippet': fragment} for fragment in document_fragments]
+                for document_id, document_fragments in fragments.items()}
+    
+    def _attach_snippets(self, results: List[Dict[str, Any]], search_text: str,
+                         snippet_count: int, snippet_length: int) -> None:
+        """Добавление фрагментов к результатам поиска (без фрагментов результаты остаются пригодными)"""
+        try:
+            fragments = self.document_repo.get_search_snippets_batch(
+                [doc['document_id'] for doc in results], search_text, snippet_count, snippet_length
+            )
+        except DatabaseError:
+            return
+        
+        for doc in results:
+            doc['snippets'] = [{'snippet': fragment} for fragment in fragments.get(doc['document_id'], [])]
+    
     def _validate_document_data(self, document_data: Dict[str, Any]) -> None:
         """Валидация данных документа"""
         # Проверка обязательных полей
@@ -4,6 +4,7 @@ from .base_service import BaseService
 from data_access import EventRepository, RelationshipsRepository
 from core.exceptions import ValidationError, EntityNotFoundError
 from  utils.date_helpers import safe_date_convert
+from utils.change_feed import entity_changes
 class EventService(BaseService):
     """Сервис для работы с событиями"""
     
@@ -27,31 +28,37 @@ class EventService(BaseService):
         if start_year_from and start_year_to and start_year_from > start_year_to:
             raise ValidationError("Начальный год не может быть больше конечного")
         
+        list_filters = {
+            'search_term': filters.get('search_term'),
+            'event_type': filters.get('event_type'),
+            'location': filters.get('location'),
+            'start_year_from': start_year_from,
+            'start_year_to': start_year_to,
+            'end_year_from': filters.get('end_year_from'),
+            'end_year_to': filters.get('end_year_to'),
+            'parent_id': filters.get('parent_id'),
+            'country_id': filters.get('country_id'),
+            'person_id': filters.get('person_id'),
+            'only_root_events': filters.get('only_root_events', False)
+        }
+        
         # Получаем данные
-        events = self.event_repo.get_events(
-            offset=offset,
-            limit=limit,
-            search_term=filters.get('search_term'),
-            event_type=filters.get('event_type'),
-            location=filters.get('location'),
-            start_year_from=start_year_from,
-            start_year_to=start_year_to,
-            end_year_from=filters.get('end_year_from'),
-            end_year_to=filters.get('end_year_to'),
-            parent_id=filters.get('parent_id'),
-            country_id=filters.get('country_id'),
-            person_id=filters.get('person_id'),
-            only_root_events=filters.get('only_root_events', False)
-        )
+        events = self.event_repo.get_events(offset=offset, limit=limit, **list_filters)
         
         self._log_action(user_id, 'EVENTS_LIST_VIEWED', description='Просмотр списка событий')
         
-        return {
+        result = {
             'events': events,
             'total_count': events[0]['total_count'] if events else 0,
             'offset': offset,
             'limit': limit
         }
+        
+        # Счетчики вариантов фильтров (тип, век, страна, тип источника) одним агрегирующим запросом
+        if filters.get('with_facets'):
+            result['facets'] = self._format_facets(self.event_repo.get_events_facets(**list_filters))
+        
+        return result
     
     def get_event_details(self, user_id: int, event_id: int) -> Dict[str, Any]:
         """Получение детальной информации о событии"""
@@ -140,6 +147,7 @@ class EventService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'EVENT_CREATED_DIRECT', 'EVENT', result['event_id'],
                             f'Прямое создание события: {event_data["name"]}')
+            entity_changes.publish('EVENT', result['event_id'], 'CREATE', event_data)
         
         return result
     
@@ -287,5 +295,6 @@ class EventService(BaseService):
             self._log_action(moderator_id, 'EVENT_UPDATED_DIRECT', 'EVENT', event_id,
                             f'Прямое обновление события: {existing_event["name"]}',
                             old_values, new_values)
+            entity_changes.publish('EVENT', event_id, 'UPDATE', event_data)
         
         return result
\ No newline at end of file
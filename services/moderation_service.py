@@ -2,6 +2,7 @@ from typing import Dict, Any, List
 from .base_service import BaseService
 from data_access import ModerationRepository, PersonRepository, CountryRepository, EventRepository, DocumentRepository, SourceRepository
 from core.exceptions import ValidationError, EntityNotFoundError, AuthorizationError
+from utils.change_feed import entity_changes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -198,16 +199,29 @@ class ModerationService(BaseService):
         entity_id = approval_result.get('entity_id')
         new_data = approval_result['new_data']
         
+        result = None
         if entity_type == 'PERSON':
-            self._apply_person_changes(operation_type, entity_id, new_data, moderator_id)
+            result = self._apply_person_changes(operation_type, entity_id, new_data, moderator_id)
         elif entity_type == 'COUNTRY':
-            self._apply_country_changes(operation_type, entity_id, new_data, moderator_id)
+            result = self._apply_country_changes(operation_type, entity_id, new_data, moderator_id)
         elif entity_type == 'EVENT':
-            self._apply_event_changes(operation_type, entity_id, new_data, moderator_id)
+            result = self._apply_event_changes(operation_type, entity_id, new_data, moderator_id)
         elif entity_type == 'DOCUMENT':
-            self._apply_document_changes(operation_type, entity_id, new_data, moderator_id)
+            result = self._apply_document_changes(operation_type, entity_id, new_data, moderator_id)
         elif entity_type == 'SOURCE':
-            self._apply_source_changes(operation_type, entity_id, new_data, moderator_id)
+            result = self._apply_source_changes(operation_type, entity_id, new_data, moderator_id)
+        
+        self._publish_change(entity_type, operation_type, entity_id, new_data, result)
+    
+    def _publish_change(self, entity_type: str, operation_type: str, entity_id: int,
+                        new_data: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Публикация примененного изменения в ленту изменений (индексы и кэши поиска)"""
+        if not result or not result.get('success'):
+            return
+        
+        entity_id = entity_id or result.get(f'{entity_type.lower()}_id')
+        if entity_id:
+            entity_changes.publish(entity_type, entity_id, operation_type, new_data)
     
     def _apply_person_changes(self, operation_type: str, entity_id: int, new_data: Dict[str, Any], moderator_id: int):
         """Применение изменений для персоны"""
@@ -221,8 +235,9 @@ class ModerationService(BaseService):
                 except (ValueError, TypeError):
                     new_data[date_field] = None
         
+        result = None
         if operation_type == 'CREATE':
-            self.person_repo.create_direct(
+            result = self.person_repo.create_direct(
                 moderator_id=moderator_id,
                 name=new_data['name'],
                 surname=new_data.get('surname'),
@@ -233,7 +248,7 @@ class ModerationService(BaseService):
                 country_id=new_data.get('country_id')
             )
         elif operation_type == 'UPDATE':
-            self.person_repo.update_direct(
+            result = self.person_repo.update_direct(
                 moderator_id=moderator_id,
                 person_id=entity_id,
                 name=new_data['name'],
@@ -247,7 +262,9 @@ class ModerationService(BaseService):
         elif operation_type == 'DELETE':
             # Удаление требует прав администратора
             self._validate_user_permissions(moderator_id, 3)
-            self.person_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+            result = self.person_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+        
+        return result
     
     def _apply_country_changes(self, operation_type: str, entity_id: int, new_data: Dict[str, Any], moderator_id: int):
         """Применение изменений для страны"""
@@ -261,8 +278,9 @@ class ModerationService(BaseService):
                 except (ValueError, TypeError):
                     new_data[date_field] = None
         
+        result = None
         if operation_type == 'CREATE':
-            self.country_repo.create_direct(
+            result = self.country_repo.create_direct(
                 moderator_id=moderator_id,
                 name=new_data['name'],
                 capital=new_data.get('capital'),
@@ -271,7 +289,7 @@ class ModerationService(BaseService):
                 description=new_data.get('description')
             )
         elif operation_type == 'UPDATE':
-            self.country_repo.update_direct(
+            result = self.country_repo.update_direct(
                 moderator_id=moderator_id,
                 country_id=entity_id,
                 name=new_data['name'],
@@ -282,7 +300,9 @@ class ModerationService(BaseService):
             )
         elif operation_type == 'DELETE':
             self._validate_user_permissions(moderator_id, 3)
-            self.country_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+            result = self.country_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+        
+        return result
     
     def _apply_event_changes(self, operation_type: str, entity_id: int, new_data: Dict[str, Any], moderator_id: int):
         """Применение изменений для события"""
@@ -296,8 +316,9 @@ class ModerationService(BaseService):
                 except (ValueError, TypeError):
                     new_data[date_field] = None
         
+        result = None
         if operation_type == 'CREATE':
-            self.event_repo.create_direct(
+            result = self.event_repo.create_direct(
                 moderator_id=moderator_id,
                 name=new_data['name'],
                 description=new_data.get('description'),
@@ -308,7 +329,7 @@ class ModerationService(BaseService):
                 parent_id=new_data.get('parent_id')
             )
         elif operation_type == 'UPDATE':
-            self.event_repo.update_direct(
+            result = self.event_repo.update_direct(
                 moderator_id=moderator_id,
                 event_id=entity_id,
                 name=new_data['name'],
@@ -321,7 +342,9 @@ class ModerationService(BaseService):
             )
         elif operation_type == 'DELETE':
             self._validate_user_permissions(moderator_id, 3)
-            self.event_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+            result = self.event_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+        
+        return result
     
     def _apply_document_changes(self, operation_type: str, entity_id: int, new_data: Dict[str, Any], moderator_id: int):
         """Применение изменений для документа"""
@@ -334,15 +357,16 @@ class ModerationService(BaseService):
             except (ValueError, TypeError):
                 new_data['creating_date'] = None
         
+        result = None
         if operation_type == 'CREATE':
-            self.document_repo.create_direct(
+            result = self.document_repo.create_direct(
                 moderator_id=moderator_id,
                 name=new_data['name'],
                 content=new_data['content'],
                 creating_date=new_data.get('creating_date')
             )
         elif operation_type == 'UPDATE':
-            self.document_repo.update_direct(
+            result = self.document_repo.update_direct(
                 moderator_id=moderator_id,
                 document_id=entity_id,
                 name=new_data['name'],
@@ -351,7 +375,9 @@ class ModerationService(BaseService):
             )
         elif operation_type == 'DELETE':
             self._validate_user_permissions(moderator_id, 3)
-            self.document_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+            result = self.document_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+        
+        return result
     
     def _apply_source_changes(self, operation_type: str, entity_id: int, new_data: Dict[str, Any], moderator_id: int):
         """Применение изменений для источника"""
@@ -364,8 +390,9 @@ class ModerationService(BaseService):
             except (ValueError, TypeError):
                 new_data['publication_date'] = None
         
+        result = None
         if operation_type == 'CREATE':
-            self.source_repo.create_direct(
+            result = self.source_repo.create_direct(
                 moderator_id=moderator_id,
                 name=new_data['name'],
                 author=new_data.get('author'),
@@ -374,7 +401,7 @@ class ModerationService(BaseService):
                 url=new_data.get('url')
             )
         elif operation_type == 'UPDATE':
-            self.source_repo.update_direct(
+            result = self.source_repo.update_direct(
                 moderator_id=moderator_id,
                 source_id=entity_id,
                 name=new_data['name'],
@@ -385,7 +412,9 @@ class ModerationService(BaseService):
             )
         elif operation_type == 'DELETE':
             self._validate_user_permissions(moderator_id, 3)
-            self.source_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+            result = self.source_repo.delete_direct(moderator_id, entity_id, new_data.get('reason'))
+        
+        return result
     
     def _get_current_entity_data(self, entity_type: str, entity_id: int) -> Dict[str, Any]:
         """Получение текущих данных сущности"""
@@ -4,6 +4,7 @@ from .base_service import BaseService
 from data_access import PersonRepository, CountryRepository, RelationshipsRepository
 from core.exceptions import ValidationError, EntityNotFoundError
 from  utils.date_helpers import safe_date_convert
+from utils.change_feed import entity_changes
 class PersonService(BaseService):
     """Сервис для работы с персонами"""
     
@@ -34,27 +35,33 @@ class PersonService(BaseService):
         if death_year_from and death_year_to and death_year_from > death_year_to:
             raise ValidationError("Начальный год смерти не может быть больше конечного")
         
+        list_filters = {
+            'search_term': filters.get('search_term'),
+            'country_id': filters.get('country_id'),
+            'birth_year_from': birth_year_from,
+            'birth_year_to': birth_year_to,
+            'death_year_from': death_year_from,
+            'death_year_to': death_year_to,
+            'alive_only': filters.get('alive_only', False)
+        }
+        
         # Получаем данные
-        persons = self.person_repo.get_persons(
-            offset=offset,
-            limit=limit,
-            search_term=filters.get('search_term'),
-            country_id=filters.get('country_id'),
-            birth_year_from=birth_year_from,
-            birth_year_to=birth_year_to,
-            death_year_from=death_year_from,
-            death_year_to=death_year_to,
-            alive_only=filters.get('alive_only', False)
-        )
+        persons = self.person_repo.get_persons(offset=offset, limit=limit, **list_filters)
         
         self._log_action(user_id, 'PERSONS_LIST_VIEWED', description='Просмотр списка персон')
         
-        return {
+        result = {
             'persons': persons,
             'total_count': persons[0]['total_count'] if persons else 0,
             'offset': offset,
             'limit': limit
         }
+        
+        # Счетчики для фильтров нужны только при смене фильтров, а не при листании страниц
+        if filters.get('with_facets'):
+            result['facets'] = self._format_facets(self.person_repo.get_persons_facets(**list_filters))
+        
+        return result
     
     def get_person_details(self, user_id: int, person_id: int) -> Dict[str, Any]:
         """Получение детальной информации о персоне"""
@@ -126,6 +133,7 @@ class PersonService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'PERSON_CREATED_DIRECT', 'PERSON', result['person_id'],
                             f'Прямое создание персоны: {person_data["name"]}')
+            entity_changes.publish('PERSON', result['person_id'], 'CREATE', person_data)
         
         return result
     
@@ -187,6 +195,7 @@ class PersonService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'PERSON_UPDATED_DIRECT', 'PERSON', person_id,
                             f'Прямое обновление персоны: {existing_person["full_name"]}')
+            entity_changes.publish('PERSON', person_id, 'UPDATE', person_data)
         
         return result
     
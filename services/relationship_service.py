@@ -1,8 +1,40 @@
-from typing import Dict, Any, List, Tuple
+import logging
+import os
+import time
+from typing import Dict, Any, List, Tuple, Callable, Iterator
 from .base_service import BaseService
 from data_access import RelationshipsRepository
-from core.exceptions import ValidationError, EntityNotFoundError
+from data_access.relationships_repository import RELATIONS, LINK_TABLES
+from core.database import DatabaseConnection, QueryCancelScope
+from core.exceptions import ValidationError, EntityNotFoundError, DatabaseError, QueryCancelledError
+from utils.graph_index import relationship_graph, RelationshipGraphIndex, TYPE_BY_RELATION
+from utils.edge_list_io import EdgeListWriter, read_edge_batches
+from config import APP_CONFIG
 from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Названия сущностей в сообщениях о висячих связях
+ENTITY_TITLES = {
+    'PERSON': 'персона',
+    'EVENT': 'событие',
+    'COUNTRY': 'страна',
+    'DOCUMENT': 'документ',
+    'SOURCE': 'источник',
+}
+
+# Повторы фрагмента обслуживания, упершегося в блокировку
+MAINTENANCE_CHUNK_RETRIES = 3
+
+# Сколько сообщений о проблемах возвращать в результате (полный список — в отчете)
+MAX_RETURNED_ISSUES = 100
+
+# Размер пакета потокового экспорта связей
+EXPORT_BATCH_SIZE = 10000
+
+# Размер пакета чтения файла при массовом импорте связей
+IMPORT_BATCH_SIZE = 50000
+
 class RelationshipService(BaseService):
     """Сервис для управления связями между сущностями"""
     
@@ -18,8 +50,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.link_person_to_event(person_id, event_id, user_id)
         
         if success:
-            self._log_action(user_id, 'PERSON_EVENT_LINKED', 'PERSON', person_id,
-                            f'Персона связана с событием {event_id}')
+            relationship_graph.add_link('PERSON', person_id, 'EVENT', event_id)
             return {'success': True, 'message': 'Персона успешно связана с событием'}
         else:
             return {'success': False, 'message': 'Связь уже существует или произошла ошибка'}
@@ -32,8 +63,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.unlink_person_from_event(person_id, event_id, user_id)
         
         if success:
-            self._log_action(user_id, 'PERSON_EVENT_UNLINKED', 'PERSON', person_id,
-                            f'Персона отвязана от события {event_id}')
+            relationship_graph.remove_link('PERSON', person_id, 'EVENT', event_id)
             return {'success': True, 'message': 'Связь успешно удалена'}
         else:
             return {'success': False, 'message': 'Связь не найдена'}
@@ -46,8 +76,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.link_country_to_event(country_id, event_id, user_id)
         
         if success:
-            self._log_action(user_id, 'COUNTRY_EVENT_LINKED', 'COUNTRY', country_id,
-                            f'Страна связана с событием {event_id}')
+            relationship_graph.add_link('COUNTRY', country_id, 'EVENT', event_id)
             return {'success': True, 'message': 'Страна успешно связана с событием'}
         else:
             return {'success': False, 'message': 'Связь уже существует или произошла ошибка'}
@@ -60,8 +89,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.unlink_country_from_event(country_id, event_id, user_id)
         
         if success:
-            self._log_action(user_id, 'COUNTRY_EVENT_UNLINKED', 'COUNTRY', country_id,
-                            f'Страна отвязана от события {event_id}')
+            relationship_graph.remove_link('COUNTRY', country_id, 'EVENT', event_id)
             return {'success': True, 'message': 'Связь успешно удалена'}
         else:
             return {'success': False, 'message': 'Связь не найдена'}
@@ -74,8 +102,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.link_document_to_person(document_id, person_id, user_id)
         
         if success:
-            self._log_action(user_id, 'DOCUMENT_PERSON_LINKED', 'DOCUMENT', document_id,
-                            f'Документ связан с персоной {person_id}')
+            relationship_graph.add_link('DOCUMENT', document_id, 'PERSON', person_id)
             return {'success': True, 'message': 'Документ успешно связан с персоной'}
         else:
             return {'success': False, 'message': 'Связь уже существует или произошла ошибка'}
@@ -88,8 +115,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.link_document_to_event(document_id, event_id, user_id)
         
         if success:
-            self._log_action(user_id, 'DOCUMENT_EVENT_LINKED', 'DOCUMENT', document_id,
-                            f'Документ связан с событием {event_id}')
+            relationship_graph.add_link('DOCUMENT', document_id, 'EVENT', event_id)
             return {'success': True, 'message': 'Документ успешно связан с событием'}
         else:
             return {'success': False, 'message': 'Связь уже существует или произошла ошибка'}
@@ -102,8 +128,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.link_event_to_source(event_id, source_id, user_id)
         
         if success:
-            self._log_action(user_id, 'EVENT_SOURCE_LINKED', 'EVENT', event_id,
-                            f'Событие связано с источником {source_id}')
+            relationship_graph.add_link('EVENT', event_id, 'SOURCE', source_id)
             return {'success': True, 'message': 'Событие успешно связано с источником'}
         else:
             return {'success': False, 'message': 'Связь уже существует или произошла ошибка'}
@@ -113,10 +138,102 @@ class RelationshipService(BaseService):
         if not person_ids or not event_id:
             raise ValidationError("Список ID персон и ID события обязательны")
         
+        # Репозиторий пишет одну сводную запись аудита в той же транзакции
         result = self.rel_repo.batch_link_persons_to_event(person_ids, event_id, user_id)
+        relationship_graph.apply_changes('EVENT', event_id, 'PERSON', added_ids=result['linked_ids'])
+        return result
+    
+    def _validate_relation(self, entity_type: str, entity_id: int, relation: str) -> None:
+        """Проверка типа сущности и связи"""
+        if not entity_id:
+            raise ValidationError("ID сущности обязателен")
+        if (entity_type, relation) not in RELATIONS:
+            raise ValidationError(f"Некорректная связь {relation} для типа {entity_type}")
+    
+    def sync_relationships(self, user_id: int, entity_type: str, entity_id: int,
+                           relation: str, desired_ids: List[int]) -> Dict[str, Any]:
+        """Приведение связей сущности к желаемому набору одной транзакцией"""
+        self._validate_relation(entity_type, entity_id, relation)
+        
+        result = self.rel_repo.sync_relationships(entity_type, entity_id, relation, desired_ids or [], user_id)
+        relationship_graph.apply_changes(entity_type, entity_id, TYPE_BY_RELATION[relation],
+                                         result['added_ids'], result['removed_ids'])
+        return self._relationship_changes_result(result)
+    
+    def update_relationships(self, user_id: int, entity_type: str, entity_id: int, relation: str,
+                             add_ids: List[int] = None, remove_ids: List[int] = None) -> Dict[str, Any]:
+        """Добавление и удаление связей сущности одной транзакцией"""
+        self._validate_relation(entity_type, entity_id, relation)
+        if not add_ids and not remove_ids:
+            raise ValidationError("Не указаны связи для добавления или удаления")
+        
+        result = self.rel_repo.apply_relationship_changes(entity_type, entity_id, relation, user_id,
+                                                          add_ids=add_ids, remove_ids=remove_ids)
+        relationship_graph.apply_changes(entity_type, entity_id, TYPE_BY_RELATION[relation],
+                                         result['added_ids'], result['removed_ids'])
+        return self._relationship_changes_result(result)
+    
+    def _relationship_changes_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ответ сервиса по результату изменения связей"""
+        if result['added_count'] or result['removed_count']:
+            message = f"Добавлено связей: {result['added_count']}, удалено: {result['removed_count']}"
+        else:
+            message = "Изменений нет: связи уже в нужном состоянии"
+        if result['missing_ids']:
+            message += f"\nНе найдено сущностей: {len(result['missing_ids'])}"
+        
+        return {
+            'success': result['added_count'] > 0 or result['removed_count'] > 0,
+            'message': message,
+            **result
+        }
+    
+    # ========================================
+    # ИНДЕКС ГРАФА СВЯЗЕЙ
+    # ========================================
+    
+    def get_graph_index(self, rebuild: bool = False) -> RelationshipGraphIndex:
+        """Индекс графа связей (строится при первом обращении и по истечении TTL)"""
+        if rebuild or relationship_graph.needs_rebuild(APP_CONFIG.graph_index_ttl_seconds):
+            relationship_graph.build(self.rel_repo.iter_all_links())
+        return relationship_graph
+    
+    def rebuild_graph_index(self, admin_id: int) -> Dict[str, Any]:
+        """Полная перестройка индекса графа (для админов)"""
+        self._validate_user_permissions(admin_id, 3)
+        
+        stats = self.get_graph_index(rebuild=True).memory_stats()
+        self._log_action(admin_id, 'GRAPH_INDEX_REBUILT',
+                        description=f"Перестроен индекс графа: {stats['nodes']} узлов, {stats['edges']} связей")
+        return stats
+    
+    def traverse_relationships(self, user_id: int, entity_type: str, entity_id: int, max_depth: int = 2,
+                               edge_types: List[str] = None, target_types: List[str] = None,
+                               page: int = 1, page_size: int = 50,
+                               include_paths: bool = False) -> Dict[str, Any]:
+        """Окрестность сущности на несколько шагов по связям (один запрос к БД)"""
+        if entity_type not in ['PERSON', 'EVENT', 'COUNTRY', 'DOCUMENT', 'SOURCE']:
+            raise ValidationError("Некорректный тип сущности")
+        if not 1 <= max_depth <= 4:
+            raise ValidationError("Глубина обхода должна быть от 1 до 4")
+        if edge_types and any(edge_type not in LINK_TABLES for edge_type in edge_types):
+            raise ValidationError("Некорректный тип связи")
+        if target_types and any(target not in ['PERSON', 'EVENT', 'COUNTRY', 'DOCUMENT', 'SOURCE']
+                                for target in target_types):
+            raise ValidationError("Некорректный тип сущности")
+        
+        page = max(1, page)
+        page_size = min(200, max(1, page_size))
+        
+        result = self.rel_repo.traverse_relationships(
+            entity_type, entity_id, max_depth, edge_types, target_types,
+            offset=(page - 1) * page_size, limit=page_size, include_paths=include_paths
+        )
+        result['page'] = page
+        result['total_pages'] = (result['total_count'] + page_size - 1) // page_size
         
-        self._log_action(user_id, 'BATCH_PERSONS_EVENT_LINKED', 'EVENT', event_id,
-                        f'Массовое связывание персон с событием: успешно {result["success_count"]}, ошибок {result["failed_count"]}')
+        self._log_action(user_id, 'RELATIONSHIPS_TRAVERSED', entity_type, entity_id,
+                        f'Обход связей {entity_type} на глубину {max_depth}')
         
         return result
     
@@ -132,6 +249,13 @@ class RelationshipService(BaseService):
         
         return summary
     
+    def get_relationship_counts(self, user_id: int, entity_type: str, entity_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """Количество связей для страницы списка одним запросом"""
+        if entity_type not in ['PERSON', 'EVENT', 'COUNTRY', 'DOCUMENT', 'SOURCE']:
+            raise ValidationError("Некорректный тип сущности")
+        
+        return self.rel_repo.get_relationship_counts(entity_type, entity_ids)
+    
     def get_most_connected_entities(self, user_id: int, entity_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Получение самых связанных сущностей"""
         if entity_type not in ['PERSON', 'EVENT', 'COUNTRY', 'DOCUMENT', 'SOURCE']:
@@ -145,17 +269,123 @@ class RelationshipService(BaseService):
         
         return entities
     
-    def cleanup_orphaned_relationships(self, admin_id: int) -> Dict[str, int]:
-        """Очистка висячих связей (для админов)"""
+    def check_relationship_degrees(self, admin_id: int) -> Dict[str, Any]:
+        """Сверка предагрегированных степеней с фактическими связями (для админов)"""
         self._validate_user_permissions(admin_id, 3)
         
-        cleanup_stats = self.rel_repo.cleanup_orphaned_relationships(admin_id)
+        report = self.rel_repo.check_relationship_degrees()
+        self._log_action(admin_id, 'RELATIONSHIP_DEGREES_CHECKED',
+                        description=f"Расхождений в таблице степеней: {report['mismatched_count']}")
+        return report
+    
+    def rebuild_relationship_degrees(self, admin_id: int) -> Dict[str, Any]:
+        """Перестройка таблицы степеней (для админов)"""
+        self._validate_user_permissions(admin_id, 3)
+        
+        rebuilt = self.rel_repo.rebuild_relationship_degrees()
+        self._log_action(admin_id, 'RELATIONSHIP_DEGREES_REBUILT',
+                        description=f'Перестроена таблица степеней: исправлено {rebuilt} строк')
+        return {'success': True, 'message': f'Таблица степеней перестроена: исправлено {rebuilt} строк', 'rebuilt': rebuilt}
+    
+    def cleanup_orphaned_relationships(self, admin_id: int, report_file: str = None,
+                                       progress_callback: Callable[[str, int, int, int], bool] = None) -> Dict[str, int]:
+        """Очистка висячих связей фрагментами с короткими транзакциями (для админов)"""
+        self._validate_user_permissions(admin_id, 3)
+        
+        try:
+            scan = self._scan_orphaned_links(True, report_file, progress_callback)
+        except Exception:
+            # Фрагменты до ошибки уже зафиксированы — индекс графа мог устареть
+            relationship_graph.invalidate()
+            raise
+        cleanup_stats = {f'{table}_cleaned': count for table, count in scan['by_table'].items()}
         
         total_cleaned = sum(cleanup_stats.values())
+        if total_cleaned:
+            relationship_graph.invalidate()
         self._log_action(admin_id, 'ORPHANED_RELATIONSHIPS_CLEANED', 
-                        description=f'Очищено висячих связей: {total_cleaned}')
+                        description=f"Очищено висячих связей: {total_cleaned}, отчет: {scan['report_file']}")
         
         return cleanup_stats
+    
+    def _scan_orphaned_links(self, delete: bool, report_file: str = None,
+                             progress_callback: Callable[[str, int, int, int], bool] = None) -> Dict[str, Any]:
+        """Обход таблиц связей по диапазонам ключей; находки сразу пишутся в отчет"""
+        if report_file is None:
+            job = 'cleanup' if delete else 'validation'
+            report_file = os.path.join(APP_CONFIG.maintenance_report_dir,
+                                       f"relationships_{job}_{datetime.now():%Y%m%d_%H%M%S}.log")
+        report_dir = os.path.dirname(report_file)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        
+        estimates = self.rel_repo.estimate_link_counts()
+        by_table = {table: 0 for table in LINK_TABLES}
+        issues = []
+        scanned = 0
+        cancelled = False
+        
+        with open(report_file, 'w', encoding='utf-8') as report:
+            report.write(f"# {'Очистка' if delete else 'Проверка'} висячих связей, {datetime.now():%d.%m.%Y %H:%M:%S}\n")
+            
+            for table, (type_a, _, type_b, _) in LINK_TABLES.items():
+                after_key = None
+                table_scanned = 0
+                while not cancelled:
+                    chunk = self._process_orphan_chunk(table, after_key, delete)
+                    
+                    for id_a, id_b, missing_a, missing_b in chunk['orphans']:
+                        missing = ', '.join(ENTITY_TITLES[entity_type] for entity_type, is_missing
+                                            in ((type_a, missing_a), (type_b, missing_b)) if is_missing)
+                        message = (f"Висячая связь: {ENTITY_TITLES[type_a]} {id_a} - "
+                                   f"{ENTITY_TITLES[type_b]} {id_b} (нет: {missing})")
+                        report.write(f"{table}\t{'удалена' if delete else 'найдена'}\t{message}\n")
+                        if len(issues) < MAX_RETURNED_ISSUES:
+                            issues.append(message)
+                    report.flush()
+                    
+                    by_table[table] += len(chunk['orphans'])
+                    table_scanned += chunk['scanned']
+                    scanned += chunk['scanned']
+                    after_key = chunk['last_key']
+                    
+                    if progress_callback is not None:
+                        total = max(estimates.get(table, 0), table_scanned)
+                        if progress_callback(table, table_scanned, total, by_table[table]) is False:
+                            cancelled = True
+                    
+                    if chunk['scanned'] < APP_CONFIG.maintenance_batch_size:
+                        break
+                
+                if cancelled:
+                    break
+            
+            total_issues = sum(by_table.values())
+            report.write(f"# Просмотрено связей: {scanned}, проблем: {total_issues}"
+                         f"{', прервано пользователем' if cancelled else ''}\n")
+        
+        return {
+            'issues': issues,
+            'total_issues': total_issues,
+            'by_table': by_table,
+            'scanned': scanned,
+            'cancelled': cancelled,
+            'report_file': report_file
+        }
+    
+    def _process_orphan_chunk(self, table: str, after_key: Tuple[int, int], delete: bool) -> Dict[str, Any]:
+        """Один фрагмент обслуживания с повтором при конфликте блокировок"""
+        for attempt in range(1, MAINTENANCE_CHUNK_RETRIES + 1):
+            try:
+                return self.rel_repo.process_orphaned_links_chunk(
+                    table, after_key, APP_CONFIG.maintenance_batch_size, delete,
+                    APP_CONFIG.maintenance_lock_timeout_ms
+                )
+            except Exception as e:
+                if attempt == MAINTENANCE_CHUNK_RETRIES:
+                    raise DatabaseError(f"Не удалось обработать фрагмент {table}: {e}")
+                logger.warning(f"Retrying {table} chunk after {after_key} ({attempt}): {e}")
+                time.sleep(attempt)
     def unlink_document_from_person(self, user_id: int, document_id: int, person_id: int) -> Dict[str, Any]:
         """Отвязывание документа от персоны"""
         if not document_id or not person_id:
@@ -164,8 +394,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.unlink_document_from_person(document_id, person_id, user_id)
         
         if success:
-            self._log_action(user_id, 'DOCUMENT_PERSON_UNLINKED', 'DOCUMENT', document_id,
-                            f'Документ отвязан от персоны {person_id}')
+            relationship_graph.remove_link('DOCUMENT', document_id, 'PERSON', person_id)
             return {'success': True, 'message': 'Связь успешно удалена'}
         else:
             return {'success': False, 'message': 'Связь не найдена'}
@@ -178,8 +407,7 @@ class RelationshipService(BaseService):
         success = self.rel_repo.unlink_document_from_event(document_id, event_id, user_id)
         
         if success:
-            self._log_action(user_id, 'DOCUMENT_EVENT_UNLINKED', 'DOCUMENT', document_id,
-                            f'Документ отвязан от события {event_id}')
+            relationship_graph.remove_link('DOCUMENT', document_id, 'EVENT', event_id)
             return {'success': True, 'message': 'Связь успешно удалена'}
         else:
             return {'success': False, 'message': 'Связь не найдена'}
@@ -192,91 +420,21 @@ class RelationshipService(BaseService):
         success = self.rel_repo.unlink_event_from_source(event_id, source_id, user_id)
         
         if success:
-            self._log_action(user_id, 'EVENT_SOURCE_UNLINKED', 'EVENT', event_id,
-                            f'Событие отвязано от источника {source_id}')
+            relationship_graph.remove_link('EVENT', event_id, 'SOURCE', source_id)
             return {'success': True, 'message': 'Связь успешно удалена'}
         else:
             return {'success': False, 'message': 'Связь не найдена'}
     
-    def validate_relationships(self, user_id: int) -> Dict[str, Any]:
-        """Проверка целостности связей"""
+    def validate_relationships(self, user_id: int, report_file: str = None,
+                               progress_callback: Callable[[str, int, int, int], bool] = None) -> Dict[str, Any]:
+        """Проверка целостности связей фрагментами с записью найденного в отчет"""
         try:
-            issues = []
-            
-            # Проверяем висячие связи в events_persons
-            with self.rel_repo.db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT ep.person_id, ep.event_id 
-                    FROM public.events_persons ep
-                    LEFT JOIN public.persons p ON ep.person_id = p.person_id
-                    LEFT JOIN public.events e ON ep.event_id = e.event_id
-                    WHERE p.person_id IS NULL OR e.event_id IS NULL
-                """)
-                orphaned_events_persons = cursor.fetchall()
-                
-                for person_id, event_id in orphaned_events_persons:
-                    issues.append(f"Висячая связь: персона {person_id} - событие {event_id}")
-                
-                # Аналогично для других типов связей
-                cursor.execute("""
-                    SELECT ce.country_id, ce.event_id 
-                    FROM public.countries_events ce
-                    LEFT JOIN public.countries c ON ce.country_id = c.country_id
-                    LEFT JOIN public.events e ON ce.event_id = e.event_id
-                    WHERE c.country_id IS NULL OR e.event_id IS NULL
-                """)
-                orphaned_countries_events = cursor.fetchall()
-                
-                for country_id, event_id in orphaned_countries_events:
-                    issues.append(f"Висячая связь: страна {country_id} - событие {event_id}")
-                
-                # Проверяем documents_persons
-                cursor.execute("""
-                    SELECT dp.document_id, dp.person_id 
-                    FROM public.documents_persons dp
-                    LEFT JOIN public.documents d ON dp.document_id = d.document_id
-                    LEFT JOIN public.persons p ON dp.person_id = p.person_id
-                    WHERE d.document_id IS NULL OR p.person_id IS NULL
-                """)
-                orphaned_documents_persons = cursor.fetchall()
-                
-                for document_id, person_id in orphaned_documents_persons:
-                    issues.append(f"Висячая связь: документ {document_id} - персона {person_id}")
-                
-                # Проверяем documents_events
-                cursor.execute("""
-                    SELECT de.document_id, de.event_id 
-                    FROM public.documents_events de
-                    LEFT JOIN public.documents d ON de.document_id = d.document_id
-                    LEFT JOIN public.events e ON de.event_id = e.event_id
-                    WHERE d.document_id IS NULL OR e.event_id IS NULL
-                """)
-                orphaned_documents_events = cursor.fetchall()
-                
-                for document_id, event_id in orphaned_documents_events:
-                    issues.append(f"Висячая связь: документ {document_id} - событие {event_id}")
-                
-                # Проверяем events_sources
-                cursor.execute("""
-                    SELECT es.event_id, es.source_id 
-                    FROM public.events_sources es
-                    LEFT JOIN public.events e ON es.event_id = e.event_id
-                    LEFT JOIN public.sources s ON es.source_id = s.source_id
-                    WHERE e.event_id IS NULL OR s.source_id IS NULL
-                """)
-                orphaned_events_sources = cursor.fetchall()
-                
-                for event_id, source_id in orphaned_events_sources:
-                    issues.append(f"Висячая связь: событие {event_id} - источник {source_id}")
+            scan = self._scan_orphaned_links(False, report_file, progress_callback)
             
             self._log_action(user_id, 'RELATIONSHIPS_VALIDATED', 
-                            description=f'Проверка связей: найдено проблем {len(issues)}')
+                            description=f"Проверка связей: найдено проблем {scan['total_issues']}")
             
-            return {
-                'success': True,
-                'issues': issues,
-                'total_issues': len(issues)
-            }
+            return {'success': True, **scan}
             
         except Exception as e:
             return {
@@ -285,55 +443,48 @@ class RelationshipService(BaseService):
                 'issues': []
             }
     
-    def export_relationships(self, user_id: int, filename: str) -> Dict[str, Any]:
-        """Экспорт связей в файл"""
+    def export_relationships(self, user_id: int, filename: str, fmt: str = None, compress: bool = None,
+                             tables: List[str] = None,
+                             progress_callback: Callable[[str, int], bool] = None) -> Dict[str, Any]:
+        """Потоковый экспорт связей в JSON Lines, CSV или бинарный список ребер"""
+        if tables and any(table not in LINK_TABLES for table in tables):
+            raise ValidationError("Некорректная таблица связей")
+        
         try:
-            export_data = {
-                'export_date': str(datetime.now()),
-                'exported_by': user_id,
-                'relationships': {}
-            }
+            by_table = {}
+            cancelled = False
             
-            with self.rel_repo.db.get_cursor() as cursor:
-                # Экспортируем все типы связей
-                cursor.execute("SELECT person_id, event_id FROM public.events_persons")
-                export_data['relationships']['events_persons'] = [
-                    {'person_id': row[0], 'event_id': row[1]} for row in cursor.fetchall()
-                ]
-                
-                cursor.execute("SELECT country_id, event_id FROM public.countries_events")
-                export_data['relationships']['countries_events'] = [
-                    {'country_id': row[0], 'event_id': row[1]} for row in cursor.fetchall()
-                ]
-                
-                cursor.execute("SELECT document_id, person_id FROM public.documents_persons")
-                export_data['relationships']['documents_persons'] = [
-                    {'document_id': row[0], 'person_id': row[1]} for row in cursor.fetchall()
-                ]
-                
-                cursor.execute("SELECT document_id, event_id FROM public.documents_events")
-                export_data['relationships']['documents_events'] = [
-                    {'document_id': row[0], 'event_id': row[1]} for row in cursor.fetchall()
-                ]
+            with EdgeListWriter(filename, fmt, compress) as writer:
+                for table, (_, column_a, _, column_b) in LINK_TABLES.items():
+                    if tables and table not in tables:
+                        continue
+                    
+                    writer.begin_table(table, column_a, column_b)
+                    by_table[table] = 0
+                    for batch in self.rel_repo.iter_link_batches(table, EXPORT_BATCH_SIZE):
+                        writer.write_batch(batch)
+                        by_table[table] += len(batch)
+                        if progress_callback is not None and progress_callback(table, by_table[table]) is False:
+                            cancelled = True
+                            break
+                    writer.end_table()
+                    
+                    if cancelled:
+                        break
                 
-                cursor.execute("SELECT event_id, source_id FROM public.events_sources")
-                export_data['relationships']['events_sources'] = [
-                    {'event_id': row[0], 'source_id': row[1]} for row in cursor.fetchall()
-                ]
+                export_format = writer.format
             
-            # Записываем в файл
-            import json
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
-            
-            total_exported = sum(len(rels) for rels in export_data['relationships'].values())
+            total_exported = sum(by_table.values())
             
             self._log_action(user_id, 'RELATIONSHIPS_EXPORTED', 
-                            description=f'Экспорт {total_exported} связей в файл {filename}')
+                            description=f'Экспорт {total_exported} связей в файл {filename} ({export_format})')
             
             return {
                 'success': True,
                 'exported_count': total_exported,
+                'by_table': by_table,
+                'format': export_format,
+                'cancelled': cancelled,
                 'filename': filename
             }
             
@@ -342,4 +493,72 @@ class RelationshipService(BaseService):
                 'success': False,
                 'message': f'Ошибка экспорта: {str(e)}',
                 'exported_count': 0
-            }
\ No newline at end of file
+            }
+    
+    def import_relationships(self, admin_id: int, filename: str, fmt: str = None, compress: bool = None,
+                             progress_callback: Callable[[str, int], None] = None,
+                             cancel_scope: QueryCancelScope = None) -> Dict[str, Any]:
+        """Массовый импорт связей из файла экспорта (JSON Lines, CSV, бинарный) (для админов)
+        
+        cancel_scope.cancel() из другого потока прерывает выполняющийся запрос и откатывает всю загрузку.
+        """
+        self._validate_user_permissions(admin_id, 3)
+        
+        scope = cancel_scope or QueryCancelScope()
+        
+        def on_progress(stage: str, count: int) -> None:
+            # Между пакетами и слияниями таблиц отмена проверяется без обращения к серверу
+            if scope.cancelled:
+                raise QueryCancelledError("Импорт связей отменен")
+            if progress_callback is not None:
+                progress_callback(stage, count)
+        
+        try:
+            with DatabaseConnection().cancel_scope(scope):
+                stats = self.rel_repo.bulk_import_links(self._import_batches(filename, fmt, compress), on_progress)
+        except (ValueError, DatabaseError) as e:
+            if scope.cancelled:
+                return {
+                    'success': False,
+                    'cancelled': True,
+                    'message': 'Импорт отменен, изменения не сохранены',
+                    'inserted_count': 0
+                }
+            return {
+                'success': False,
+                'message': f'Ошибка импорта: {str(e)}',
+                'inserted_count': 0
+            }
+        
+        totals = {key: sum(table_stats[key] for table_stats in stats.values())
+                  for key in ('rows', 'duplicates', 'missing', 'inserted', 'already_linked')}
+        if totals['inserted']:
+            relationship_graph.invalidate()
+        
+        self._log_action(admin_id, 'RELATIONSHIPS_IMPORTED',
+                        description=f"Импорт связей из {os.path.basename(filename)}: строк {totals['rows']}, "
+                                    f"добавлено {totals['inserted']}, уже были {totals['already_linked']}, "
+                                    f"с несуществующими сущностями {totals['missing']}, повторов {totals['duplicates']}")
+        
+        return {
+            'success': True,
+            'message': f"Добавлено связей: {totals['inserted']}",
+            'inserted_count': totals['inserted'],
+            'totals': totals,
+            'by_table': stats
+        }
+    
+    def _import_batches(self, filename: str, fmt: str = None,
+                        compress: bool = None) -> Iterator[Tuple[str, List[Tuple[int, int]]]]:
+        """Пакеты файла импорта, приведенные к порядку колонок таблиц связей"""
+        for table, column_a, column_b, pairs in read_edge_batches(filename, fmt, compress, IMPORT_BATCH_SIZE):
+            if table not in LINK_TABLES:
+                raise ValueError(f"Неизвестная таблица связей: {table}")
+            
+            _, expected_a, _, expected_b = LINK_TABLES[table]
+            if (column_a, column_b) == (expected_b, expected_a):
+                pairs = [(id_b, id_a) for id_a, id_b in pairs]
+            elif (column_a, column_b) != (expected_a, expected_b):
+                raise ValueError(f"Колонки {column_a}, {column_b} не соответствуют таблице {table}")
+            
+            yield table, pairs
@@ -1,11 +1,126 @@
-from typing import Dict, Any, List
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Callable
 from .base_service import BaseService
-from data_access import PersonRepository, CountryRepository, EventRepository, DocumentRepository, SourceRepository
-from core.exceptions import ValidationError
+from data_access import (PersonRepository, CountryRepository, EventRepository, DocumentRepository,
+                         SourceRepository, SearchRepository)
+from core.exceptions import ValidationError, DatabaseError, QueryCancelledError
+from core.background import background_executor
+from core.database import DatabaseConnection, QueryCancelScope
+from core.metrics import metrics
+from utils.suggestion_index import SuggestionIndex, suggestion_index
+from utils.search_cache import search_cache, search_cache_key, query_statistics
+from utils.local_search_index import local_search_index
+from data_access.search_repository import DELETED_RETENTION
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TYPES = ['persons', 'countries', 'events', 'documents', 'sources']
+
+# Тип сущности в едином индексе и поля элемента результата (ключ, текстовое поле) для каждого типа поиска
+INDEX_ENTITY_TYPES = {
+    'persons': 'PERSON',
+    'countries': 'COUNTRY',
+    'events': 'EVENT',
+    'documents': 'DOCUMENT',
+    'sources': 'SOURCE'
+}
+INDEX_ITEM_FIELDS = {
+    'persons': ('person_id', 'biography'),
+    'countries': ('country_id', 'description'),
+    'events': ('event_id', 'description'),
+    'documents': ('document_id', 'content'),
+    'sources': ('source_id', 'author')
+}
+
+# Типы, которые локальный индекс ищет сам; по содержимому документов ищет только сервер
+LOCAL_SEARCH_TYPES = ('persons', 'countries', 'events', 'sources')
+LOCAL_SYNC_BATCH = 5000
+
+# Запись журнала аудита о глобальном поиске (источник начальной статистики запросов)
+GLOBAL_SEARCH_DESCRIPTION_RE = re.compile(r'^Глобальный поиск: "(.*)" \(найдено: (\d+)\)$')
+POPULARITY_HISTORY_DAYS = 30
+POPULARITY_HISTORY_LIMIT = 10000
+
+# Прогрев кэша: число частых запросов и лимит на тип (как у страницы поиска)
+PREWARM_QUERIES = 10
+PREWARM_LIMIT_PER_TYPE = 20
+
+search_duration = metrics.histogram('search_type_duration_seconds', 'Длительность поиска по типу сущности', ('type',))
+search_timeouts = metrics.counter('search_timeouts_total', 'Поиски по типу, не уложившиеся в таймаут', ('type',))
+
+# Пул только для интерактивного поиска по типам (каждый поток берет свое соединение из пула БД);
+# прогрев, подсказки и аудит идут в background_executor и не задерживают запросы с таймаутом
+_search_executor = ThreadPoolExecutor(max_workers=APP_CONFIG.search_workers, thread_name_prefix='search')
+
+class IncrementalSearch:
+    """Выполняющийся поиск (единым индексом или по типам): результаты приходят по мере готовности, поиск можно отменить"""
+    
+    def __init__(self, search_text: str, search_types: List[str], type_timeouts: Dict[str, int] = None):
+        self.search_text = search_text
+        self.search_types = search_types
+        self.results: Dict[str, Dict[str, Any]] = {}
+        # Свой набор соединений у каждого типа: тип, превысивший таймаут, прерывается отдельно
+        self.scopes = {search_type: QueryCancelScope() for search_type in search_types}
+        started = time.monotonic()
+        timeouts = type_timeouts or {}
+        self.deadlines = {search_type: started + timeouts.get(search_type, APP_CONFIG.search_timeout_ms) / 1000
+                          for search_type in search_types}
+        # Запрос к единому индексу сразу по всем типам (общий рейтинг и фасеты)
+        self.index_scope = QueryCancelScope()
+        self.index_deadline = started + APP_CONFIG.search_timeout_ms / 1000
+        self.ranked: List[Dict[str, Any]] = []
+        self.facets: Dict[str, List[Dict[str, Any]]] = {}
+        self.cancelled = False
+        self.futures = []
+        self._lock = threading.Lock()
+    
+    def cancel(self) -> None:
+        """Отмена: ожидающие типы не запускаются, выполняющиеся запросы прерываются в PostgreSQL"""
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
+        for scope in self.scopes.values():
+            scope.cancel()
+        self.index_scope.cancel()
+    
+    def complete(self, search_type: str, result: Dict[str, Any]) -> bool:
+        """Сохранение результата типа; True, если он последний"""
+        with self._lock:
+            self.results[search_type] = result
+            return len(self.results) == len(self.search_types)
+    
+    def summary(self) -> Dict[str, Any]:
+        """Итог в формате global_search"""
+        with self._lock:
+            results = dict(self.results)
+        timed_out = [search_type for search_type, result in results.items() if result.get('timed_out')]
+        failed = [search_type for search_type, result in results.items() if result.get('failed')]
+        return {
+            'search_text': self.search_text,
+            'total_found': sum(result['count'] for result in results.values()),
+            'results': results,
+            'ranked': self.ranked,
+            'facets': self.facets,
+            'timed_out': timed_out,
+            'failed': failed,
+            'partial': bool(timed_out or failed)
+        }
 
 class SearchService(BaseService):
     """Сервис для глобального поиска по всем сущностям"""
     
+    # Поток фоновой синхронизации локального индекса (один на процесс)
+    _local_sync_thread = None
+    # Фоновое построение индекса подсказок (одно на процесс)
+    _suggestion_build = None
+    _suggestion_build_lock = threading.Lock()
+    
     def __init__(self):
         super().__init__()
         self.person_repo = PersonRepository()
@@ -13,10 +128,11 @@ class SearchService(BaseService):
         self.event_repo = EventRepository()
         self.document_repo = DocumentRepository()
         self.source_repo = SourceRepository()
+        self.search_repo = SearchRepository()
     
     def global_search(self, user_id: int, search_text: str, search_types: List[str] = None,
-                     limit_per_type: int = 5) -> Dict[str, Any]:
-        """Глобальный поиск по всем типам сущностей"""
+                     limit_per_type: int = 5, type_timeouts: Dict[str, int] = None) -> Dict[str, Any]:
+        """Глобальный поиск по всем типам сущностей: единым индексом или параллельно по типам с таймаутом в мс"""
         if not search_text or len(search_text.strip()) < 2:
             raise ValidationError("Поисковый запрос должен содержать минимум 2 символа")
         
@@ -24,92 +140,533 @@ class SearchService(BaseService):
         
         # Определяем типы для поиска
         if not search_types:
-            search_types = ['persons', 'countries', 'events', 'documents', 'sources']
+            search_types = SEARCH_TYPES
         
         limit_per_type = min(20, max(1, limit_per_type))
         
+        # Одинаковые запросы отдаются из кэша до истечения TTL или изменения сущностей
+        cache_key = search_cache_key('global', search_text, search_types, limit_per_type)
+        response = search_cache.get(cache_key)
+        if response is None:
+            response = self._run_global_search(search_text, search_types, limit_per_type, type_timeouts)
+            if not response['partial']:
+                search_cache.set(cache_key, response)
+        
+        self._record_search(user_id, search_text, response['total_found'])
+        
+        return dict(response, search_text=search_text)
+    
+    def commit_search(self, user_id: int, search_text: str, total_found: int) -> None:
+        """Учет выбранного пользователем запроса в статистике и журнале аудита (запись в фоне)
+        
+        Инкрементальный поиск при вводе сам запросы не учитывает: учитываются только запросы,
+        подтвержденные Enter, кнопкой или паузой на результатах.
+        """
+        background_executor.submit(self._record_search, user_id, search_text.strip(), total_found)
+    
+    def _record_search(self, user_id: int, search_text: str, total_found: int) -> None:
+        query_statistics.record(search_text, total_found)
+        self._log_action(user_id, 'GLOBAL_SEARCH',
+                         description=f'Глобальный поиск: "{search_text}" (найдено: {total_found})')
+    
+    def _run_global_search(self, search_text: str, search_types: List[str], limit_per_type: int,
+                           type_timeouts: Dict[str, int] = None) -> Dict[str, Any]:
+        """Выполнение глобального поиска без кэша"""
+        results = None
+        ranked = []
+        timed_out = []
+        failed = []
+        
+        # С локальным индексом названия ищутся без сервера, поэтому используется поиск по типам
+        if not self._local_search_ready() and self.search_repo.index_available():
+            try:
+                results, ranked = self._search_index(search_text, search_types, limit_per_type)
+            except DatabaseError as e:
+                logger.warning(f"Unified search index query failed, falling back to per-type search: {e}")
+            
+            # Без точных совпадений поиск по типам переходит к нечеткому поиску по названиям
+            if results is not None and not ranked:
+                results = None
+        
+        if results is None:
+            results, timed_out, failed = self._search_by_type(search_text, search_types, limit_per_type, type_timeouts)
+        
+        return {
+            'search_text': search_text,
+            'total_found': sum(result['count'] for result in results.values()),
+            'results': results,
+            'ranked': ranked,
+            'timed_out': timed_out,
+            'failed': failed,
+            'partial': bool(timed_out or failed)
+        }
+    
+    def _search_index(self, search_text: str, search_types: List[str], limit_per_type: int):
+        """Поиск одним ранжированным запросом по единому индексу; возвращает результаты по типам и общий рейтинг"""
+        types_by_entity = {INDEX_ENTITY_TYPES[search_type]: search_type
+                           for search_type in SEARCH_TYPES if search_type in search_types}
+        
+        with search_duration.time(type='all'):
+            found = self.search_repo.search(search_text, list(types_by_entity), limit_per_type)
+        
+        results = {search_type: {'items': [], 'count': 0, 'total_available': found['facets'].get(entity_type, 0)}
+                   for entity_type, search_type in types_by_entity.items()}
+        ranked = []
+        
+        for row in found['items']:
+            search_type = types_by_entity[row['entity_type']]
+            item = self._index_item(search_type, row)
+            results[search_type]['items'].append(item)
+            results[search_type]['count'] += 1
+            ranked.append({'type': search_type, **item})
+        
+        return results, ranked
+    
+    @staticmethod
+    def _index_item(search_type: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Элемент результата из строки единого (или локального) индекса"""
+        id_field, text_field = INDEX_ITEM_FIELDS[search_type]
+        return {
+            id_field: row['entity_id'],
+            'name': row['title'],
+            'full_name': row['title'],
+            'subtitle': row['subtitle'],
+            text_field: row['subtitle'] if search_type == 'sources' else row['body'],
+            'rank': row['rank'],
+            'total_count': row['type_total']
+        }
+    
+    def get_search_facets(self, user_id: int, search_text: str, search_types: List[str] = None) -> Dict[str, Any]:
+        """Счетчики найденного по типам сущностей, типам событий, векам, странам и типам источников"""
+        if not search_text or len(search_text.strip()) < 2:
+            raise ValidationError("Поисковый запрос должен содержать минимум 2 символа")
+        if not self.search_repo.index_available():
+            return {}
+        
+        search_text = search_text.strip()
+        search_types = [search_type for search_type in SEARCH_TYPES if search_type in (search_types or SEARCH_TYPES)]
+        return self._search_facets_cached(search_text, search_types)
+    
+    def _search_facets_cached(self, search_text: str, search_types: List[str],
+                              scope: QueryCancelScope = None) -> Dict[str, Any]:
+        """Фасеты найденного по единому индексу через кэш результатов"""
+        cache_key = search_cache_key('facets', search_text, search_types, 0)
+        facets = search_cache.get(cache_key)
+        if facets is None:
+            types_by_entity = {INDEX_ENTITY_TYPES[search_type]: search_type for search_type in search_types}
+            facets = self._format_facets(self.search_repo.get_facets(search_text, list(types_by_entity)))
+            for value in facets['entity_type']:
+                value['value'] = value['label'] = types_by_entity[value['value']]
+            if scope is not None and scope.cancelled:
+                raise QueryCancelledError("Поиск отменен")
+            search_cache.set(cache_key, facets)
+        
+        return facets
+    
+    def _search_index_cached(self, search_text: str, search_types: List[str], limit_per_type: int,
+                             scope: QueryCancelScope = None):
+        """Поиск по единому индексу через кэш результатов"""
+        cache_key = search_cache_key('index', search_text, search_types, limit_per_type)
+        found = search_cache.get(cache_key)
+        if found is None:
+            found = self._search_index(search_text, search_types, limit_per_type)
+            if scope is not None and scope.cancelled:
+                raise QueryCancelledError("Поиск отменен")
+            search_cache.set(cache_key, found)
+        return found
+    
+    def _search_by_type(self, search_text: str, search_types: List[str], limit_per_type: int,
+                        type_timeouts: Dict[str, int] = None):
+        """Параллельный поиск функциями каждого типа; возвращает результаты, типы с таймаутом и с ошибкой"""
+        deadline_base = time.monotonic()
+        timeouts = type_timeouts or {}
+        
+        # Запросы по типам идут параллельно, общее время ограничено самым медленным типом;
+        # у каждого типа своя область отмены, чтобы по таймауту прервать его запрос в PostgreSQL
+        scopes = {search_type: QueryCancelScope() for search_type in SEARCH_TYPES if search_type in search_types}
+        futures = {
+            search_type: _search_executor.submit(self._search_type_in_scope, scope, search_type, search_text,
+                                                 limit_per_type)
+            for search_type, scope in scopes.items()
+        }
+        
         results = {}
-        total_found = 0
-        
-        # Поиск персон
-        if 'persons' in search_types:
-            persons = self.person_repo.search_fulltext(search_text, 0, limit_per_type)
-            results['persons'] = {
-                'items': persons,
-                'count': len(persons),
-                'total_available': persons[0]['total_count'] if persons else 0
-            }
-            total_found += len(persons)
-        
-        # Поиск стран
-        if 'countries' in search_types:
-            countries = self.country_repo.search_fulltext(search_text, 0, limit_per_type)
-            results['countries'] = {
-                'items': countries,
-                'count': len(countries),
-                'total_available': countries[0]['total_count'] if countries else 0
-            }
-            total_found += len(countries)
-        
-        # Поиск событий
-        if 'events' in search_types:
-            events = self.event_repo.search_fulltext(search_text, 0, limit_per_type)
-            results['events'] = {
-                'items': events,
-                'count': len(events),
-                'total_available': events[0]['total_count'] if events else 0
-            }
-            total_found += len(events)
-        
-        # Поиск документов
-        if 'documents' in search_types:
-            documents = self.document_repo.search_fulltext(search_text, True, 0, limit_per_type)
-            results['documents'] = {
-                'items': documents,
-                'count': len(documents),
-                'total_available': documents[0]['total_count'] if documents else 0
+        timed_out = []
+        failed = []
+        
+        for search_type, future in futures.items():
+            timeout_ms = timeouts.get(search_type, APP_CONFIG.search_timeout_ms)
+            remaining = deadline_base + timeout_ms / 1000 - time.monotonic()
+            try:
+                items = future.result(timeout=max(0, remaining))
+            except FutureTimeoutError:
+                future.cancel()
+                scopes[search_type].cancel()
+                timed_out.append(search_type)
+                search_timeouts.inc(type=search_type)
+                logger.warning(f"Global search for {search_type} exceeded {timeout_ms} ms, returning partial results")
+                items = None
+            except Exception as e:
+                failed.append(search_type)
+                logger.error(f"Global search for {search_type} failed: {e}")
+                items = None
+            
+            if items is None:
+                results[search_type] = {'items': [], 'count': 0, 'total_available': 0,
+                                        'timed_out': search_type in timed_out}
+                continue
+            
+            results[search_type] = {
+                'items': items,
+                'count': len(items),
+                'total_available': items[0]['total_count'] if items else 0
             }
-            total_found += len(documents)
-        
-        # Поиск источников
-        if 'sources' in search_types:
-            sources = self.source_repo.search_fulltext(search_text, 0, limit_per_type)
-            results['sources'] = {
-                'items': sources,
-                'count': len(sources),
-                'total_available': sources[0]['total_count'] if sources else 0
+        
+        return results, timed_out, failed
+    
+    def _search_type_in_scope(self, scope: QueryCancelScope, search_type: str, search_text: str,
+                              limit: int) -> List[Dict[str, Any]]:
+        """Поиск по одному типу, запросы которого прерываются вызовом scope.cancel()"""
+        with DatabaseConnection().cancel_scope(scope):
+            items = self._search_type_cached(search_type, search_text, limit, scope)
+        if scope.cancelled:
+            raise QueryCancelledError("Поиск отменен")
+        return items
+    
+    def start_incremental_search(self, user_id: int, search_text: str, search_types: List[str] = None,
+                                 limit_per_type: int = 20,
+                                 on_result: Callable[[str, Dict[str, Any]], None] = None,
+                                 on_finished: Callable[[Dict[str, Any]], None] = None,
+                                 type_timeouts: Dict[str, int] = None) -> IncrementalSearch:
+        """Фоновый поиск единым индексом или по типам с таймаутом в мс на тип; обратные вызовы выполняются в потоках пула"""
+        if not search_text or len(search_text.strip()) < 2:
+            raise ValidationError("Поисковый запрос должен содержать минимум 2 символа")
+        
+        search_types = [search_type for search_type in SEARCH_TYPES if search_type in (search_types or SEARCH_TYPES)]
+        search = IncrementalSearch(search_text.strip(), search_types, type_timeouts)
+        limit_per_type = min(20, max(1, limit_per_type))
+        
+        # Выбор между индексом и поиском по типам требует обращения к БД, поэтому тоже выполняется в пуле
+        search.futures.append(_search_executor.submit(
+            self._run_incremental_index, search, limit_per_type, on_result, on_finished
+        ))
+        
+        return search
+    
+    def _submit_type_searches(self, search: IncrementalSearch, limit: int,
+                              on_result: Callable[[str, Dict[str, Any]], None],
+                              on_finished: Callable[[Dict[str, Any]], None]) -> None:
+        """Параллельный поиск по типам (без единого индекса или после его ошибки)"""
+        for search_type in search.search_types:
+            if search.cancelled:
+                return
+            search.futures.append(_search_executor.submit(
+                self._run_incremental_type, search, search_type, limit, on_result, on_finished
+            ))
+    
+    def _run_incremental_index(self, search: IncrementalSearch, limit: int,
+                               on_result: Callable[[str, Dict[str, Any]], None],
+                               on_finished: Callable[[Dict[str, Any]], None]) -> None:
+        """Инкрементальный поиск одним ранжированным запросом к единому индексу с фасетами"""
+        if search.cancelled:
+            return
+        
+        # С локальным индексом названия ищутся без сервера, поэтому используется поиск по типам
+        if self._local_search_ready() or not self.search_repo.index_available():
+            self._submit_type_searches(search, limit, on_result, on_finished)
+            return
+        
+        scope = search.index_scope
+        timer = threading.Timer(max(0, search.index_deadline - time.monotonic()), scope.cancel)
+        timer.daemon = True
+        timer.start()
+        try:
+            try:
+                with DatabaseConnection().cancel_scope(scope):
+                    results, ranked = self._search_index_cached(search.search_text, search.search_types, limit, scope)
+            except Exception as e:
+                if search.cancelled:
+                    return
+                if not scope.cancelled:
+                    logger.warning(f"Unified search index query failed, falling back to per-type search: {e}")
+                    self._submit_type_searches(search, limit, on_result, on_finished)
+                    return
+                search_timeouts.inc(type='all')
+                logger.warning("Unified index search exceeded its timeout, returning partial results")
+                results = {search_type: {'items': [], 'count': 0, 'total_available': 0, 'timed_out': True}
+                           for search_type in search.search_types}
+                ranked = []
+            
+            # Фасеты необязательны: без них результаты все равно показываются
+            facets = {}
+            if ranked:
+                try:
+                    with DatabaseConnection().cancel_scope(scope):
+                        facets = self._search_facets_cached(search.search_text, search.search_types, scope)
+                except Exception as e:
+                    if search.cancelled:
+                        return
+                    logger.warning(f"Search facets for \"{search.search_text}\" are unavailable: {e}")
+        finally:
+            timer.cancel()
+        
+        # Результаты замененного поиска не доставляются
+        if search.cancelled:
+            return
+        
+        search.ranked = ranked
+        search.facets = facets
+        for search_type in search.search_types:
+            search.complete(search_type, results[search_type])
+            if on_result:
+                on_result(search_type, results[search_type])
+        if on_finished:
+            on_finished(search.summary())
+    
+    def _run_incremental_type(self, search: IncrementalSearch, search_type: str, limit: int,
+                              on_result: Callable[[str, Dict[str, Any]], None],
+                              on_finished: Callable[[Dict[str, Any]], None]) -> None:
+        """Поиск одного типа в рамках инкрементального поиска"""
+        if search.cancelled:
+            return
+        
+        # Таймаут отсчитывается от запуска поиска, как в global_search; по его истечении запрос типа прерывается
+        scope = search.scopes[search_type]
+        timer = threading.Timer(max(0, search.deadlines[search_type] - time.monotonic()), scope.cancel)
+        timer.daemon = True
+        timer.start()
+        try:
+            items = self._search_type_in_scope(scope, search_type, search.search_text, limit)
+            result = {
+                'items': items,
+                'count': len(items),
+                'total_available': items[0]['total_count'] if items else 0
             }
-            total_found += len(sources)
+        except Exception as e:
+            if search.cancelled:
+                return
+            if scope.cancelled:
+                search_timeouts.inc(type=search_type)
+                logger.warning(f"Incremental search for {search_type} exceeded its timeout, returning partial results")
+                result = {'items': [], 'count': 0, 'total_available': 0, 'timed_out': True}
+            else:
+                logger.error(f"Incremental search for {search_type} failed: {e}")
+                result = {'items': [], 'count': 0, 'total_available': 0, 'failed': True}
+        finally:
+            timer.cancel()
+        
+        # Результаты замененного поиска не доставляются
+        if search.cancelled:
+            return
+        
+        finished = search.complete(search_type, result)
+        if on_result:
+            on_result(search_type, result)
+        
+        if finished and on_finished:
+            on_finished(search.summary())
+    
+    def _search_type_cached(self, search_type: str, search_text: str, limit: int,
+                            scope: QueryCancelScope = None) -> List[Dict[str, Any]]:
+        """Поиск по одному типу через кэш результатов"""
+        cache_key = search_cache_key('type', search_text, [search_type], limit)
+        items = search_cache.get(cache_key)
+        if items is None:
+            items = self._search_type(search_type, search_text, limit)
+            # Результат прерванного поиска может быть пустым или неполным и в кэш не попадает
+            if scope is not None and scope.cancelled:
+                raise QueryCancelledError("Поиск отменен")
+            search_cache.set(cache_key, items)
+        return items
+    
+    def _search_type(self, search_type: str, search_text: str, limit: int) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск по одному типу сущностей"""
+        if search_type in LOCAL_SEARCH_TYPES and self._local_search_ready():
+            items = self._search_local(search_type, search_text, limit)
+            # Без локальных совпадений (новые записи, словоформы) запрос уходит на сервер
+            if items:
+                return items
+        
+        with search_duration.time(type=search_type):
+            if search_type == 'persons':
+                return self.person_repo.search_fulltext(search_text, 0, limit)
+            if search_type == 'countries':
+                return self.country_repo.search_fulltext(search_text, 0, limit)
+            if search_type == 'events':
+                return self.event_repo.search_fulltext(search_text, 0, limit)
+            if search_type == 'documents':
+                return self.document_repo.search_fulltext(search_text, True, 0, limit)
+            return self.source_repo.search_fulltext(search_text, 0, limit)
+    
+    @staticmethod
+    def _local_search_ready() -> bool:
+        return local_search_index is not None and local_search_index.ready
+    
+    def _search_local(self, search_type: str, search_text: str, limit: int) -> List[Dict[str, Any]]:
+        """Поиск по названиям в локальном индексе"""
+        try:
+            with search_duration.time(type=f'local_{search_type}'):
+                rows = local_search_index.search(search_text, INDEX_ENTITY_TYPES[search_type], limit)
+        except Exception as e:
+            logger.error(f"Local search for {search_type} failed: {e}")
+            return []
+        return [self._index_item(search_type, row) for row in rows]
+    
+    def sync_local_index(self) -> Dict[str, Any]:
+        """Синхронизация локального индекса с единым индексом сервера (полная при первом запуске)"""
+        if local_search_index is None:
+            return {'success': False, 'message': 'Локальный поисковый индекс отключен'}
         
-        self._log_action(user_id, 'GLOBAL_SEARCH', description=f'Глобальный поиск: "{search_text}" (найдено: {total_found})')
+        start_time = time.perf_counter()
+        synced_at = local_search_index.synced_at
+        server_time = self.search_repo.get_server_time()
+        
+        # Записи об удалении хранятся ограниченное время: устаревший индекс собирается заново
+        full = synced_at is None or server_time - synced_at > DELETED_RETENTION
+        if full:
+            local_search_index.clear()
+            deleted = []
+        else:
+            deleted = self.search_repo.get_deleted_since(synced_at)
+        
+        applied = local_search_index.apply_changes([], deleted)
+        batch = []
+        for row in self.search_repo.iter_index_changes(None if full else synced_at):
+            batch.append(row)
+            if len(batch) >= LOCAL_SYNC_BATCH:
+                applied += local_search_index.apply_changes(batch)
+                batch = []
+        applied += local_search_index.apply_changes(batch)
+        
+        local_search_index.set_state('synced_at', server_time.isoformat())
+        
+        # Изменения других пользователей делают кэшированные результаты устаревшими
+        if applied and not full:
+            search_cache.clear()
+        
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(f"Local search index {'rebuilt' if full else 'synced'}: {applied} changes in {duration_ms:.0f} ms")
         
         return {
-            'search_text': search_text,
-            'total_found': total_found,
-            'results': results
+            'success': True,
+            'message': f'Локальный поисковый индекс синхронизирован: {applied} изменений',
+            'full': full,
+            'applied': applied
+        }
+    
+    def start_local_index_sync(self) -> None:
+        """Фоновая синхронизация локального индекса: при запуске, по интервалу и после изменений сущностей"""
+        if local_search_index is None or SearchService._local_sync_thread is not None:
+            return
+        
+        SearchService._local_sync_thread = threading.Thread(target=self._local_sync_loop,
+                                                            name='local-search-sync', daemon=True)
+        SearchService._local_sync_thread.start()
+    
+    def _local_sync_loop(self) -> None:
+        while True:
+            local_search_index.changed.clear()
+            try:
+                self.sync_local_index()
+            except Exception as e:
+                logger.error(f"Local search index sync failed: {e}")
+            local_search_index.changed.wait(APP_CONFIG.local_search_sync_seconds)
+    
+    def get_popular_searches(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Самые частые результативные запросы"""
+        return query_statistics.top(min(100, max(1, limit)))
+    
+    def prewarm_popular_searches(self, limit: int = PREWARM_QUERIES) -> None:
+        """Фоновый прогрев кэша результатами самых частых запросов"""
+        background_executor.submit(self._prewarm_popular_searches, limit)
+    
+    def _prewarm_popular_searches(self, limit: int) -> None:
+        if not query_statistics.loaded:
+            self._load_query_statistics()
+        
+        for entry in query_statistics.top(limit):
+            for search_type in SEARCH_TYPES:
+                try:
+                    self._search_type_cached(search_type, entry['query'], PREWARM_LIMIT_PER_TYPE)
+                except Exception as e:
+                    logger.warning(f"Search prewarm for \"{entry['query']}\" ({search_type}) failed: {e}")
+                    return
+    
+    def _load_query_statistics(self) -> None:
+        """Начальная статистика запросов из записей GLOBAL_SEARCH журнала аудита"""
+        try:
+            logs = self.audit_repo.get_audit_logs(
+                start_date=datetime.now() - timedelta(days=POPULARITY_HISTORY_DAYS),
+                action_type='GLOBAL_SEARCH',
+                limit=POPULARITY_HISTORY_LIMIT
+            )
+        except Exception as e:
+            logger.error(f"Failed to load search history: {e}")
+            logs = []
+        
+        entries = []
+        for log in logs:
+            match = GLOBAL_SEARCH_DESCRIPTION_RE.match(log.get('description') or '')
+            if match:
+                entries.append((match.group(1), int(match.group(2))))
+        query_statistics.load(entries)
+    
+    def rebuild_search_index(self, admin_id: int) -> Dict[str, Any]:
+        """Полная перестройка единого поискового индекса (только для администраторов)"""
+        self._validate_user_permissions(admin_id, 3)
+        
+        indexed = self.search_repo.rebuild_index()
+        
+        self._log_action(admin_id, 'SEARCH_INDEX_REBUILT',
+                         description=f'Перестроен поисковый индекс: исправлено {indexed} записей')
+        
+        return {
+            'success': True,
+            'message': f'Поисковый индекс перестроен: исправлено {indexed} записей',
+            'indexed': indexed
         }
     
+    def get_suggestion_index(self, rebuild: bool = False) -> SuggestionIndex:
+        """Индекс подсказок (строится при первом обращении и по истечении TTL)"""
+        if rebuild or suggestion_index.needs_rebuild(APP_CONFIG.suggestion_index_ttl_seconds):
+            suggestion_index.build(self.search_repo.iter_suggestion_entries())
+        return suggestion_index
+    
+    def warm_suggestions(self) -> None:
+        """Фоновое построение индекса подсказок при запуске (поток интерфейса не ждет БД)"""
+        self._schedule_suggestion_build()
+    
+    def _schedule_suggestion_build(self) -> None:
+        with SearchService._suggestion_build_lock:
+            build = SearchService._suggestion_build
+            if build is None or build.done():
+                SearchService._suggestion_build = background_executor.submit(self._build_suggestions)
+    
+    def _build_suggestions(self) -> None:
+        try:
+            self.get_suggestion_index()
+        except Exception as e:
+            logger.error(f"Suggestion index build failed: {e}")
+    
     def get_search_suggestions(self, user_id: int, search_text: str, limit: int = 10) -> List[str]:
-        """Получение подсказок для поиска"""
+        """Подсказки по префиксу слов названий сущностей (без обращения к БД: индекс строится в фоне)"""
         if not search_text or len(search_text.strip()) < 2:
             return []
         
-        search_text = search_text.strip().lower()
         limit = min(20, max(1, limit))
         
-        suggestions = []
-        
-        # Простая реализация подсказок на основе частых поисков
-        # В реальном приложении можно использовать более сложные алгоритмы
-        common_terms = [
-            "Иван Грозный", "Петр Великий", "Екатерина II", "Александр Пушкин",
-            "Отечественная война", "Революция", "Крещение Руси", "Куликовская битва",
-            "Российская империя", "СССР", "Москва", "Санкт-Петербург"
-        ]
+        # Индекс строится и обновляется по TTL в фоне; пока он не построен, подсказки — только из статистики запросов
+        if suggestion_index.needs_rebuild(APP_CONFIG.suggestion_index_ttl_seconds):
+            self._schedule_suggestion_build()
+        if not suggestion_index.built:
+            return [entry['query'] for entry in query_statistics.suggest(search_text, limit)]
         
-        for term in common_terms:
-            if search_text in term.lower() and term not in suggestions:
-                suggestions.append(term)
+        # Сначала частые результативные запросы пользователей, затем названия сущностей;
+        # одинаковые названия разных сущностей показываются один раз
+        suggestions = [entry['query'] for entry in query_statistics.suggest(search_text, limit // 2)]
+        for suggestion in suggestion_index.suggest(search_text, limit * 2):
+            if suggestion['text'] not in suggestions:
+                suggestions.append(suggestion['text'])
                 if len(suggestions) >= limit:
                     break
         
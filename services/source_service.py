@@ -5,6 +5,7 @@ from .base_service import BaseService
 from data_access import SourceRepository, RelationshipsRepository
 from core.exceptions import ValidationError, EntityNotFoundError
 from  utils.date_helpers import safe_date_convert
+from utils.change_feed import entity_changes
 
 class SourceService(BaseService):
     """Сервис для работы с источниками"""
@@ -116,6 +117,7 @@ class SourceService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'SOURCE_CREATED_DIRECT', 'SOURCE', result['source_id'],
                             f'Прямое создание источника: {source_data["name"]}')
+            entity_changes.publish('SOURCE', result['source_id'], 'CREATE', source_data)
         
         return result
     
@@ -173,6 +175,7 @@ class SourceService(BaseService):
         if result['success']:
             self._log_action(moderator_id, 'SOURCE_UPDATED_DIRECT', 'SOURCE', source_id,
                             f'Прямое обновление источника: {existing_source["name"]}')
+            entity_changes.publish('SOURCE', source_id, 'UPDATE', source_data)
         
         return result
     
@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
                              QDateEdit, QSpinBox, QGroupBox, QMessageBox, QCheckBox)
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QFont
+from utils.profiling import profile_action
 from datetime import date
 from services import ModerationService
 from core.exceptions import ValidationError
@@ -12,6 +13,7 @@ class CreateRequestDialog(QDialog):
     
     request_created = pyqtSignal()  # Сигнал о создании заявки
     
+    @profile_action('dialog.CreateRequestDialog.open')
     def __init__(self, user_data, entity_type=None, operation_type=None, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -2,7 +2,9 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 class DocumentDialog(QDialog):
+    @profile_action('dialog.DocumentDialog.open')
     def __init__(self, user_data, document_data=None, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -1,9 +1,11 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 from datetime import date
 from utils.date_helpers import safe_date_convert
 class EventDialog(QDialog):
+    @profile_action('dialog.EventDialog.open')
     def __init__(self, user_data, event_data=None, parent=None):
         super().__init__(parent)
         self.user_data = user_data
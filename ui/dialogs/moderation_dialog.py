@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget,
                              QProgressBar)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon, QPalette
+from utils.profiling import profile_action
 from datetime import datetime
 import json
 from services import ModerationService
@@ -15,6 +16,7 @@ class ModerationDialog(QDialog):
     
     request_processed = pyqtSignal()  # Сигнал об обработке заявки
     
+    @profile_action('dialog.ModerationDialog.open')
     def __init__(self, user_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
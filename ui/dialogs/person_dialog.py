@@ -1,11 +1,13 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 
 from services.person_service import PersonService
 from services.country_service import CountryService
 
 class PersonDialog(QDialog):
+    @profile_action('dialog.PersonDialog.open')
     def __init__(self, user_data, person_data=None, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -2,10 +2,12 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 
 class RelationshipDialog(QDialog):
     """Диалог для управления связями между сущностями"""
     
+    @profile_action('dialog.RelationshipDialog.open')
     def __init__(self, user_data, entity_type, entity_id, entity_name, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -600,84 +602,8 @@ class RelationshipDialog(QDialog):
                 QMessageBox.information(self, "Информация", "Выберите элементы для добавления")
                 return
             
-            success_count = 0
-            error_count = 0
-            error_messages = []
-            
-            for item in selected_items:
-                entity_id = item.data(Qt.ItemDataRole.UserRole)
-                
-                try:
-                    result = None
-                    
-                    if relationship_type == 'persons':
-                        if self.entity_type == 'EVENT':
-                            result = self.relationship_service.link_person_to_event(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                        elif self.entity_type == 'DOCUMENT':
-                            result = self.relationship_service.link_document_to_person(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                    elif relationship_type == 'events':
-                        if self.entity_type == 'PERSON':
-                            result = self.relationship_service.link_person_to_event(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                        elif self.entity_type == 'COUNTRY':
-                            result = self.relationship_service.link_country_to_event(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                        elif self.entity_type == 'DOCUMENT':
-                            result = self.relationship_service.link_document_to_event(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                        elif self.entity_type == 'SOURCE':
-                            result = self.relationship_service.link_event_to_source(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                    elif relationship_type == 'countries':
-                        if self.entity_type == 'EVENT':
-                            result = self.relationship_service.link_country_to_event(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                    elif relationship_type == 'documents':
-                        if self.entity_type == 'PERSON':
-                            result = self.relationship_service.link_document_to_person(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                        elif self.entity_type == 'EVENT':
-                            result = self.relationship_service.link_document_to_event(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                    elif relationship_type == 'sources':
-                        if self.entity_type == 'EVENT':
-                            result = self.relationship_service.link_event_to_source(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                    
-                    if result and result.get('success'):
-                        success_count += 1
-                    else:
-                        error_count += 1
-                        error_messages.append(result.get('message', 'Неизвестная ошибка') if result else 'Нет результата')
-                        
-                except Exception as e:
-                    error_count += 1
-                    error_messages.append(str(e))
-                    print(f"Ошибка добавления связи: {e}")
-            
-            message = f"Успешно добавлено связей: {success_count}"
-            if error_count > 0:
-                message += f"\nОшибок: {error_count}"
-                if error_messages:
-                    message += f"\nПримеры ошибок: {'; '.join(error_messages[:3])}"
-            
-            if success_count > 0:
-                QMessageBox.information(self, "Результат", message)
-                self.load_current_relationships()
-            else:
-                QMessageBox.warning(self, "Ошибка", message)
+            add_ids = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
+            self.apply_relationship_changes(relationship_type, add_ids=add_ids)
                 
         except Exception as e:
             QMessageBox.critical(self, "Критическая ошибка", f"Произошла ошибка:\n{str(e)}")
@@ -704,106 +630,49 @@ class RelationshipDialog(QDialog):
             if reply != QMessageBox.StandardButton.Yes:
                 return
             
-            success_count = 0
-            error_count = 0
-            error_messages = []
-            
-            for item in selected_items:
-                entity_id = item.data(Qt.ItemDataRole.UserRole)
-                
-                try:
-                    result = None
-                    
-                    if relationship_type == 'persons':
-                        if self.entity_type == 'EVENT':
-                            result = self.relationship_service.unlink_person_from_event(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                        elif self.entity_type == 'DOCUMENT':
-                            # Для документов используем прямой вызов репозитория
-                            success = self.rel_repo.unlink_document_from_person(
-                                self.entity_id, entity_id, self.user_data['user_id']
-                            )
-                            result = {'success': success}
-                    elif relationship_type == 'events':
-                        if self.entity_type == 'PERSON':
-                            result = self.relationship_service.unlink_person_from_event(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                        elif self.entity_type == 'COUNTRY':
-                            result = self.relationship_service.unlink_country_from_event(
-                                self.user_data['user_id'], self.entity_id, entity_id
-                            )
-                        elif self.entity_type == 'DOCUMENT':
-                            success = self.rel_repo.unlink_document_from_event(
-                                self.entity_id, entity_id, self.user_data['user_id']
-                            )
-                            result = {'success': success}
-                        elif self.entity_type == 'SOURCE':
-                            success = self.rel_repo.unlink_event_from_source(
-                                entity_id, self.entity_id, self.user_data['user_id']
-                            )
-                            result = {'success': success}
-                    elif relationship_type == 'countries':
-                        if self.entity_type == 'EVENT':
-                            result = self.relationship_service.unlink_country_from_event(
-                                self.user_data['user_id'], entity_id, self.entity_id
-                            )
-                    elif relationship_type == 'documents':
-                        if self.entity_type == 'PERSON':
-                            success = self.rel_repo.unlink_document_from_person(
-                                entity_id, self.entity_id, self.user_data['user_id']
-                            )
-                            result = {'success': success}
-                        elif self.entity_type == 'EVENT':
-                            success = self.rel_repo.unlink_document_from_event(
-                                entity_id, self.entity_id, self.user_data['user_id']
-                            )
-                            result = {'success': success}
-                    elif relationship_type == 'sources':
-                        if self.entity_type == 'EVENT':
-                            success = self.rel_repo.unlink_event_from_source(
-                                self.entity_id, entity_id, self.user_data['user_id']
-                            )
-                            result = {'success': success}
-                    
-                    if result and result.get('success'):
-                        success_count += 1
-                    else:
-                        error_count += 1
-                        error_messages.append(result.get('message', 'Неизвестная ошибка') if result else 'Нет результата')
-                        
-                except Exception as e:
-                    error_count += 1
-                    error_messages.append(str(e))
-                    print(f"Ошибка удаления связи: {e}")
-            
-            message = f"Успешно удалено связей: {success_count}"
-            if error_count > 0:
-                message += f"\nОшибок: {error_count}"
-                if error_messages:
-                    message += f"\nПримеры ошибок: {'; '.join(error_messages[:3])}"
-            
-            if success_count > 0:
-                QMessageBox.information(self, "Результат", message)
-                self.load_current_relationships()
-            else:
-                QMessageBox.warning(self, "Ошибка", message)
+            remove_ids = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items]
+            self.apply_relationship_changes(relationship_type, remove_ids=remove_ids)
                 
         except Exception as e:
             QMessageBox.critical(self, "Критическая ошибка", f"Произошла ошибка:\n{str(e)}")
             import traceback
             traceback.print_exc()
+    
+    def apply_relationship_changes(self, relationship_type, add_ids=None, remove_ids=None):
+        """Применение изменений связей одной транзакцией"""
+        result = self.relationship_service.update_relationships(
+            self.user_data['user_id'], self.entity_type, self.entity_id, relationship_type,
+            add_ids=add_ids, remove_ids=remove_ids
+        )
+        
+        if result.get('success'):
+            QMessageBox.information(self, "Результат", result['message'])
+            self.load_linked_entities(relationship_type)
+        else:
+            QMessageBox.warning(self, "Ошибка", result.get('message', 'Связи не изменены'))
+
+
+class ImportRelay(QObject):
+    """Передача прогресса и результата импорта связей из фонового потока в поток интерфейса"""
+    progress = pyqtSignal(str, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
 
 
 class BatchRelationshipDialog(QDialog):
     """Диалог для массового управления связями"""
     
+    @profile_action('dialog.BatchRelationshipDialog.open')
     def __init__(self, user_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
         from services.relationship_service import RelationshipService
         self.relationship_service = RelationshipService()
+        self.import_scope = None
+        self.import_relay = ImportRelay(self)
+        self.import_relay.progress.connect(self.on_import_progress)
+        self.import_relay.finished.connect(self.on_import_finished)
+        self.import_relay.failed.connect(self.on_import_failed)
         self.setup_ui()
     
     def setup_ui(self):
@@ -837,6 +706,19 @@ class BatchRelationshipDialog(QDialog):
         self.export_btn.clicked.connect(self.export_relationships)
         operation_layout.addWidget(self.export_btn)
         
+        self.import_btn = QPushButton("Импорт связей из файла")
+        self.import_btn.clicked.connect(self.import_relationships)
+        operation_layout.addWidget(self.import_btn)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        operation_layout.addWidget(self.progress_bar)
+        
+        self.cancel_maintenance_btn = QPushButton("Прервать")
+        self.cancel_maintenance_btn.setVisible(False)
+        self.cancel_maintenance_btn.clicked.connect(self.cancel_maintenance)
+        operation_layout.addWidget(self.cancel_maintenance_btn)
+        
         layout.addWidget(operation_group)
         
         # Лог операций
@@ -876,8 +758,9 @@ class BatchRelationshipDialog(QDialog):
                 self.log_text.append("Операция отменена пользователем.")
                 return
             
+            self.start_maintenance()
             result = self.relationship_service.cleanup_orphaned_relationships(
-                self.user_data['user_id']
+                self.user_data['user_id'], progress_callback=self.on_maintenance_progress
             )
             
             if isinstance(result, dict) and any(result.values()):
@@ -903,59 +786,38 @@ class BatchRelationshipDialog(QDialog):
             QMessageBox.critical(self, "Ошибка", error_msg)
             import traceback
             traceback.print_exc()
+        finally:
+            self.finish_maintenance()
     
     def validate_relationships(self):
         """Проверка целостности связей"""
         try:
             self.log_text.append("Начинаем проверку целостности связей...")
+            self.start_maintenance()
             
-            # Простая проверка - подсчитываем связи
-            from data_access.relationships_repository import RelationshipsRepository
-            rel_repo = RelationshipsRepository()
+            result = self.relationship_service.validate_relationships(
+                self.user_data['user_id'], progress_callback=self.on_maintenance_progress
+            )
             
-            # Подсчитываем количество различных типов связей
-            stats = {
-                'events_persons': 0,
-                'countries_events': 0,
-                'documents_persons': 0,
-                'documents_events': 0,
-                'events_sources': 0
-            }
+            if not result['success']:
+                self.log_text.append(result['message'])
+                QMessageBox.warning(self, "Ошибка", result['message'])
+                return
             
-            try:
-                with rel_repo.db.get_cursor() as cursor:
-                    cursor.execute("SELECT COUNT(*) FROM public.events_persons")
-                    stats['events_persons'] = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM public.countries_events")
-                    stats['countries_events'] = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM public.documents_persons")
-                    stats['documents_persons'] = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM public.documents_events")
-                    stats['documents_events'] = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM public.events_sources")
-                    stats['events_sources'] = cursor.fetchone()[0]
-                
-                total_relationships = sum(stats.values())
-                self.log_text.append(f"Общее количество связей: {total_relationships}")
-                self.log_text.append(f"Детали по типам:")
-                for rel_type, count in stats.items():
-                    self.log_text.append(f"  {rel_type}: {count}")
-                
-                self.log_text.append("Проверка завершена. Подробная валидация не реализована.")
-                QMessageBox.information(
-                    self, 
-                    "Результат проверки", 
-                    f"Найдено {total_relationships} связей.\n"
-                    "Подробности в логе операций."
-                )
-                
-            except Exception as db_error:
-                self.log_text.append(f"Ошибка подключения к БД: {db_error}")
-                QMessageBox.warning(self, "Ошибка", f"Ошибка подключения к БД: {db_error}")
+            self.log_text.append(f"Просмотрено связей: {result['scanned']}")
+            for issue in result['issues']:
+                self.log_text.append(f"  {issue}")
+            if result['total_issues'] > len(result['issues']):
+                self.log_text.append(f"  ... и еще {result['total_issues'] - len(result['issues'])}")
+            self.log_text.append(f"Полный отчет: {result['report_file']}")
+            
+            QMessageBox.information(
+                self, 
+                "Результат проверки", 
+                f"{'Проверка прервана. ' if result['cancelled'] else ''}"
+                f"Найдено висячих связей: {result['total_issues']}.\n"
+                "Подробности в логе операций."
+            )
                 
         except Exception as e:
             error_msg = f"Критическая ошибка: {str(e)}"
@@ -963,86 +825,212 @@ class BatchRelationshipDialog(QDialog):
             QMessageBox.critical(self, "Ошибка", error_msg)
             import traceback
             traceback.print_exc()
+        finally:
+            self.finish_maintenance()
+    
+    def start_maintenance(self):
+        """Подготовка интерфейса к длительному обходу связей"""
+        self.maintenance_cancelled = False
+        self.cleanup_btn.setEnabled(False)
+        self.validate_btn.setEnabled(False)
+        self.export_btn.setEnabled(False)
+        self.import_btn.setEnabled(False)
+        self.cancel_maintenance_btn.setVisible(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+    
+    def finish_maintenance(self):
+        """Возврат интерфейса после обхода связей"""
+        self.cleanup_btn.setEnabled(True)
+        self.validate_btn.setEnabled(True)
+        self.export_btn.setEnabled(True)
+        self.import_btn.setEnabled(True)
+        self.cancel_maintenance_btn.setVisible(False)
+        self.progress_bar.setVisible(False)
+    
+    def cancel_maintenance(self):
+        """Прерывание обхода после текущего фрагмента"""
+        self.maintenance_cancelled = True
+        if self.import_scope is not None:
+            # Импорт прерывается сразу: выполняющийся запрос отменяется на сервере, транзакция откатывается
+            self.import_scope.cancel()
+            self.log_text.append("Импорт прерывается, загруженные строки не будут сохранены...")
+            return
+        self.log_text.append("Операция будет прервана после текущего фрагмента...")
+    
+    def done(self, result):
+        """Закрытие диалога прерывает незавершенный импорт"""
+        if self.import_scope is not None:
+            self.import_scope.cancel()
+        super().done(result)
+    
+    def on_maintenance_progress(self, table, processed, total, found):
+        """Прогресс обхода таблицы связей"""
+        self.progress_bar.setFormat(f"{table}: {processed} / {total} (проблем: {found})")
+        self.progress_bar.setValue(int(processed / total * 100) if total else 100)
+        QApplication.processEvents()
+        return not self.maintenance_cancelled
     
     def export_relationships(self):
         """Экспорт связей в файл"""
         try:
+            from utils.edge_list_io import EXPORT_FILE_FILTER
             filename, _ = QFileDialog.getSaveFileName(
                 self,
                 "Сохранить экспорт связей",
-                "relationships_export.json",
-                "JSON Files (*.json);;CSV Files (*.csv)"
+                "relationships_export.jsonl.gz",
+                EXPORT_FILE_FILTER
             )
             
             if not filename:
                 return
             
             self.log_text.append(f"Экспортируем связи в файл: {filename}")
+            self.start_maintenance()
             
-            # Простой экспорт - получаем данные из БД
-            from data_access.relationships_repository import RelationshipsRepository
-            rel_repo = RelationshipsRepository()
-            
-            export_data = {
-                'export_date': str(QDateTime.currentDateTime().toString()),
-                'exported_by': self.user_data.get('username', 'Unknown'),
-                'relationships': {}
-            }
+            result = self.relationship_service.export_relationships(
+                self.user_data['user_id'], filename, progress_callback=self.on_export_progress
+            )
             
-            try:
-                with rel_repo.db.get_cursor() as cursor:
-                    # Экспортируем связи персон и событий
-                    cursor.execute("SELECT person_id, event_id FROM public.events_persons")
-                    export_data['relationships']['events_persons'] = [
-                        {'person_id': row[0], 'event_id': row[1]} for row in cursor.fetchall()
-                    ]
-                    
-                    # Экспортируем связи стран и событий
-                    cursor.execute("SELECT country_id, event_id FROM public.countries_events")
-                    export_data['relationships']['countries_events'] = [
-                        {'country_id': row[0], 'event_id': row[1]} for row in cursor.fetchall()
-                    ]
-                    
-                    # Экспортируем связи документов и персон
-                    cursor.execute("SELECT document_id, person_id FROM public.documents_persons")
-                    export_data['relationships']['documents_persons'] = [
-                        {'document_id': row[0], 'person_id': row[1]} for row in cursor.fetchall()
-                    ]
-                    
-                    # Экспортируем связи документов и событий
-                    cursor.execute("SELECT document_id, event_id FROM public.documents_events")
-                    export_data['relationships']['documents_events'] = [
-                        {'document_id': row[0], 'event_id': row[1]} for row in cursor.fetchall()
-                    ]
-                    
-                    # Экспортируем связи событий и источников
-                    cursor.execute("SELECT event_id, source_id FROM public.events_sources")
-                    export_data['relationships']['events_sources'] = [
-                        {'event_id': row[0], 'source_id': row[1]} for row in cursor.fetchall()
-                    ]
-                
-                # Записываем в файл
-                import json
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, ensure_ascii=False, indent=2)
-                
-                total_exported = sum(len(rels) for rels in export_data['relationships'].values())
-                self.log_text.append(f"Успешно экспортировано связей: {total_exported}")
+            if result['success']:
+                for table, count in result['by_table'].items():
+                    self.log_text.append(f"  {table}: {count}")
+                self.log_text.append(f"Успешно экспортировано связей: {result['exported_count']}")
                 QMessageBox.information(
                     self, 
                     "Экспорт завершен", 
+                    f"{'Экспорт прерван. ' if result['cancelled'] else ''}"
                     f"Связи успешно экспортированы.\n"
                     f"Файл: {filename}\n"
-                    f"Количество: {total_exported}"
+                    f"Количество: {result['exported_count']}"
                 )
+            else:
+                self.log_text.append(result['message'])
+                QMessageBox.warning(self, "Ошибка экспорта", result['message'])
                 
-            except Exception as db_error:
-                self.log_text.append(f"Ошибка экспорта: {db_error}")
-                QMessageBox.warning(self, "Ошибка экспорта", f"Ошибка экспорта: {db_error}")
+        except Exception as e:
+            error_msg = f"Критическая ошибка: {str(e)}"
+            self.log_text.append(error_msg)
+            QMessageBox.critical(self, "Ошибка", error_msg)
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.finish_maintenance()
+    
+    def on_export_progress(self, table, exported):
+        """Прогресс потокового экспорта"""
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setFormat(f"{table}: {exported}")
+        QApplication.processEvents()
+        return not self.maintenance_cancelled
+    
+    def import_relationships(self):
+        """Массовый импорт связей из файла экспорта"""
+        try:
+            from utils.edge_list_io import IMPORT_FILE_FILTER
+            filename, _ = QFileDialog.getOpenFileName(
+                self,
+                "Импорт связей",
+                "",
+                IMPORT_FILE_FILTER
+            )
+            
+            if not filename:
+                return
+            
+            self.log_text.append(f"Импортируем связи из файла: {filename}")
+            self.start_maintenance()
+            
+            # Загрузка миллионов связей идет минутами: окно остается отзывчивым, импорт можно прервать
+            from core.background import background_executor
+            from core.database import QueryCancelScope
+            self.import_scope = QueryCancelScope()
+            background_executor.submit(self._run_import, filename, self.import_scope)
                 
         except Exception as e:
+            self.import_scope = None
             error_msg = f"Критическая ошибка: {str(e)}"
             self.log_text.append(error_msg)
             QMessageBox.critical(self, "Ошибка", error_msg)
             import traceback
-            traceback.print_exc()
\ No newline at end of file
+            traceback.print_exc()
+            self.finish_maintenance()
+    
+    def _run_import(self, filename, scope):
+        try:
+            result = self.relationship_service.import_relationships(
+                self.user_data['user_id'], filename,
+                progress_callback=self._emit_import_progress, cancel_scope=scope
+            )
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self._emit_import_result(self.import_relay.failed, str(e))
+            return
+        self._emit_import_result(self.import_relay.finished, result)
+    
+    def _emit_import_progress(self, stage, count):
+        try:
+            self.import_relay.progress.emit(stage, count)
+        except RuntimeError:
+            # Диалог закрыт и удален до завершения импорта
+            pass
+    
+    def _emit_import_result(self, signal, value):
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            pass
+    
+    def on_import_progress(self, stage, count):
+        """Прогресс массового импорта"""
+        self.progress_bar.setRange(0, 0)
+        if stage == 'staging':
+            self.progress_bar.setFormat(f"Загрузка: {count} строк")
+        else:
+            self.log_text.append(f"Слияние {stage}: добавлено {count}")
+    
+    def on_import_finished(self, result):
+        """Результат импорта из фонового потока"""
+        self.import_scope = None
+        self.finish_maintenance()
+        if not self.isVisible():
+            # Диалог закрыт во время импорта
+            return
+        
+        if not result['success']:
+            self.log_text.append(result['message'])
+            if result.get('cancelled'):
+                QMessageBox.information(self, "Импорт прерван", result['message'])
+            else:
+                QMessageBox.warning(self, "Ошибка импорта", result['message'])
+            return
+        
+        for table, stats in result['by_table'].items():
+            self.log_text.append(
+                f"  {table}: строк {stats['rows']}, добавлено {stats['inserted']}, "
+                f"уже были {stats['already_linked']}, с несуществующими сущностями {stats['missing']}"
+            )
+            for id_a, id_b in stats['invalid_sample']:
+                self.log_text.append(f"    пропущено: {id_a} - {id_b}")
+        
+        totals = result['totals']
+        QMessageBox.information(
+            self,
+            "Импорт завершен",
+            f"Добавлено связей: {totals['inserted']}\n"
+            f"Уже существовали: {totals['already_linked']}\n"
+            f"Пропущено (нет сущности): {totals['missing']}\n"
+            f"Повторы в файле: {totals['duplicates']}"
+        )
+    
+    def on_import_failed(self, message):
+        """Ошибка импорта из фонового потока"""
+        self.import_scope = None
+        self.finish_maintenance()
+        error_msg = f"Критическая ошибка: {message}"
+        self.log_text.append(error_msg)
+        if not self.isVisible():
+            return
+        QMessageBox.critical(self, "Ошибка", error_msg)
@@ -1,8 +1,10 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 
 class SourceDialog(QDialog):
+    @profile_action('dialog.SourceDialog.open')
     def __init__(self, user_data, source_data=None, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -206,6 +208,7 @@ class SourceDialog(QDialog):
 class SourceSelectionDialog(QDialog):
     """Диалог для выбора источника из списка"""
     
+    @profile_action('dialog.SourceSelectionDialog.open')
     def __init__(self, user_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
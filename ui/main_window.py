@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from services import *
+from utils.profiling import action_profiler
 
 class MainWindow(QMainWindow):
     def __init__(self, user_data):
@@ -156,6 +157,9 @@ class MainWindow(QMainWindow):
         self.document_service = DocumentService()
         self.source_service = SourceService()
         self.search_service = SearchService()
+        self.search_service.warm_suggestions()
+        self.search_service.prewarm_popular_searches()
+        self.search_service.start_local_index_sync()
         
         if self.user_data['role_id'] >= 2:
             self.moderation_service = ModerationService()
@@ -186,7 +190,17 @@ class MainWindow(QMainWindow):
         
         # Справка
         help_menu = menubar.addMenu('Справка')
+        help_menu.addAction('Диагностика', self.show_diagnostics)
+        help_menu.addSeparator()
         help_menu.addAction('О программе', self.show_about)
+        
+        # Скрытое действие для включения профилирования (Ctrl+Shift+P)
+        self.profiling_action = QAction('Профилирование действий', self)
+        self.profiling_action.setCheckable(True)
+        self.profiling_action.setChecked(action_profiler.enabled)
+        self.profiling_action.setShortcut('Ctrl+Shift+P')
+        self.profiling_action.toggled.connect(self.toggle_profiling)
+        self.addAction(self.profiling_action)
     
     def create_toolbar(self):
         toolbar = self.addToolBar('Основное')
@@ -318,6 +332,23 @@ class MainWindow(QMainWindow):
     def export_data(self):
         self.show_export()
     
+    def toggle_profiling(self, enabled):
+        """Включение/выключение профилирования действий"""
+        if enabled:
+            action_profiler.enable()
+            self.statusBar().showMessage(
+                f"Профилирование включено, профили сохраняются в {action_profiler.output_dir}", 5000
+            )
+        else:
+            action_profiler.disable()
+            self.statusBar().showMessage("Профилирование выключено", 5000)
+    
+    def show_diagnostics(self):
+        """Показ окна диагностики"""
+        from ui.windows.diagnostics_window import DiagnosticsWindow
+        diagnostics_window = DiagnosticsWindow(self)
+        diagnostics_window.show()
+    
     def show_settings(self):
         QMessageBox.information(self, "Настройки", "Настройки пока не реализованы")
     
@@ -8,10 +8,25 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+# Названия типов сущностей в таблицах аналитики графа
+ENTITY_TYPE_TITLES = {
+    'PERSON': 'Персона',
+    'EVENT': 'Событие',
+    'COUNTRY': 'Страна',
+    'DOCUMENT': 'Документ',
+    'SOURCE': 'Источник'
+}
+
+class GraphAnalyticsRelay(QObject):
+    """Передача аналитики графа из фонового потока в поток интерфейса"""
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
 class AnalyticsPage(BasePage):
     def __init__(self, user_data):
-        super().__init__(user_data)
+        # Сервис нужен уже в setup_ui: страница загружает данные сразу после построения
         self.analytics_service = AnalyticsService()
+        super().__init__(user_data)
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -38,6 +53,9 @@ class AnalyticsPage(BasePage):
         # Вкладка общей статистики
         self.create_dashboard_tab(tabs)
         
+        # Вкладка аналитики графа связей
+        self.create_graph_tab(tabs)
+        
         # Вкладка качества контента (для админов)
         if self.user_data['role_id'] >= 3:
             self.create_quality_tab(tabs)
@@ -83,6 +101,50 @@ class AnalyticsPage(BasePage):
         
         tabs.addTab(dashboard_widget, "Дашборд")
     
+    def create_graph_tab(self, tabs):
+        """Создание вкладки аналитики графа связей"""
+        graph_widget = QWidget()
+        graph_layout = QVBoxLayout(graph_widget)
+        
+        self.graph_summary_label = QLabel()
+        self.graph_summary_label.setWordWrap(True)
+        graph_layout.addWidget(self.graph_summary_label)
+        
+        # Аналитика считается в фоне; результат устаревшего запроса отбрасывается по номеру
+        self.graph_relay = GraphAnalyticsRelay(self)
+        self.graph_relay.finished.connect(self.on_graph_data_loaded)
+        self.graph_relay.failed.connect(self.on_graph_data_failed)
+        self.graph_generation = 0
+        
+        central_group = QGroupBox("Самые центральные персоны")
+        central_layout = QVBoxLayout(central_group)
+        self.central_table = QTableWidget()
+        self.central_table.setColumnCount(4)
+        self.central_table.setHorizontalHeaderLabels(["Персона", "PageRank", "Связей", "Размер компоненты"])
+        self.central_table.horizontalHeader().setStretchLastSection(True)
+        central_layout.addWidget(self.central_table)
+        graph_layout.addWidget(central_group)
+        
+        bridges_group = QGroupBox("Связующие сущности")
+        bridges_layout = QVBoxLayout(bridges_group)
+        self.bridges_table = QTableWidget()
+        self.bridges_table.setColumnCount(4)
+        self.bridges_table.setHorizontalHeaderLabels(["Тип", "Название", "Оценка", "Связей"])
+        self.bridges_table.horizontalHeader().setStretchLastSection(True)
+        bridges_layout.addWidget(self.bridges_table)
+        graph_layout.addWidget(bridges_group)
+        
+        clusters_group = QGroupBox("Изолированные кластеры")
+        clusters_layout = QVBoxLayout(clusters_group)
+        self.clusters_table = QTableWidget()
+        self.clusters_table.setColumnCount(3)
+        self.clusters_table.setHorizontalHeaderLabels(["Размер", "Состав", "Примеры"])
+        self.clusters_table.horizontalHeader().setStretchLastSection(True)
+        clusters_layout.addWidget(self.clusters_table)
+        graph_layout.addWidget(clusters_group)
+        
+        tabs.addTab(graph_widget, "Граф связей")
+    
     def create_quality_tab(self, tabs):
         """Создание вкладки качества контента"""
         quality_widget = QWidget()
@@ -186,6 +248,7 @@ class AnalyticsPage(BasePage):
     def refresh(self):
         """Обновление всех данных"""
         self.load_dashboard_data()
+        self.load_graph_data()
         if self.user_data['role_id'] >= 3:
             self.load_quality_data()
         if self.user_data['role_id'] >= 2:
@@ -216,6 +279,68 @@ class AnalyticsPage(BasePage):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные дашборда: {str(e)}")
     
+    def load_graph_data(self):
+        """Запуск фонового расчета аналитики графа связей"""
+        self.graph_generation += 1
+        generation = self.graph_generation
+        self.graph_summary_label.setText("Расчет аналитики графа связей...")
+        
+        self.analytics_service.start_graph_analytics(
+            self.user_data['user_id'],
+            on_finished=lambda analytics: self.graph_relay.finished.emit(generation, analytics),
+            on_error=lambda error: self.graph_relay.failed.emit(generation, str(error))
+        )
+    
+    def on_graph_data_failed(self, generation, message):
+        """Ошибка расчета аналитики графа"""
+        if generation != self.graph_generation:
+            return
+        self.graph_summary_label.setText("Аналитика графа недоступна")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить аналитику графа: {message}")
+    
+    def on_graph_data_loaded(self, generation, analytics):
+        """Отображение аналитики графа связей"""
+        if generation != self.graph_generation:
+            return
+        
+        try:
+            summary = analytics['summary']
+            self.graph_summary_label.setText(
+                f"Сущностей в графе: {summary['nodes']}, связей: {summary['edges']}, "
+                f"компонент связности: {summary['components']} "
+                f"(крупнейшая — {summary['largest_component']}), "
+                f"средняя степень: {summary['average_degree']:.2f}"
+            )
+            
+            central = analytics['central_persons']
+            self.central_table.setRowCount(len(central))
+            for row, entity in enumerate(central):
+                self.central_table.setItem(row, 0, QTableWidgetItem(entity['name']))
+                self.central_table.setItem(row, 1, QTableWidgetItem(f"{entity['pagerank'] * summary['nodes']:.2f}"))
+                self.central_table.setItem(row, 2, QTableWidgetItem(str(entity['degree'])))
+                self.central_table.setItem(row, 3, QTableWidgetItem(str(entity['component_size'])))
+            
+            bridges = analytics['bridges']
+            self.bridges_table.setRowCount(len(bridges))
+            for row, entity in enumerate(bridges):
+                self.bridges_table.setItem(row, 0, QTableWidgetItem(ENTITY_TYPE_TITLES[entity['entity_type']]))
+                self.bridges_table.setItem(row, 1, QTableWidgetItem(entity['name']))
+                self.bridges_table.setItem(row, 2, QTableWidgetItem(f"{entity['score'] * summary['nodes']:.2f}"))
+                self.bridges_table.setItem(row, 3, QTableWidgetItem(str(entity['degree'])))
+            
+            clusters = analytics['isolated_clusters']
+            self.clusters_table.setRowCount(len(clusters))
+            for row, cluster in enumerate(clusters):
+                composition = ', '.join(f"{ENTITY_TYPE_TITLES[entity_type]}: {count}"
+                                        for entity_type, count in cluster['by_type'].items())
+                sample = ', '.join(entity['name'] or f"#{entity['entity_id']}" for entity in cluster['sample'])
+                self.clusters_table.setItem(row, 0, QTableWidgetItem(str(cluster['size'])))
+                self.clusters_table.setItem(row, 1, QTableWidgetItem(composition))
+                self.clusters_table.setItem(row, 2, QTableWidgetItem(sample))
+            
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить аналитику графа: {str(e)}")
+    
     def load_quality_data(self):
         """Загрузка данных качества"""
         try:
@@ -1,8 +1,23 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import instrument_methods
+
+# Подписи типов связей для подсказок
+RELATION_TITLES = {
+    'persons': 'Персоны',
+    'events': 'События',
+    'countries': 'Страны',
+    'documents': 'Документы',
+    'sources': 'Источники'
+}
 
 class BasePage(QWidget):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Загрузка и обновление страниц профилируются как отдельные действия
+        instrument_methods(cls, f"page.{cls.__name__}", ('load_data', 'refresh'))
+    
     def __init__(self, user_data):
         super().__init__()
         self.user_data = user_data
@@ -15,3 +30,45 @@ class BasePage(QWidget):
     def refresh(self):
         """Обновление данных на странице"""
         pass
+    
+    def fill_relationship_counts(self, tree, column, entity_type, id_key):
+        """Заполнение колонки связей для всех строк страницы одним запросом"""
+        items = [tree.topLevelItem(index) for index in range(tree.topLevelItemCount())]
+        entity_ids = [item.data(0, Qt.ItemDataRole.UserRole)[id_key] for item in items]
+        if not entity_ids:
+            return
+        
+        if not hasattr(self, 'relationship_service'):
+            from services.relationship_service import RelationshipService
+            self.relationship_service = RelationshipService()
+        
+        counts = self.relationship_service.get_relationship_counts(
+            self.user_data['user_id'], entity_type, entity_ids
+        )
+        
+        for item, entity_id in zip(items, entity_ids):
+            entity_counts = counts.get(entity_id, {})
+            total = sum(entity_counts.values())
+            item.setText(column, str(total) if total > 0 else "—")
+            item.setToolTip(column, '\n'.join(
+                f"{RELATION_TITLES.get(relation, relation)}: {count}"
+                for relation, count in entity_counts.items()
+            ))
+    
+    def fill_facet_combo(self, combo, all_label, facet_values):
+        """Варианты фильтра со счетчиками (выбранное значение сохраняется, сигналы не отправляются)"""
+        current = combo.currentData()
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem(all_label, None)
+        for value in facet_values:
+            if value['value'] is not None:
+                combo.addItem(f"{value['label']} ({value['count']})", value['value'])
+        
+        # Выбранный вариант остается в списке, даже если по остальным фильтрам ничего не найдено
+        index = combo.findData(current)
+        if current is not None and index < 0:
+            combo.addItem(f"{current} (0)", current)
+            index = combo.count() - 1
+        combo.setCurrentIndex(max(0, index))
+        combo.blockSignals(False)
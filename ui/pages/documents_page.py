@@ -2,9 +2,14 @@ from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from services.document_service import DocumentService
+from utils.highlighting import get_highlighter, marked_to_html
 from ui.pages.base_page import BasePage
 from ui.dialogs.document_dialog import DocumentDialog
 
+# Диапазон лет создания по умолчанию
+DEFAULT_YEAR_FROM = 1000
+DEFAULT_YEAR_TO = 2024
+
 class DocumentsPage(BasePage):
     def __init__(self, user_data):
         self.document_service = DocumentService()
@@ -51,18 +56,25 @@ class DocumentsPage(BasePage):
         # Фильтры по годам создания
         self.year_from_spin = QSpinBox()
         self.year_from_spin.setRange(1, 2100)
-        self.year_from_spin.setValue(1000)
-        self.year_from_spin.valueChanged.connect(self.filter_data)
+        self.year_from_spin.setValue(DEFAULT_YEAR_FROM)
+        self.year_from_spin.valueChanged.connect(self.on_years_changed)
         search_layout.addWidget(QLabel("Создан с:"), 1, 0)
         search_layout.addWidget(self.year_from_spin, 1, 1)
         
         self.year_to_spin = QSpinBox()
         self.year_to_spin.setRange(1, 2100)
-        self.year_to_spin.setValue(2024)
-        self.year_to_spin.valueChanged.connect(self.filter_data)
+        self.year_to_spin.setValue(DEFAULT_YEAR_TO)
+        self.year_to_spin.valueChanged.connect(self.on_years_changed)
         search_layout.addWidget(QLabel("по:"), 1, 2)
         search_layout.addWidget(self.year_to_spin, 1, 3)
         
+        # Век создания: выбор задает диапазон лет, рядом с каждым веком — число документов
+        self.century_combo = QComboBox()
+        self.century_combo.addItem("Все века", None)
+        self.century_combo.currentIndexChanged.connect(self.on_century_changed)
+        search_layout.addWidget(QLabel("Век:"), 1, 4)
+        search_layout.addWidget(self.century_combo, 1, 5)
+        
         # Сортировка
         self.sort_combo = QComboBox()
         self.sort_combo.addItems([
@@ -169,11 +181,19 @@ class DocumentsPage(BasePage):
                 }
                 filters['sort_by'] = sort_mapping.get(self.sort_combo.currentText(), "date_desc")
             
+            # Счетчики фасетов нужны только при смене фильтров, а не при листании
+            filters['with_facets'] = self.current_page == 0
+            
             result = self.document_service.get_documents(self.user_data['user_id'], filters)
             
             self.documents_table.clear()
             self.total_count = result['total_count']
             
+            # Число документов каждого века при остальных фильтрах (века до н. э. вне диапазона лет)
+            if 'facets' in result:
+                centuries = [value for value in result['facets']['century'] if value['value'] and value['value'] > 0]
+                self.fill_facet_combo(self.century_combo, "Все века", centuries)
+            
             for document in result['documents']:
                 # Форматируем дату
                 date_str = ""
@@ -259,6 +279,9 @@ class DocumentsPage(BasePage):
         results_widget = QWidget()
         results_layout = QVBoxLayout(results_widget)
         
+        # Все слова запроса выделяются за один проход по тексту
+        highlighter = get_highlighter(search_text)
+        
         for doc in search_results['results']:
             # Создаем карточку результата
             result_card = QFrame()
@@ -268,7 +291,8 @@ class DocumentsPage(BasePage):
             card_layout = QVBoxLayout(result_card)
             
             # Название документа
-            title_label = QLabel(f"<b>{doc['name']}</b>")
+            title_label = QLabel(f"<b>{highlighter.to_html(doc['name'])}</b>")
+            title_label.setTextFormat(Qt.TextFormat.RichText)
             title_label.setStyleSheet("color: #007acc;")
             card_layout.addWidget(title_label)
             
@@ -283,31 +307,21 @@ class DocumentsPage(BasePage):
             meta_label.setStyleSheet("color: #666; font-size: 11px;")
             card_layout.addWidget(meta_label)
             
-            # Фрагменты текста с выделением
-            try:
-                snippets = self.document_service.get_document_snippets(
-                    self.user_data['user_id'],
-                    doc['document_id'],
-                    search_text,
-                    snippet_count=2,
-                    snippet_length=200
-                )
-                
+            # Фрагменты текста с выделением (приходят вместе с результатами поиска)
+            snippets = doc.get('snippets')
+            if snippets:
                 for snippet in snippets:
-                    snippet_text = snippet.get('snippet', '')
-                    # Простое выделение найденных слов
-                    for word in search_text.split():
-                        snippet_text = snippet_text.replace(word, f"<b style='background-color: #ffff00;'>{word}</b>")
-                    
-                    snippet_label = QLabel(f"...{snippet_text}...")
+                    snippet_label = QLabel(f"...{marked_to_html(snippet.get('snippet', ''))}...")
+                    snippet_label.setTextFormat(Qt.TextFormat.RichText)
                     snippet_label.setWordWrap(True)
                     snippet_label.setStyleSheet("margin: 5px; padding: 5px; background-color: #f9f9f9;")
                     card_layout.addWidget(snippet_label)
             
-            except:
-                # Если не удалось получить фрагменты, показываем начало содержимого
-                content_preview = doc.get('content', '')[:200] + "..."
+            else:
+                # Если фрагментов нет, показываем начало содержимого
+                content_preview = highlighter.to_html(doc.get('content', '')[:200]) + "..."
                 preview_label = QLabel(content_preview)
+                preview_label.setTextFormat(Qt.TextFormat.RichText)
                 preview_label.setWordWrap(True)
                 preview_label.setStyleSheet("margin: 5px; padding: 5px; background-color: #f9f9f9;")
                 card_layout.addWidget(preview_label)
@@ -360,12 +374,38 @@ class DocumentsPage(BasePage):
         self.is_search_mode = False
         self.load_data()
     
+    def on_century_changed(self):
+        """Выбранный век задает диапазон лет создания"""
+        century = self.century_combo.currentData()
+        if century is None:
+            year_from, year_to = DEFAULT_YEAR_FROM, DEFAULT_YEAR_TO
+        else:
+            year_from, year_to = (century - 1) * 100 + 1, century * 100
+        self.set_year_range(year_from, year_to)
+        self.filter_data()
+    
+    def on_years_changed(self):
+        """Диапазон лет, заданный вручную, не соответствует выбранному веку"""
+        self.century_combo.blockSignals(True)
+        self.century_combo.setCurrentIndex(0)
+        self.century_combo.blockSignals(False)
+        self.filter_data()
+    
+    def set_year_range(self, year_from, year_to):
+        """Установка диапазона лет без повторной загрузки на каждое поле"""
+        for spin, value in ((self.year_from_spin, year_from), (self.year_to_spin, year_to)):
+            spin.blockSignals(True)
+            spin.setValue(value)
+            spin.blockSignals(False)
+    
     def reset_filters(self):
         """Сброс всех фильтров"""
         self.search_edit.clear()
         self.content_search_edit.clear()
-        self.year_from_spin.setValue(1000)
-        self.year_to_spin.setValue(2024)
+        self.century_combo.blockSignals(True)
+        self.century_combo.setCurrentIndex(0)
+        self.century_combo.blockSignals(False)
+        self.set_year_range(DEFAULT_YEAR_FROM, DEFAULT_YEAR_TO)
         self.sort_combo.setCurrentIndex(0)
         self.filter_data()
     
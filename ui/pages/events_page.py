@@ -59,7 +59,7 @@ class EventsPage(BasePage):
         # Список событий
         self.events_table = QTreeWidget()
         self.events_table.setHeaderLabels([
-            "ID", "Название", "Тип", "Дата начала", "Дата окончания", "Место"
+            "ID", "Название", "Тип", "Дата начала", "Дата окончания", "Место", "Связи"
         ])
         self.events_table.itemDoubleClicked.connect(self.view_event_details)
         self.events_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -123,7 +123,8 @@ class EventsPage(BasePage):
         filters = {
             'offset': self.current_page * self.page_size,
             'limit': self.page_size,
-            'search_term': self.search_edit.text() if self.search_edit.text() else None
+            'search_term': self.search_edit.text() if self.search_edit.text() else None,
+            'with_facets': self.current_page == 0
         }
         
         if self.type_combo.currentData():
@@ -134,6 +135,10 @@ class EventsPage(BasePage):
         self.events_table.clear()
         self.total_count = result['total_count']
         
+        # Число событий каждого типа при текущих фильтрах
+        if 'facets' in result:
+            self.fill_facet_combo(self.type_combo, "Все типы", result['facets']['event_type'])
+        
         for event in result['events']:
             item = QTreeWidgetItem([
                 str(event['event_id']),
@@ -146,6 +151,9 @@ class EventsPage(BasePage):
             item.setData(0, Qt.ItemDataRole.UserRole, event)
             self.events_table.addTopLevelItem(item)
         
+        # Количество связей для всей страницы одним запросом
+        self.fill_relationship_counts(self.events_table, 6, 'EVENT', 'event_id')
+        
         self.update_pagination()
     
     def load_events_hierarchy(self):
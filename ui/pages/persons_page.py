@@ -61,7 +61,7 @@ class PersonsPage(BasePage):
         # Таблица персон
         self.persons_table = QTreeWidget()
         self.persons_table.setHeaderLabels([
-            "ID", "Имя", "Фамилия", "Отчество", "Годы жизни", "Страна"
+            "ID", "Имя", "Фамилия", "Отчество", "Годы жизни", "Страна", "Связи"
         ])
         self.persons_table.itemDoubleClicked.connect(self.view_person_details)
         
@@ -104,7 +104,8 @@ class PersonsPage(BasePage):
                 'offset': self.current_page * self.page_size,
                 'limit': self.page_size,
                 'search_term': self.search_edit.text() if hasattr(self, 'search_edit') else None,
-                'alive_only': self.alive_checkbox.isChecked() if hasattr(self, 'alive_checkbox') else False
+                'alive_only': self.alive_checkbox.isChecked() if hasattr(self, 'alive_checkbox') else False,
+                'with_facets': self.current_page == 0
             }
             
             if hasattr(self, 'country_combo') and self.country_combo.currentData():
@@ -115,6 +116,10 @@ class PersonsPage(BasePage):
             self.persons_table.clear()
             self.total_count = result['total_count']
             
+            # Число персон каждой страны при текущих фильтрах
+            if 'facets' in result:
+                self.fill_facet_combo(self.country_combo, "Все страны", result['facets']['country'])
+            
             for person in result['persons']:
                 item = QTreeWidgetItem([
                     str(person['person_id']),
@@ -127,6 +132,9 @@ class PersonsPage(BasePage):
                 item.setData(0, Qt.ItemDataRole.UserRole, person)
                 self.persons_table.addTopLevelItem(item)
             
+            # Количество связей для всей страницы одним запросом
+            self.fill_relationship_counts(self.persons_table, 6, 'PERSON', 'person_id')
+            
             # Обновляем пагинацию
             self.update_pagination()
             
@@ -1,4 +1,33 @@
 from ui.pages.base_page import *
+
+# Пауза ввода перед запуском поиска и минимальная длина запроса
+SEARCH_DEBOUNCE_MS = 300
+MIN_QUERY_LENGTH = 2
+
+# Запрос, на результатах которого пользователь задержался, учитывается как выбранный
+SEARCH_COMMIT_DELAY_MS = 3000
+
+# Подписи типов результатов и фасетов единого индекса
+SEARCH_TYPE_TITLES = {
+    'persons': 'Персоны',
+    'countries': 'Страны',
+    'events': 'События',
+    'documents': 'Документы',
+    'sources': 'Источники'
+}
+FACET_TITLES = {
+    'entity_type': 'Тип',
+    'event_type': 'Тип события',
+    'century': 'Век',
+    'country': 'Страна',
+    'source_type': 'Тип источника'
+}
+
+class SearchResultRelay(QObject):
+    """Передача результатов поиска из потоков пула в поток интерфейса"""
+    type_ready = pyqtSignal(int, str, object)
+    finished = pyqtSignal(int, object)
+
 class SearchPage(BasePage):
     def __init__(self, user_data):
         from services.search_service import SearchService
@@ -23,6 +52,7 @@ class SearchPage(BasePage):
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("Введите поисковый запрос...")
         self.search_edit.returnPressed.connect(self.perform_search)
+        self.search_edit.textChanged.connect(self.on_search_input_changed)
         search_input_layout.addWidget(self.search_edit)
         
         self.search_btn = QPushButton("Найти")
@@ -55,14 +85,31 @@ class SearchPage(BasePage):
         self.search_sources.setChecked(True)
         types_layout.addWidget(self.search_sources)
         
+        for checkbox in (self.search_persons, self.search_countries, self.search_events,
+                         self.search_documents, self.search_sources):
+            checkbox.toggled.connect(self.on_search_input_changed)
+        
         types_layout.addStretch()
         
         search_layout.addLayout(types_layout)
         layout.addWidget(search_group)
         
-        # Результаты поиска
+        # Результаты поиска и фасеты найденного
+        results_layout = QHBoxLayout()
         self.results_tabs = QTabWidget()
-        layout.addWidget(self.results_tabs)
+        results_layout.addWidget(self.results_tabs, 3)
+        
+        self.facets_tree = QTreeWidget()
+        self.facets_tree.setHeaderLabels(["Фасет", "Найдено"])
+        self.facets_tree.setVisible(False)
+        results_layout.addWidget(self.facets_tree, 1)
+        layout.addLayout(results_layout)
+        
+        # Общий рейтинг по всем типам (только при поиске по единому индексу)
+        self.ranked_results = QTreeWidget()
+        self.ranked_results.setHeaderLabels(["Тип", "Название", "Описание"])
+        self.results_tabs.addTab(self.ranked_results, "Все")
+        self.results_tabs.setTabVisible(0, False)
         
         # Создаем вкладки для каждого типа
         self.persons_results = QTreeWidget()
@@ -88,15 +135,31 @@ class SearchPage(BasePage):
         # Статистика поиска
         self.stats_label = QLabel("Введите запрос для поиска")
         layout.addWidget(self.stats_label)
-    
-    def perform_search(self):
-        """Выполнение поиска"""
-        query = self.search_edit.text().strip()
-        if not query:
-            QMessageBox.warning(self, "Предупреждение", "Введите поисковый запрос")
-            return
         
-        # Определяем типы для поиска
+        # Поиск по мере ввода: запускается после паузы, новый запрос отменяет предыдущий
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.on_search_timer)
+        
+        # В статистику запросов и журнал аудита попадают только выбранные запросы, а не каждый набранный префикс
+        self.commit_timer = QTimer(self)
+        self.commit_timer.setSingleShot(True)
+        self.commit_timer.setInterval(SEARCH_COMMIT_DELAY_MS)
+        self.commit_timer.timeout.connect(self.commit_search)
+        
+        self.search_relay = SearchResultRelay(self)
+        self.search_relay.type_ready.connect(self.on_type_results)
+        self.search_relay.finished.connect(self.on_search_finished)
+        
+        self.search_generation = 0
+        self.active_search = None
+        self.found_count = 0
+        self.commit_requested = False
+        self.uncommitted_summary = None
+    
+    def selected_search_types(self):
+        """Отмеченные типы для поиска"""
         search_types = []
         if self.search_persons.isChecked():
             search_types.append('persons')
@@ -108,46 +171,161 @@ class SearchPage(BasePage):
             search_types.append('documents')
         if self.search_sources.isChecked():
             search_types.append('sources')
+        return search_types
+    
+    def perform_search(self):
+        """Выполнение поиска по кнопке или Enter"""
+        query = self.search_edit.text().strip()
+        if not query:
+            QMessageBox.warning(self, "Предупреждение", "Введите поисковый запрос")
+            return
         
+        search_types = self.selected_search_types()
         if not search_types:
             QMessageBox.warning(self, "Предупреждение", "Выберите хотя бы один тип для поиска")
             return
         
+        self.search_timer.stop()
+        self.start_search(query, search_types, commit=True)
+    
+    def on_search_input_changed(self):
+        """Перезапуск отложенного поиска при каждом изменении запроса или типов"""
+        self.commit_timer.stop()
+        self.search_timer.start()
+    
+    def on_search_timer(self):
+        """Поиск после паузы ввода"""
+        query = self.search_edit.text().strip()
+        search_types = self.selected_search_types()
+        
+        if len(query) < MIN_QUERY_LENGTH or not search_types:
+            self.cancel_active_search()
+            return
+        
+        self.start_search(query, search_types)
+    
+    def start_search(self, query, search_types, commit=False):
+        """Запуск фонового поиска; незавершенный предыдущий поиск отменяется
+        
+        commit — запрос подтвержден пользователем и учитывается сразу после завершения поиска.
+        """
+        self.cancel_active_search()
+        self.commit_timer.stop()
+        self.commit_requested = commit
+        self.uncommitted_summary = None
+        
+        # Результаты приходят с номером поиска, устаревшие отбрасываются
+        self.search_generation += 1
+        generation = self.search_generation
+        
+        self.clear_results()
+        self.found_count = 0
+        self.stats_label.setText("Поиск...")
+        
         try:
-            # Выполняем поиск
-            results = self.search_service.global_search(
+            self.active_search = self.search_service.start_incremental_search(
                 self.user_data['user_id'],
                 query,
                 search_types,
-                limit_per_type=20
+                limit_per_type=20,
+                on_result=lambda search_type, result: self.search_relay.type_ready.emit(generation, search_type, result),
+                on_finished=lambda summary: self.search_relay.finished.emit(generation, summary)
             )
-            
-            # Очищаем предыдущие результаты
-            self.clear_results()
-            
-            # Заполняем результаты
-            self.populate_results(results)
-            
-            # Обновляем статистику
-            total_found = results['total_found']
-            self.stats_label.setText(f"Найдено результатов: {total_found}")
-            
         except Exception as e:
             QMessageBox.critical(self, "Ошибка поиска", f"Произошла ошибка: {str(e)}")
     
+    def cancel_active_search(self):
+        """Отмена выполняющегося поиска (включая запросы в БД)"""
+        if self.active_search is not None:
+            self.active_search.cancel()
+            self.active_search = None
+    
+    def on_type_results(self, generation, search_type, result):
+        """Результаты одного типа по мере готовности"""
+        if generation != self.search_generation:
+            return
+        
+        self.populate_type_results(search_type, result['items'])
+        self.found_count += result['count']
+        self.stats_label.setText(f"Найдено результатов: {self.found_count} (поиск продолжается...)")
+    
+    def on_search_finished(self, generation, summary):
+        """Завершение поиска по всем типам"""
+        if generation != self.search_generation:
+            return
+        
+        self.active_search = None
+        self.populate_ranked_results(summary.get('ranked') or [])
+        self.populate_facets(summary.get('facets') or {})
+        
+        stats_text = f"Найдено результатов: {summary['total_found']}"
+        if summary.get('timed_out'):
+            stats_text += f" (превышено время поиска: {', '.join(summary['timed_out'])})"
+        if summary.get('failed'):
+            stats_text += f" (ошибка поиска: {', '.join(summary['failed'])})"
+        self.stats_label.setText(stats_text)
+        
+        self.uncommitted_summary = summary
+        if self.commit_requested:
+            self.commit_search()
+        else:
+            self.commit_timer.start()
+    
+    def commit_search(self):
+        """Учет показанного запроса в статистике запросов и журнале аудита (один раз на поиск)"""
+        summary = self.uncommitted_summary
+        if summary is None:
+            return
+        
+        self.uncommitted_summary = None
+        self.search_service.commit_search(self.user_data['user_id'], summary['search_text'], summary['total_found'])
+    
+    def populate_ranked_results(self, ranked):
+        """Общий рейтинг найденного по всем типам"""
+        self.ranked_results.clear()
+        for entry in ranked:
+            item = QTreeWidgetItem([
+                SEARCH_TYPE_TITLES[entry['type']],
+                entry['name'],
+                entry.get('subtitle') or ''
+            ])
+            item.setData(0, Qt.ItemDataRole.UserRole, entry)
+            self.ranked_results.addTopLevelItem(item)
+        
+        self.results_tabs.setTabVisible(0, bool(ranked))
+        if ranked:
+            self.results_tabs.setCurrentIndex(0)
+    
+    def populate_facets(self, facets):
+        """Счетчики найденного по фасетам"""
+        self.facets_tree.clear()
+        for facet, values in facets.items():
+            if not values:
+                continue
+            facet_item = QTreeWidgetItem([FACET_TITLES.get(facet, facet), ''])
+            for value in values:
+                label = SEARCH_TYPE_TITLES.get(value['label'], value['label']) if facet == 'entity_type' else value['label']
+                facet_item.addChild(QTreeWidgetItem([str(label), str(value['count'])]))
+            self.facets_tree.addTopLevelItem(facet_item)
+            facet_item.setExpanded(True)
+        
+        self.facets_tree.setVisible(self.facets_tree.topLevelItemCount() > 0)
+    
     def clear_results(self):
         """Очистка результатов поиска"""
+        self.ranked_results.clear()
+        self.facets_tree.clear()
         self.persons_results.clear()
         self.countries_results.clear()
         self.events_results.clear()
         self.documents_results.clear()
         self.sources_results.clear()
     
-    def populate_results(self, results):
-        """Заполнение результатов поиска"""
+    def populate_type_results(self, search_type, items):
+        """Заполнение вкладки результатов одного типа"""
         # Персоны
-        if 'persons' in results['results']:
-            for person in results['results']['persons']['items']:
+        if search_type == 'persons':
+            for person in items:
                 item = QTreeWidgetItem([
                     str(person['person_id']),
                     person.get('full_name', person['name']),
@@ -157,8 +335,8 @@ class SearchPage(BasePage):
                 self.persons_results.addTopLevelItem(item)
         
         # Страны
-        if 'countries' in results['results']:
-            for country in results['results']['countries']['items']:
+        if search_type == 'countries':
+            for country in items:
                 item = QTreeWidgetItem([
                     str(country['country_id']),
                     country['name'],
@@ -168,8 +346,8 @@ class SearchPage(BasePage):
                 self.countries_results.addTopLevelItem(item)
         
         # События
-        if 'events' in results['results']:
-            for event in results['results']['events']['items']:
+        if search_type == 'events':
+            for event in items:
                 item = QTreeWidgetItem([
                     str(event['event_id']),
                     event['name'],
@@ -179,8 +357,8 @@ class SearchPage(BasePage):
                 self.events_results.addTopLevelItem(item)
         
         # Документы
-        if 'documents' in results['results']:
-            for document in results['results']['documents']['items']:
+        if search_type == 'documents':
+            for document in items:
                 item = QTreeWidgetItem([
                     str(document['document_id']),
                     document['name'],
@@ -190,8 +368,8 @@ class SearchPage(BasePage):
                 self.documents_results.addTopLevelItem(item)
         
         # Источники
-        if 'sources' in results['results']:
-            for source in results['results']['sources']['items']:
+        if search_type == 'sources':
+            for source in items:
                 item = QTreeWidgetItem([
                     str(source['source_id']),
                     source['name'],
@@ -201,6 +379,8 @@ class SearchPage(BasePage):
                 self.sources_results.addTopLevelItem(item)
     
     def refresh(self):
-        """Обновление - повторный поиск с теми же параметрами"""
-        if self.search_edit.text().strip():
-            self.perform_search()
\ No newline at end of file
+        """Обновление - повторный поиск с теми же параметрами (учитывается, только если пользователь на нем задержится)"""
+        query = self.search_edit.text().strip()
+        search_types = self.selected_search_types()
+        if len(query) >= MIN_QUERY_LENGTH and search_types:
+            self.start_search(query, search_types)
\ No newline at end of file
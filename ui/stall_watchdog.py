@@ -0,0 +1,150 @@
+# ui/stall_watchdog.py
+"""
+Сторож зависаний GUI-потока
+"""
+
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from PyQt6.QtCore import QObject, QTimer, Qt
+from config import APP_CONFIG
+from core.metrics import metrics
+from utils.profiling import action_profiler, ui_stalls
+
+logger = logging.getLogger(__name__)
+
+stall_duration = metrics.histogram(
+    'ui_stall_duration_seconds', 'Длительность зависаний GUI-потока', ('action',),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+# Глубина сохраняемого стека главного потока
+STACK_LIMIT = 40
+
+class StallWatchdog(QObject):
+    """Обнаружение зависаний цикла событий Qt дольше порога"""
+
+    _instance: Optional['StallWatchdog'] = None
+
+    def __init__(self, threshold_ms: int = None, keep_worst: int = None, parent=None):
+        super().__init__(parent)
+        threshold_ms = threshold_ms or APP_CONFIG.stall_threshold_ms
+        self.threshold = threshold_ms / 1000
+        self.keep_worst = keep_worst or APP_CONFIG.stall_keep_worst
+
+        # Пульс главного потока идет чаще порога, чтобы задержка таймера не давала ложных срабатываний
+        self.heartbeat_interval = max(10, threshold_ms // 4) / 1000
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(int(self.heartbeat_interval * 1000))
+        self._timer.timeout.connect(self._heartbeat)
+
+        self._main_thread_id = threading.main_thread().ident
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_beat = time.monotonic()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._worst: List[tuple] = []
+        self._sequence = itertools.count()
+
+    @classmethod
+    def instance(cls) -> Optional['StallWatchdog']:
+        """Запущенный экземпляр сторожа"""
+        return cls._instance
+
+    def start(self) -> None:
+        """Запуск сторожа (вызывается из главного потока)"""
+        with self._lock:
+            self._last_beat = time.monotonic()
+            self._pending = None
+        self._stop_event.clear()
+        self._timer.start()
+
+        self._thread = threading.Thread(target=self._watch, name='StallWatchdog', daemon=True)
+        self._thread.start()
+        StallWatchdog._instance = self
+        logger.info(f"GUI stall watchdog started, threshold {self.threshold * 1000:.0f} ms")
+
+    def stop(self) -> None:
+        """Остановка сторожа"""
+        self._timer.stop()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if StallWatchdog._instance is self:
+            StallWatchdog._instance = None
+
+    def _heartbeat(self) -> None:
+        """Пульс цикла событий; завершает запись обнаруженного зависания"""
+        now = time.monotonic()
+        with self._lock:
+            gap = now - self._last_beat
+            self._last_beat = now
+            pending = self._pending
+            self._pending = None
+
+        stall = gap - self.heartbeat_interval
+        if stall >= self.threshold:
+            self._record(stall, pending)
+
+    def _watch(self) -> None:
+        """Фоновый поток: снимает стек главного потока, пока тот заблокирован"""
+        check_interval = self.heartbeat_interval / 2
+        while not self._stop_event.wait(check_interval):
+            with self._lock:
+                blocked_for = time.monotonic() - self._last_beat - self.heartbeat_interval
+                if blocked_for < self.threshold or self._pending is not None:
+                    continue
+            snapshot = self._capture()
+            with self._lock:
+                if self._pending is None:
+                    self._pending = snapshot
+
+    def _capture(self) -> Dict[str, Any]:
+        """Снимок стека и активного действия главного потока"""
+        frame = sys._current_frames().get(self._main_thread_id)
+        stack = ''.join(traceback.format_stack(frame, STACK_LIMIT)) if frame is not None else ''
+        return {
+            'action': action_profiler.current_action(self._main_thread_id),
+            'action_chain': action_profiler.action_chain(self._main_thread_id),
+            'stack': stack
+        }
+
+    def _record(self, duration: float, snapshot: Optional[Dict[str, Any]]) -> None:
+        """Запись зависания в журнал, метрики и список худших"""
+        snapshot = snapshot or {'action': None, 'action_chain': [], 'stack': ''}
+        record = {
+            'timestamp': datetime.now(),
+            'duration_ms': round(duration * 1000, 1),
+            'action': snapshot['action'],
+            'action_chain': snapshot['action_chain'],
+            'stack': snapshot['stack']
+        }
+
+        ui_stalls.inc()
+        stall_duration.observe(duration, action=record['action'] or 'none')
+
+        chain = ' > '.join(record['action_chain']) or 'нет активного действия'
+        logger.warning(
+            f"GUI thread stalled for {record['duration_ms']} ms ({chain})\n"
+            f"{record['stack'] or 'stack was not captured'}"
+        )
+
+        with self._lock:
+            item = (duration, next(self._sequence), record)
+            if len(self._worst) < self.keep_worst:
+                heapq.heappush(self._worst, item)
+            else:
+                heapq.heappushpop(self._worst, item)
+
+    def worst_stalls(self) -> List[Dict[str, Any]]:
+        """Худшие зависания за время работы, от самого долгого"""
+        with self._lock:
+            return [record for _, _, record in sorted(self._worst, reverse=True)]
@@ -0,0 +1,132 @@
+# ui/window_tracker.py
+"""
+Отслеживание жизненного цикла окон: прирост памяти и неосвобожденные окна
+"""
+
+import gc
+import logging
+import time
+import weakref
+from typing import Any, Dict, List
+from PyQt6.QtWidgets import QDialog, QMainWindow
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from config import APP_CONFIG
+from core.metrics import metrics
+from utils.memory_profiling import memory_profiler
+
+logger = logging.getLogger(__name__)
+
+windows_alive = metrics.gauge('ui_windows_alive', 'Живые окна и диалоги после закрытия', ('window',))
+windows_leaked = metrics.counter('ui_windows_leaked_total', 'Окна, не освобожденные после закрытия', ('window',))
+
+class WindowLifecycleTracker(QObject):
+    """Фильтр событий приложения, отслеживающий открытие и закрытие окон"""
+
+    LEAK_CHECK_INTERVAL_MS = 60000
+
+    def __init__(self, leak_grace_seconds: int = None, parent=None):
+        super().__init__(parent)
+        self.leak_grace_seconds = leak_grace_seconds or APP_CONFIG.memory_leak_grace_seconds
+        self._open: Dict[int, Dict[str, Any]] = {}
+        self._closed: Dict[int, Dict[str, Any]] = {}
+        self._leak_timer = QTimer(self)
+        self._leak_timer.timeout.connect(self.check_leaks)
+
+    def install(self, app) -> None:
+        """Установка фильтра на приложение"""
+        app.installEventFilter(self)
+        self._leak_timer.start(self.LEAK_CHECK_INTERVAL_MS)
+        logger.info("Window lifecycle tracking enabled")
+
+    def uninstall(self, app) -> None:
+        """Снятие фильтра с итоговой проверкой утечек"""
+        self._leak_timer.stop()
+        app.removeEventFilter(self)
+        self.check_leaks(grace_seconds=0)
+
+    def eventFilter(self, obj, event):
+        if isinstance(obj, (QMainWindow, QDialog)) and obj.isWindow():
+            if event.type() == QEvent.Type.Show:
+                self._on_show(obj)
+            elif event.type() == QEvent.Type.Hide and not event.spontaneous():
+                # Несамопроизвольное скрытие — закрытие окна или accept/reject диалога
+                self._on_hide(obj)
+        return False
+
+    def _on_show(self, window) -> None:
+        key = id(window)
+        entry = self._open.get(key)
+        if entry is not None and entry['ref']() is window:
+            return
+
+        # Повторно открытое окно не считается утечкой
+        self._closed.pop(key, None)
+        self._open[key] = {
+            'ref': weakref.ref(window),
+            'name': type(window).__name__,
+            'baseline': memory_profiler.take_snapshot()
+        }
+
+    def _on_hide(self, window) -> None:
+        key = id(window)
+        entry = self._open.pop(key, None)
+        if entry is None or entry['ref']() is not window:
+            return
+
+        entry['closed_at'] = time.monotonic()
+        entry['reported'] = False
+        self._closed[key] = entry
+
+        # Снимок после того, как обработчики закрытия отработают
+        QTimer.singleShot(0, lambda: self._report_retained(entry))
+
+    def _report_retained(self, entry: Dict[str, Any]) -> None:
+        """Отчет о памяти, оставшейся после закрытия окна"""
+        baseline = entry.pop('baseline', None)
+        if baseline is None:
+            return
+        gc.collect()
+        after = memory_profiler.take_snapshot()
+        if after is None:
+            return
+        report = memory_profiler.compare(f"window.{entry['name']} lifecycle (after close)", baseline, after)
+        if report:
+            memory_profiler.write_report(report)
+
+    def check_leaks(self, grace_seconds: int = None) -> List[str]:
+        """Поиск окон, не освобожденных после закрытия"""
+        if grace_seconds is None:
+            grace_seconds = self.leak_grace_seconds
+
+        gc.collect()
+        now = time.monotonic()
+        leaked = []
+        alive_counts: Dict[str, int] = {}
+
+        for key, entry in list(self._closed.items()):
+            window = entry['ref']()
+            if window is None:
+                del self._closed[key]
+                continue
+
+            alive_counts[entry['name']] = alive_counts.get(entry['name'], 0) + 1
+            if now - entry['closed_at'] < grace_seconds or entry['reported']:
+                continue
+
+            entry['reported'] = True
+            leaked.append(entry['name'])
+            windows_leaked.inc(window=entry['name'])
+            logger.warning(
+                f"{entry['name']} is still alive {now - entry['closed_at']:.0f} s after being closed "
+                f"(parent: {type(window.parent()).__name__ if window.parent() else 'none'})"
+            )
+
+        for name in set(windows_alive.series()) | {(name,) for name in alive_counts}:
+            window_name = name[0]
+            windows_alive.set(alive_counts.get(window_name, 0), window=window_name)
+
+        if leaked and memory_profiler.enabled:
+            memory_profiler.write_report(
+                "Windows not freed after close: " + ', '.join(sorted(set(leaked)))
+            )
+        return leaked
@@ -1,10 +1,12 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 from services.country_service import CountryService
 from services.relationship_service import RelationshipService
 from  utils.date_helpers import safe_date_convert
 class CountryDetailsWindow(QMainWindow):
+    @profile_action('window.CountryDetailsWindow.open')
     def __init__(self, country_data, user_data, parent=None):
         super().__init__(parent)
         self.country_data = country_data
@@ -637,6 +639,7 @@ class CountryDetailsWindow(QMainWindow):
 class CountryEditRequestDialog(QDialog):
     """Диалог для создания заявки на редактирование страны"""
     
+    @profile_action('dialog.CountryEditRequestDialog.open')
     def __init__(self, user_data, country_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
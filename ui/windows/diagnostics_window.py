@@ -0,0 +1,282 @@
+# ui/windows/diagnostics_window.py
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+from utils.profiling import profile_action
+from core.background import background_executor
+from core.database import DatabaseConnection
+from core.metrics import metrics
+from ui.stall_watchdog import StallWatchdog
+
+class HealthCheckRelay(QObject):
+    """Передача результата проверки БД из фонового потока в поток интерфейса"""
+    checked = pyqtSignal(object)
+
+class DiagnosticsWindow(QDialog):
+    """Окно диагностики: пул соединений, кэш, медленные функции, аудит и GUI-поток"""
+
+    REFRESH_INTERVAL_MS = 5000
+    SLOW_FUNCTIONS_LIMIT = 15
+
+    @profile_action('dialog.DiagnosticsWindow.open')
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.db = DatabaseConnection()
+        self.health_relay = HealthCheckRelay(self)
+        self.health_relay.checked.connect(self.on_health_checked)
+        self.health_check_running = False
+        self.setup_ui()
+        self.refresh()
+        self.check_database()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(self.REFRESH_INTERVAL_MS)
+
+    def setup_ui(self):
+        self.setWindowTitle("Диагностика")
+        self.resize(800, 600)
+
+        layout = QVBoxLayout(self)
+
+        # Пул соединений и общее состояние
+        summary_layout = QHBoxLayout()
+
+        pool_group = QGroupBox("Пул соединений")
+        pool_layout = QFormLayout(pool_group)
+        self.db_status_label = QLabel()
+        self.response_time_label = QLabel()
+        self.pool_size_label = QLabel()
+        self.pool_available_label = QLabel()
+        self.pool_waiting_label = QLabel()
+        pool_layout.addRow("Состояние:", self.db_status_label)
+        pool_layout.addRow("Время отклика:", self.response_time_label)
+        pool_layout.addRow("Размер пула:", self.pool_size_label)
+        pool_layout.addRow("Свободно:", self.pool_available_label)
+        pool_layout.addRow("Ожидают соединения:", self.pool_waiting_label)
+        summary_layout.addWidget(pool_group)
+
+        audit_group = QGroupBox("Аудит и GUI-поток")
+        audit_layout = QFormLayout(audit_group)
+        self.audit_in_flight_label = QLabel()
+        self.audit_written_label = QLabel()
+        self.audit_failed_label = QLabel()
+        self.audit_latency_label = QLabel()
+        self.stalls_label = QLabel()
+        audit_layout.addRow("Записи аудита в процессе:", self.audit_in_flight_label)
+        audit_layout.addRow("Записано:", self.audit_written_label)
+        audit_layout.addRow("Ошибок записи:", self.audit_failed_label)
+        audit_layout.addRow("Среднее время записи:", self.audit_latency_label)
+        audit_layout.addRow("Зависаний GUI-потока:", self.stalls_label)
+        summary_layout.addWidget(audit_group)
+
+        layout.addLayout(summary_layout)
+
+        # Кэш
+        cache_group = QGroupBox("Кэш")
+        cache_layout = QVBoxLayout(cache_group)
+        self.cache_table = QTableWidget()
+        self.cache_table.setColumnCount(4)
+        self.cache_table.setHorizontalHeaderLabels(["Кэш", "Попадания", "Промахи", "Доля попаданий"])
+        self.cache_table.horizontalHeader().setStretchLastSection(True)
+        self.cache_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.cache_table.setMaximumHeight(120)
+        cache_layout.addWidget(self.cache_table)
+        layout.addWidget(cache_group)
+
+        # Медленные хранимые функции
+        slow_group = QGroupBox("Медленные вызовы БД")
+        slow_layout = QVBoxLayout(slow_group)
+        self.slow_table = QTableWidget()
+        self.slow_table.setColumnCount(6)
+        self.slow_table.setHorizontalHeaderLabels([
+            "Функция", "Тип", "Вызовов", "Среднее, мс", "Максимум, мс", "Медленных"
+        ])
+        header = self.slow_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.slow_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.slow_table.setAlternatingRowColors(True)
+        slow_layout.addWidget(self.slow_table)
+        layout.addWidget(slow_group)
+
+        # Худшие зависания GUI-потока
+        stalls_group = QGroupBox("Худшие зависания GUI-потока")
+        stalls_layout = QVBoxLayout(stalls_group)
+        self.stalls_table = QTableWidget()
+        self.stalls_table.setColumnCount(3)
+        self.stalls_table.setHorizontalHeaderLabels(["Время", "Длительность, мс", "Действие"])
+        self.stalls_table.horizontalHeader().setStretchLastSection(True)
+        self.stalls_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.stalls_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.stalls_table.itemDoubleClicked.connect(self.show_stall_stack)
+        stalls_layout.addWidget(self.stalls_table)
+        layout.addWidget(stalls_group)
+
+        # Кнопки
+        buttons_layout = QHBoxLayout()
+
+        export_btn = QPushButton("Экспорт метрик...")
+        export_btn.clicked.connect(self.export_snapshot)
+        buttons_layout.addWidget(export_btn)
+
+        check_btn = QPushButton("Проверить БД")
+        check_btn.clicked.connect(self.check_database)
+        buttons_layout.addWidget(check_btn)
+
+        buttons_layout.addStretch()
+
+        refresh_btn = QPushButton("Обновить")
+        refresh_btn.clicked.connect(self.refresh)
+        buttons_layout.addWidget(refresh_btn)
+
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        buttons_layout.addWidget(close_btn)
+
+        layout.addLayout(buttons_layout)
+
+    def refresh(self):
+        """Обновление всех показателей"""
+        self.update_pool_stats()
+        self.update_audit_stats()
+        self.update_cache_stats()
+        self.update_slow_functions()
+        self.update_worst_stalls()
+
+    def update_pool_stats(self):
+        """Обновление статистики пула соединений (без обращения к БД: при исчерпанном пуле окно не зависает)"""
+        stats = self.db.pool_stats()
+        self.pool_size_label.setText(str(stats['pool_size']))
+        self.pool_available_label.setText(str(stats['pool_available']))
+        self.pool_waiting_label.setText(str(stats['requests_waiting']))
+
+    def check_database(self):
+        """Проверочный запрос к БД в фоновом потоке (при открытии окна и по кнопке)"""
+        if self.health_check_running:
+            return
+        self.health_check_running = True
+        self.db_status_label.setText("Проверка...")
+        self.db_status_label.setStyleSheet("")
+        background_executor.submit(self._run_health_check)
+
+    def _run_health_check(self):
+        health = self.db.health_check()
+        try:
+            self.health_relay.checked.emit(health)
+        except RuntimeError:
+            # Окно закрыто и удалено до завершения проверки
+            pass
+
+    def on_health_checked(self, health):
+        """Отображение результата проверки БД"""
+        self.health_check_running = False
+        if health.get('status') == 'healthy':
+            self.db_status_label.setText("Доступна")
+            self.db_status_label.setStyleSheet("color: green;")
+            self.db_status_label.setToolTip("")
+            self.response_time_label.setText(f"{health.get('response_time_ms', 0)} мс")
+        else:
+            self.db_status_label.setText("Недоступна")
+            self.db_status_label.setStyleSheet("color: red;")
+            self.db_status_label.setToolTip(health.get('error', ''))
+            self.response_time_label.setText("—")
+
+    def update_audit_stats(self):
+        """Обновление показателей аудита и зависаний GUI"""
+        in_flight = metrics.get('audit_writes_in_flight')
+        writes = metrics.get('audit_writes_total')
+        duration = metrics.get('audit_write_duration_seconds')
+        stalls = metrics.get('ui_stalls_total')
+
+        self.audit_in_flight_label.setText(str(int(in_flight.get())) if in_flight else "0")
+        self.audit_written_label.setText(str(int(writes.get(status='ok'))) if writes else "0")
+        self.audit_failed_label.setText(str(int(writes.get(status='error'))) if writes else "0")
+
+        duration_stats = duration.series().get(()) if duration else None
+        if duration_stats and duration_stats['count']:
+            self.audit_latency_label.setText(f"{duration_stats['avg'] * 1000:.1f} мс")
+        else:
+            self.audit_latency_label.setText("—")
+
+        self.stalls_label.setText(str(int(stalls.total())) if stalls else "0")
+
+    def update_cache_stats(self):
+        """Обновление статистики кэша"""
+        requests = metrics.get('cache_requests_total')
+        caches = {}
+        if requests:
+            for (cache_name, result), value in requests.series().items():
+                caches.setdefault(cache_name, {'hit': 0, 'miss': 0})[result] = value
+
+        self.cache_table.setRowCount(len(caches))
+        for row, (cache_name, counts) in enumerate(sorted(caches.items())):
+            total = counts['hit'] + counts['miss']
+            hit_rate = f"{counts['hit'] / total * 100:.1f}%" if total else "—"
+            self.cache_table.setItem(row, 0, QTableWidgetItem(cache_name))
+            self.cache_table.setItem(row, 1, QTableWidgetItem(str(int(counts['hit']))))
+            self.cache_table.setItem(row, 2, QTableWidgetItem(str(int(counts['miss']))))
+            self.cache_table.setItem(row, 3, QTableWidgetItem(hit_rate))
+
+    def update_slow_functions(self):
+        """Обновление списка самых медленных вызовов БД"""
+        duration = metrics.get('db_call_duration_seconds')
+        slow_calls = metrics.get('db_slow_calls_total')
+        rows = duration.top(self.SLOW_FUNCTIONS_LIMIT, sort_by='max') if duration else []
+        slow_counts = slow_calls.series() if slow_calls else {}
+
+        self.slow_table.setRowCount(len(rows))
+        for row, stats in enumerate(rows):
+            slow_count = slow_counts.get((stats['kind'], stats['name']), 0)
+            self.slow_table.setItem(row, 0, QTableWidgetItem(stats['name']))
+            self.slow_table.setItem(row, 1, QTableWidgetItem(stats['kind']))
+            self.slow_table.setItem(row, 2, QTableWidgetItem(str(stats['count'])))
+            self.slow_table.setItem(row, 3, QTableWidgetItem(f"{stats['avg'] * 1000:.1f}"))
+            self.slow_table.setItem(row, 4, QTableWidgetItem(f"{stats['max'] * 1000:.1f}"))
+            self.slow_table.setItem(row, 5, QTableWidgetItem(str(int(slow_count))))
+
+    def update_worst_stalls(self):
+        """Обновление списка худших зависаний GUI-потока"""
+        watchdog = StallWatchdog.instance()
+        stalls = watchdog.worst_stalls() if watchdog else []
+
+        self.stalls_table.setRowCount(len(stalls))
+        for row, stall in enumerate(stalls):
+            time_item = QTableWidgetItem(stall['timestamp'].strftime('%H:%M:%S'))
+            time_item.setData(Qt.ItemDataRole.UserRole, stall)
+            self.stalls_table.setItem(row, 0, time_item)
+            self.stalls_table.setItem(row, 1, QTableWidgetItem(f"{stall['duration_ms']:.1f}"))
+            action_item = QTableWidgetItem(' > '.join(stall['action_chain']) or "—")
+            action_item.setToolTip(stall['stack'])
+            self.stalls_table.setItem(row, 2, action_item)
+
+    def show_stall_stack(self, item):
+        """Показ стека главного потока в момент зависания"""
+        stall = self.stalls_table.item(item.row(), 0).data(Qt.ItemDataRole.UserRole)
+        if stall:
+            QMessageBox.information(
+                self, "Стек главного потока",
+                f"Зависание {stall['duration_ms']:.1f} мс\n\n{stall['stack'] or 'Стек не был захвачен'}"
+            )
+
+    def export_snapshot(self):
+        """Экспорт снимка метрик в текстовом формате Prometheus"""
+        try:
+            filename, _ = QFileDialog.getSaveFileName(
+                self,
+                "Сохранить снимок метрик",
+                f"metrics_{QDateTime.currentDateTime().toString('yyyyMMdd_hhmmss')}.prom",
+                "Prometheus Text (*.prom *.txt)"
+            )
+
+            if filename:
+                # Обновляем показатели пула перед снимком
+                self.db.pool_stats()
+                metrics.export_snapshot(filename)
+                QMessageBox.information(self, "Экспорт", f"Снимок метрик сохранен в {filename}")
+
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Произошла ошибка: {str(e)}")
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
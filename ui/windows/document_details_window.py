@@ -3,10 +3,13 @@ from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
+from utils.profiling import profile_action
+from utils.highlighting import get_highlighter, to_utf16_spans
 from services.document_service import DocumentService
 from services.relationship_service import RelationshipService
 
 class DocumentDetailsWindow(QMainWindow):
+    @profile_action('window.DocumentDetailsWindow.open')
     def __init__(self, document_data, user_data, parent=None):
         super().__init__(parent)
         self.document_data = document_data
@@ -393,25 +396,25 @@ class DocumentDetailsWindow(QMainWindow):
         # Очищаем предыдущие результаты
         self.clear_search_highlights()
         
-        # Выполняем поиск
-        document = self.content_text.document()
-        self.current_matches = []
-        
-        cursor = QTextCursor(document)
-        cursor.beginEditBlock()
+        # Все слова запроса ищутся за один проход по тексту без учета регистра
+        text = self.content_text.toPlainText()
+        self.current_matches = to_utf16_spans(text, get_highlighter(search_text).spans(text))
         
         # Формат выделения
         highlight_format = QTextCharFormat()
         highlight_format.setBackground(QColor(255, 255, 0, 100))  # Желтый с прозрачностью
         
-        # Ищем все вхождения
-        search_cursor = document.find(search_text)
-        while not search_cursor.isNull():
-            self.current_matches.append(search_cursor.position())
-            search_cursor.setCharFormat(highlight_format)
-            search_cursor = document.find(search_text, search_cursor)
-        
-        cursor.endEditBlock()
+        # Выделение накладывается поверх текста, не изменяя документ
+        document = self.content_text.document()
+        selections = []
+        for start, end in self.current_matches:
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(document)
+            selection.cursor.setPosition(start)
+            selection.cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            selection.format = highlight_format
+            selections.append(selection)
+        self.content_text.setExtraSelections(selections)
         
         # Обновляем UI
         if self.current_matches:
@@ -427,12 +430,7 @@ class DocumentDetailsWindow(QMainWindow):
     
     def clear_search_highlights(self):
         """Очистка выделения поиска"""
-        cursor = QTextCursor(self.content_text.document())
-        cursor.select(QTextCursor.SelectionType.Document)
-        
-        # Сброс форматирования
-        format = QTextCharFormat()
-        cursor.setCharFormat(format)
+        self.content_text.setExtraSelections([])
         
         self.current_matches = []
         self.current_match_index = -1
@@ -457,9 +455,10 @@ class DocumentDetailsWindow(QMainWindow):
     def goto_match(self, index):
         """Переход к конкретному совпадению"""
         if 0 <= index < len(self.current_matches):
+            start, end = self.current_matches[index]
             cursor = self.content_text.textCursor()
-            cursor.setPosition(self.current_matches[index])
-            cursor.movePosition(QTextCursor.MoveOperation.Right, QTextCursor.MoveMode.KeepAnchor, len(self.text_search.text()))
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
             self.content_text.setTextCursor(cursor)
             self.content_text.ensureCursorVisible()
     
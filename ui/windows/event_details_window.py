@@ -2,8 +2,10 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 
 class EventDetailsWindow(QMainWindow):
+    @profile_action('window.EventDetailsWindow.open')
     def __init__(self, event_data, user_data, parent=None):
         super().__init__(parent)
         self.event_data = event_data
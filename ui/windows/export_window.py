@@ -1,8 +1,10 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 
 class ExportWindow(QDialog):
+    @profile_action('dialog.ExportWindow.open')
     def __init__(self, user_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -454,6 +456,7 @@ class ExportWindow(QDialog):
 class AdvancedExportDialog(QDialog):
     """Расширенный диалог экспорта с дополнительными возможностями"""
     
+    @profile_action('dialog.AdvancedExportDialog.open')
     def __init__(self, user_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -525,23 +528,42 @@ class AdvancedExportDialog(QDialog):
     def export_relationships(self):
         """Экспорт структуры связей"""
         try:
+            from utils.edge_list_io import EXPORT_FILE_FILTER
             filename, _ = QFileDialog.getSaveFileName(
                 self,
                 "Сохранить экспорт связей",
-                "relationships_structure.json",
-                "JSON Files (*.json);;CSV Files (*.csv)"
+                "relationships_structure.jsonl.gz",
+                EXPORT_FILE_FILTER
             )
             
             if filename:
                 from services.relationship_service import RelationshipService
                 rel_service = RelationshipService()
                 
-                # Здесь должен быть метод экспорта связей
-                QMessageBox.information(
-                    self,
-                    "Функция в разработке",
-                    "Экспорт связей будет доступен в следующей версии"
+                progress = QProgressDialog("Экспорт связей...", "Отмена", 0, 0, self)
+                progress.setWindowModality(Qt.WindowModality.WindowModal)
+                progress.show()
+                
+                def on_progress(table, exported):
+                    progress.setLabelText(f"Экспорт связей: {table} — {exported}")
+                    QApplication.processEvents()
+                    return not progress.wasCanceled()
+                
+                result = rel_service.export_relationships(
+                    self.user_data['user_id'], filename, progress_callback=on_progress
                 )
+                progress.hide()
+                
+                if result['success']:
+                    QMessageBox.information(
+                        self,
+                        "Экспорт завершен",
+                        f"{'Экспорт прерван. ' if result['cancelled'] else ''}"
+                        f"Экспортировано связей: {result['exported_count']}\n"
+                        f"Файл: {filename}"
+                    )
+                else:
+                    QMessageBox.warning(self, "Ошибка экспорта", result['message'])
                 
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Произошла ошибка: {str(e)}")
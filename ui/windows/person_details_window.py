@@ -1,10 +1,12 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 from services.person_service import PersonService
 from services.relationship_service import RelationshipService
 
 class PersonDetailsWindow(QMainWindow):
+    @profile_action('window.PersonDetailsWindow.open')
     def __init__(self, person_data, user_data, parent=None):
         super().__init__(parent)
         self.person_data = person_data
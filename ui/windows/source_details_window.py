@@ -2,12 +2,14 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 from services.source_service import SourceService
 from services.relationship_service import RelationshipService
 import re
 from urllib.parse import urlparse
 
 class SourceDetailsWindow(QMainWindow):
+    @profile_action('window.SourceDetailsWindow.open')
     def __init__(self, source_data, user_data, parent=None):
         super().__init__(parent)
         self.source_data = source_data
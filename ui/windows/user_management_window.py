@@ -2,9 +2,11 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
+from utils.profiling import profile_action
 from services import UserService
 
 class UserManagementWindow(QDialog):
+    @profile_action('dialog.UserManagementWindow.open')
     def __init__(self, user_data, parent=None):
         super().__init__(parent)
         self.user_data = user_data
@@ -311,6 +313,7 @@ class UserManagementWindow(QDialog):
 class UserActivityDialog(QDialog):
     """Диалог для просмотра активности пользователя"""
     
+    @profile_action('dialog.UserActivityDialog.open')
     def __init__(self, user, admin_data, parent=None):
         super().__init__(parent)
         self.user = user
@@ -0,0 +1,37 @@
+"""
+Лента изменений сущностей внутри приложения: подписчики узнают о создании, изменении и удалении
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Обработчик: тип сущности, id, операция (CREATE/UPDATE/DELETE), новые данные
+ChangeHandler = Callable[[str, int, str, Dict[str, Any]], None]
+
+class EntityChangeFeed:
+    """Синхронная рассылка изменений сущностей подписчикам (индексы и кэши в памяти)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: List[ChangeHandler] = []
+
+    def subscribe(self, handler: ChangeHandler) -> None:
+        """Подписка на изменения"""
+        with self._lock:
+            self._handlers.append(handler)
+
+    def publish(self, entity_type: str, entity_id: int, operation: str, data: Dict[str, Any] = None) -> None:
+        """Рассылка изменения; ошибка подписчика не прерывает операцию"""
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            try:
+                handler(entity_type, entity_id, operation, data or {})
+            except Exception as e:
+                logger.error(f"Change handler {getattr(handler, '__name__', handler)} failed: {e}")
+
+# Глобальная лента изменений
+entity_changes = EntityChangeFeed()
@@ -30,4 +30,18 @@ def safe_date_convert(date_value: Union[QDate, date, None]) -> Optional[date]:
                 return date(date_value.year(), date_value.month(), date_value.day())
         except:
             pass
-        return None
\ No newline at end of file
+        return None
+
+_ROMAN_NUMERALS = ((1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'), (100, 'C'), (90, 'XC'),
+                   (50, 'L'), (40, 'XL'), (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I'))
+
+def century_label(century: Optional[int]) -> str:
+    """Подпись века римскими цифрами (отрицательный век — до н. э.)"""
+    if not century:
+        return "Дата не указана"
+    number = abs(century)
+    roman = ''
+    for value, numeral in _ROMAN_NUMERALS:
+        count, number = divmod(number, value)
+        roman += numeral * count
+    return f"{roman} век" if century > 0 else f"{roman} век до н. э."
\ No newline at end of file
@@ -129,26 +129,36 @@ service_config = ServiceConfig()
 import time
 from typing import Any, Dict, Optional
 from threading import Lock
+from core.metrics import metrics
+
+cache_requests = metrics.counter(
+    'cache_requests_total', 'Обращения к кэшу сервисов', ('cache', 'result'))
 
 class SimpleCache:
     """Простой кэш в памяти с TTL"""
     
-    def __init__(self, default_ttl: int = 300):  # 5 минут по умолчанию
+    def __init__(self, default_ttl: int = 300, name: str = 'service',  # 5 минут по умолчанию
+                 max_entries: int = None):
         self._cache: Dict[str, Dict[str, Any]] = {}
         self._lock = Lock()
         self.default_ttl = default_ttl
+        self.name = name
+        self.max_entries = max_entries
     
     def get(self, key: str) -> Optional[Any]:
         """Получение значения из кэша"""
         with self._lock:
             if key not in self._cache:
+                cache_requests.inc(cache=self.name, result='miss')
                 return None
             
             entry = self._cache[key]
             if time.time() > entry['expires']:
                 del self._cache[key]
+                cache_requests.inc(cache=self.name, result='miss')
                 return None
             
+            cache_requests.inc(cache=self.name, result='hit')
             return entry['value']
     
     def set(self, key: str, value: Any, ttl: int = None) -> None:
@@ -157,6 +167,11 @@ class SimpleCache:
             ttl = self.default_ttl
         
         with self._lock:
+            # При переполнении вытесняется запись, которая истекает раньше других
+            if self.max_entries and key not in self._cache and len(self._cache) >= self.max_entries:
+                oldest_key = min(self._cache, key=lambda cached_key: self._cache[cached_key]['expires'])
+                del self._cache[oldest_key]
+            
             self._cache[key] = {
                 'value': value,
                 'expires': time.time() + ttl
@@ -187,6 +202,9 @@ class SimpleCache:
                 del self._cache[key]
         
         return len(expired_keys)
+    
+    def __len__(self) -> int:
+        return len(self._cache)
 
 # Глобальный экземпляр кэша
 service_cache = SimpleCache()
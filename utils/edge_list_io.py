@@ -0,0 +1,217 @@
+"""
+Потоковая запись и чтение списков ребер (связей) в форматах JSON Lines, CSV и бинарном
+"""
+
+import csv
+import gzip
+import io
+import json
+import struct
+import sys
+from array import array
+from typing import IO, Iterator, List, Optional, Sequence, Tuple
+
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+FORMAT_BINARY = 'binary'
+FORMATS = (FORMAT_JSONL, FORMAT_CSV, FORMAT_BINARY)
+
+# Бинарный формат: сигнатура, затем секции таблиц.
+# Секция: b'T', имя таблицы и двух колонок (uint8 длина + utf-8),
+# блоки (uint32 число ребер + пары int64), блок нулевой длины завершает секцию; b'E' — конец файла.
+BINARY_MAGIC = b'HGEDGE\x00\x01'
+_BLOCK_HEADER = struct.Struct('<I')
+_SWAP_BYTES = sys.byteorder == 'big'
+
+CSV_HEADER = ('table', 'column_a', 'id_a', 'column_b', 'id_b')
+
+# Фильтр диалога сохранения для экспорта связей
+EXPORT_FILE_FILTER = (
+    "JSON Lines (*.jsonl);;JSON Lines, gzip (*.jsonl.gz);;CSV (*.csv);;CSV, gzip (*.csv.gz);;"
+    "Бинарный список ребер (*.edges);;Бинарный список ребер, gzip (*.edges.gz)"
+)
+IMPORT_FILE_FILTER = "Файлы связей (*.jsonl *.jsonl.gz *.csv *.csv.gz *.edges *.edges.gz);;Все файлы (*)"
+
+def detect_format(filename: str) -> str:
+    """Формат файла по расширению (без учета .gz)"""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return FORMAT_CSV
+    if name.endswith(('.edges', '.bin')):
+        return FORMAT_BINARY
+    return FORMAT_JSONL
+
+def _open(filename: str, mode: str, compress: bool) -> IO[bytes]:
+    if compress:
+        return gzip.open(filename, mode + 'b', compresslevel=6)
+    return open(filename, mode + 'b')
+
+def _write_name(stream: IO[bytes], name: str) -> None:
+    encoded = name.encode('utf-8')
+    stream.write(bytes((len(encoded),)) + encoded)
+
+def _read_exact(stream: IO[bytes], size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Файл списка ребер поврежден или обрезан")
+    return data
+
+def _read_name(stream: IO[bytes]) -> str:
+    return _read_exact(stream, _read_exact(stream, 1)[0]).decode('utf-8')
+
+class EdgeListWriter:
+    """Потоковая запись ребер по таблицам связей; в памяти держится только текущий пакет"""
+
+    def __init__(self, filename: str, fmt: str = None, compress: bool = None):
+        self.filename = filename
+        self.format = fmt or detect_format(filename)
+        if self.format not in FORMATS:
+            raise ValueError(f"Неизвестный формат экспорта: {self.format}")
+        self.compress = filename.lower().endswith('.gz') if compress is None else compress
+
+        self._stream = _open(filename, 'w', self.compress)
+        self._text: Optional[io.TextIOWrapper] = None
+        self._csv = None
+        self._table: Optional[Tuple[str, str, str]] = None
+        self.edges_written = 0
+
+        if self.format == FORMAT_BINARY:
+            self._stream.write(BINARY_MAGIC)
+        else:
+            self._text = io.TextIOWrapper(self._stream, encoding='utf-8', newline='')
+            if self.format == FORMAT_CSV:
+                self._csv = csv.writer(self._text)
+                self._csv.writerow(CSV_HEADER)
+
+    def __enter__(self) -> 'EdgeListWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def begin_table(self, table: str, column_a: str, column_b: str) -> None:
+        """Начало секции таблицы связей"""
+        if self._table is not None:
+            self.end_table()
+        self._table = (table, column_a, column_b)
+        if self.format == FORMAT_BINARY:
+            self._stream.write(b'T')
+            for name in self._table:
+                _write_name(self._stream, name)
+
+    def write_batch(self, pairs: Sequence[Tuple[int, int]]) -> None:
+        """Запись пакета ребер текущей таблицы"""
+        if not pairs:
+            return
+        table, column_a, column_b = self._table
+
+        if self.format == FORMAT_BINARY:
+            values = array('q')
+            for id_a, id_b in pairs:
+                values.append(id_a)
+                values.append(id_b)
+            if _SWAP_BYTES:
+                values.byteswap()
+            self._stream.write(_BLOCK_HEADER.pack(len(pairs)))
+            self._stream.write(values.tobytes())
+        elif self.format == FORMAT_CSV:
+            self._csv.writerows((table, column_a, id_a, column_b, id_b) for id_a, id_b in pairs)
+        else:
+            prefix = f'{{"table": "{table}", "{column_a}": '
+            middle = f', "{column_b}": '
+            self._text.write(''.join(f"{prefix}{id_a}{middle}{id_b}}}\n" for id_a, id_b in pairs))
+
+        self.edges_written += len(pairs)
+
+    def end_table(self) -> None:
+        """Завершение секции таблицы со сбросом буферов на диск"""
+        if self._table is None:
+            return
+        if self.format == FORMAT_BINARY:
+            self._stream.write(_BLOCK_HEADER.pack(0))
+        if self._text is not None:
+            self._text.flush()
+        self._stream.flush()
+        self._table = None
+
+    def close(self) -> None:
+        """Завершение файла"""
+        if self._stream is None:
+            return
+        self.end_table()
+        if self.format == FORMAT_BINARY:
+            self._stream.write(b'E')
+        if self._text is not None:
+            self._text.close()
+        else:
+            self._stream.close()
+        self._stream = None
+
+def read_edge_batches(filename: str, fmt: str = None, compress: bool = None,
+                      batch_size: int = 10000) -> Iterator[Tuple[str, str, str, List[Tuple[int, int]]]]:
+    """Потоковое чтение файла ребер пакетами (таблица, колонка A, колонка B, пары)"""
+    fmt = fmt or detect_format(filename)
+    if compress is None:
+        compress = filename.lower().endswith('.gz')
+
+    with _open(filename, 'r', compress) as stream:
+        if fmt == FORMAT_BINARY:
+            yield from _read_binary(stream)
+            return
+
+        text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        rows = _read_csv(text) if fmt == FORMAT_CSV else _read_jsonl(text)
+
+        current = None
+        batch: List[Tuple[int, int]] = []
+        for table, column_a, id_a, column_b, id_b in rows:
+            key = (table, column_a, column_b)
+            if key != current or len(batch) >= batch_size:
+                if batch:
+                    yield current + (batch,)
+                current, batch = key, []
+            batch.append((id_a, id_b))
+        if batch:
+            yield current + (batch,)
+
+def _read_binary(stream: IO[bytes]) -> Iterator[Tuple[str, str, str, List[Tuple[int, int]]]]:
+    if _read_exact(stream, len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Файл не является бинарным списком ребер")
+    while True:
+        marker = _read_exact(stream, 1)
+        if marker == b'E':
+            return
+        if marker != b'T':
+            raise ValueError("Файл списка ребер поврежден или обрезан")
+
+        table, column_a, column_b = _read_name(stream), _read_name(stream), _read_name(stream)
+        while True:
+            count = _BLOCK_HEADER.unpack(_read_exact(stream, _BLOCK_HEADER.size))[0]
+            if count == 0:
+                break
+            values = array('q')
+            values.frombytes(_read_exact(stream, count * 2 * values.itemsize))
+            if _SWAP_BYTES:
+                values.byteswap()
+            yield table, column_a, column_b, list(zip(values[0::2], values[1::2]))
+
+def _read_csv(text: IO[str]) -> Iterator[Tuple[str, str, int, str, int]]:
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    if tuple(header) != CSV_HEADER:
+        raise ValueError(f"Ожидаются колонки CSV: {', '.join(CSV_HEADER)}")
+    for table, column_a, id_a, column_b, id_b in reader:
+        yield table, column_a, int(id_a), column_b, int(id_b)
+
+def _read_jsonl(text: IO[str]) -> Iterator[Tuple[str, str, int, str, int]]:
+    for line in text:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        table = record.pop('table')
+        (column_a, id_a), (column_b, id_b) = record.items()
+        yield table, column_a, int(id_a), column_b, int(id_b)
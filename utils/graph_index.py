@@ -0,0 +1,429 @@
+"""
+Индекс графа связей в памяти (CSR-смежность на типизированных массивах)
+"""
+
+import heapq
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from utils.change_feed import entity_changes
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = ('PERSON', 'EVENT', 'COUNTRY', 'DOCUMENT', 'SOURCE')
+
+# Название связи по типу связанной сущности (как в RelationshipsRepository.RELATIONS)
+RELATION_BY_TYPE = {
+    'PERSON': 'persons',
+    'EVENT': 'events',
+    'COUNTRY': 'countries',
+    'DOCUMENT': 'documents',
+    'SOURCE': 'sources'
+}
+TYPE_BY_RELATION = {relation: entity_type for entity_type, relation in RELATION_BY_TYPE.items()}
+
+_TYPE_CODES = {entity_type: code for code, entity_type in enumerate(ENTITY_TYPES)}
+
+class RelationshipGraphIndex:
+    """Неориентированный граф связей сущностей
+
+    Базовая смежность хранится в CSR (offsets/targets), изменения после построения —
+    в наборах добавленных и удаленных ребер, которые периодически сливаются в CSR.
+    """
+
+    # Доля измененных ребер, после которой изменения сливаются в CSR
+    COMPACT_RATIO = 0.1
+    COMPACT_MIN_DELTA = 10000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.version = 0
+        self.built_at: Optional[float] = None
+        self.build_duration = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._node_ids: Dict[str, Dict[int, int]] = {entity_type: {} for entity_type in ENTITY_TYPES}
+        self._node_type = array('b')
+        self._node_entity = array('q')
+        self._offsets = array('q', [0])
+        self._targets = array('i')
+        self._degree = array('i')
+        self._added: Dict[int, Set[int]] = {}
+        self._removed: Dict[int, Set[int]] = {}
+        self._delta_size = 0
+        self.edge_count = 0
+
+    @property
+    def built(self) -> bool:
+        """Построен ли индекс"""
+        return self.built_at is not None
+
+    def needs_rebuild(self, max_age_seconds: int = None) -> bool:
+        """Нужно ли (пере)строить индекс"""
+        if not self.built:
+            return True
+        return bool(max_age_seconds) and time.monotonic() - self.built_at > max_age_seconds
+
+    def invalidate(self) -> None:
+        """Пометка индекса устаревшим: он будет перестроен при следующем обращении"""
+        with self._lock:
+            self.built_at = None
+
+    # ========================================
+    # ПОСТРОЕНИЕ
+    # ========================================
+
+    def build(self, links: Iterable[Tuple[str, int, str, int]]) -> None:
+        """Полное построение индекса из потока связей (тип, id, тип, id)"""
+        start_time = time.perf_counter()
+        node_ids: Dict[str, Dict[int, int]] = {entity_type: {} for entity_type in ENTITY_TYPES}
+        node_type = array('b')
+        node_entity = array('q')
+        sources = array('i')
+        destinations = array('i')
+
+        def node_for(entity_type: str, entity_id: int) -> int:
+            ids = node_ids[entity_type]
+            node = ids.get(entity_id)
+            if node is None:
+                node = ids[entity_id] = len(node_type)
+                node_type.append(_TYPE_CODES[entity_type])
+                node_entity.append(entity_id)
+            return node
+
+        for type_a, id_a, type_b, id_b in links:
+            a = node_for(type_a, id_a)
+            b = node_for(type_b, id_b)
+            sources.append(a)
+            destinations.append(b)
+
+        offsets, targets, degree = self._to_csr(len(node_type), sources, destinations)
+
+        with self._lock:
+            self._node_ids = node_ids
+            self._node_type = node_type
+            self._node_entity = node_entity
+            self._offsets = offsets
+            self._targets = targets
+            self._degree = degree
+            self._added = {}
+            self._removed = {}
+            self._delta_size = 0
+            self.edge_count = len(sources)
+            self.version += 1
+            self.built_at = time.monotonic()
+            self.build_duration = time.perf_counter() - start_time
+
+        logger.info(f"Relationship graph index built: {len(node_type)} nodes, {len(sources)} edges "
+                    f"in {self.build_duration * 1000:.0f} ms")
+
+    @staticmethod
+    def _to_csr(node_count: int, sources: array, destinations: array) -> Tuple[array, array, array]:
+        """Сборка CSR из списка ребер (каждое ребро хранится в обе стороны)"""
+        degree = array('i', bytes(4 * node_count))
+        for a, b in zip(sources, destinations):
+            degree[a] += 1
+            degree[b] += 1
+
+        offsets = array('q', bytes(8 * (node_count + 1)))
+        total = 0
+        for node in range(node_count):
+            offsets[node] = total
+            total += degree[node]
+        offsets[node_count] = total
+
+        targets = array('i', bytes(4 * total))
+        position = array('q', offsets)
+        for a, b in zip(sources, destinations):
+            targets[position[a]] = b
+            position[a] += 1
+            targets[position[b]] = a
+            position[b] += 1
+
+        # Отсортированные списки соседей позволяют искать ребро бинарным поиском
+        for node in range(node_count):
+            start, end = offsets[node], offsets[node + 1]
+            if end - start > 1:
+                targets[start:end] = array('i', sorted(targets[start:end]))
+
+        return offsets, targets, degree
+
+    def _compact(self) -> None:
+        """Слияние накопленных изменений в CSR"""
+        node_count = len(self._node_type)
+        offsets = array('q', bytes(8 * (node_count + 1)))
+        targets = array('i')
+        for node in range(node_count):
+            offsets[node] = len(targets)
+            targets.extend(sorted(self._neighbour_nodes(node)))
+        offsets[node_count] = len(targets)
+
+        self._offsets = offsets
+        self._targets = targets
+        self._added = {}
+        self._removed = {}
+        self._delta_size = 0
+
+    # ========================================
+    # ИНКРЕМЕНТАЛЬНЫЕ ИЗМЕНЕНИЯ
+    # ========================================
+
+    def _node(self, entity_type: str, entity_id: int, create: bool = False) -> Optional[int]:
+        node = self._node_ids[entity_type].get(entity_id)
+        if node is None and create:
+            node = self._node_ids[entity_type][entity_id] = len(self._node_type)
+            self._node_type.append(_TYPE_CODES[entity_type])
+            self._node_entity.append(entity_id)
+            self._degree.append(0)
+        return node
+
+    def _base_neighbours(self, node: int) -> array:
+        if node + 1 >= len(self._offsets):
+            # Узел добавлен после построения CSR
+            return array('i')
+        return self._targets[self._offsets[node]:self._offsets[node + 1]]
+
+    def _has_edge_nodes(self, a: int, b: int) -> bool:
+        if b in self._added.get(a, ()):
+            return True
+        if b in self._removed.get(a, ()):
+            return False
+        if a + 1 >= len(self._offsets):
+            return False
+        start, end = self._offsets[a], self._offsets[a + 1]
+        position = bisect_left(self._targets, b, start, end)
+        return position < end and self._targets[position] == b
+
+    def _neighbour_nodes(self, node: int) -> List[int]:
+        removed = self._removed.get(node)
+        base = self._base_neighbours(node)
+        neighbours = [target for target in base if target not in removed] if removed else list(base)
+        added = self._added.get(node)
+        if added:
+            neighbours.extend(added)
+        return neighbours
+
+    def _apply(self, a: int, b: int, add: bool) -> None:
+        for x, y in ((a, b), (b, a)):
+            undo, do = (self._removed, self._added) if add else (self._added, self._removed)
+            pending = undo.get(x)
+            if pending is not None and y in pending:
+                pending.discard(y)
+                if not pending:
+                    del undo[x]
+            else:
+                do.setdefault(x, set()).add(y)
+            self._degree[x] += 1 if add else -1
+
+        self.edge_count += 1 if add else -1
+        self._delta_size += 1
+        self.version += 1
+
+        if self._delta_size > max(self.COMPACT_MIN_DELTA, self.edge_count * self.COMPACT_RATIO):
+            self._compact()
+
+    def add_link(self, type_a: str, id_a: int, type_b: str, id_b: int) -> bool:
+        """Добавление связи (игнорируется, пока индекс не построен)"""
+        with self._lock:
+            if not self.built:
+                return False
+            a = self._node(type_a, id_a, create=True)
+            b = self._node(type_b, id_b, create=True)
+            if self._has_edge_nodes(a, b):
+                return False
+            self._apply(a, b, add=True)
+            return True
+
+    def remove_link(self, type_a: str, id_a: int, type_b: str, id_b: int) -> bool:
+        """Удаление связи"""
+        with self._lock:
+            if not self.built:
+                return False
+            a = self._node(type_a, id_a)
+            b = self._node(type_b, id_b)
+            if a is None or b is None or not self._has_edge_nodes(a, b):
+                return False
+            self._apply(a, b, add=False)
+            return True
+
+    def apply_changes(self, entity_type: str, entity_id: int, related_type: str,
+                      added_ids: Iterable[int] = (), removed_ids: Iterable[int] = ()) -> None:
+        """Применение результата пакетного изменения связей одной сущности"""
+        with self._lock:
+            for related_id in added_ids:
+                self.add_link(entity_type, entity_id, related_type, related_id)
+            for related_id in removed_ids:
+                self.remove_link(entity_type, entity_id, related_type, related_id)
+
+    def remove_entity(self, entity_type: str, entity_id: int) -> int:
+        """Удаление всех связей сущности (при удалении самой сущности)"""
+        with self._lock:
+            node = self._node(entity_type, entity_id)
+            if node is None:
+                return 0
+            neighbours = self._neighbour_nodes(node)
+            for neighbour in neighbours:
+                self._apply(node, neighbour, add=False)
+            return len(neighbours)
+
+    # ========================================
+    # ЗАПРОСЫ
+    # ========================================
+
+    def _entity(self, node: int) -> Tuple[str, int]:
+        return ENTITY_TYPES[self._node_type[node]], self._node_entity[node]
+
+    def has_link(self, type_a: str, id_a: int, type_b: str, id_b: int) -> bool:
+        """Существует ли связь"""
+        with self._lock:
+            a = self._node(type_a, id_a)
+            b = self._node(type_b, id_b)
+            return a is not None and b is not None and self._has_edge_nodes(a, b)
+
+    def neighbours(self, entity_type: str, entity_id: int, related_type: str = None) -> List[Tuple[str, int]]:
+        """Непосредственно связанные сущности (тип, id)"""
+        with self._lock:
+            node = self._node(entity_type, entity_id)
+            if node is None:
+                return []
+            code = _TYPE_CODES[related_type] if related_type else None
+            return sorted(
+                self._entity(neighbour) for neighbour in self._neighbour_nodes(node)
+                if code is None or self._node_type[neighbour] == code
+            )
+
+    def related_ids(self, entity_type: str, entity_id: int, relation: str) -> List[int]:
+        """ID связанных сущностей по названию связи (аналог find_related_entities)"""
+        related_type = TYPE_BY_RELATION[relation]
+        return [related_id for _, related_id in self.neighbours(entity_type, entity_id, related_type)]
+
+    def degree(self, entity_type: str, entity_id: int, related_type: str = None) -> int:
+        """Количество связей сущности (всего или с сущностями одного типа)"""
+        with self._lock:
+            node = self._node(entity_type, entity_id)
+            if node is None:
+                return 0
+            if related_type is None:
+                return self._degree[node]
+            code = _TYPE_CODES[related_type]
+            return sum(1 for neighbour in self._neighbour_nodes(node) if self._node_type[neighbour] == code)
+
+    def degree_breakdown(self, entity_type: str, entity_id: int) -> Dict[str, int]:
+        """Количество связей по названиям связей"""
+        counts: Dict[str, int] = {}
+        for related_type, _ in self.neighbours(entity_type, entity_id):
+            relation = RELATION_BY_TYPE[related_type]
+            counts[relation] = counts.get(relation, 0) + 1
+        return counts
+
+    def top_connected(self, entity_type: str, limit: int = 10,
+                      related_type: str = None) -> List[Tuple[int, int]]:
+        """Самые связанные сущности типа: список (id, количество связей)"""
+        with self._lock:
+            nodes = self._node_ids[entity_type]
+            if related_type is None:
+                degree = self._degree
+                candidates = ((entity_id, degree[node]) for entity_id, node in nodes.items())
+            else:
+                code = _TYPE_CODES[related_type]
+                node_type = self._node_type
+                candidates = (
+                    (entity_id, sum(1 for n in self._neighbour_nodes(node) if node_type[n] == code))
+                    for entity_id, node in nodes.items()
+                )
+            return heapq.nlargest(limit, ((entity_id, count) for entity_id, count in candidates if count > 0),
+                                  key=lambda pair: (pair[1], -pair[0]))
+
+    def multi_hop(self, entity_type: str, entity_id: int, max_depth: int = 2,
+                  target_type: str = None, via_types: Sequence[str] = None,
+                  limit: int = None) -> List[Dict[str, Any]]:
+        """Сущности в пределах max_depth шагов (поиск в ширину)"""
+        with self._lock:
+            start = self._node(entity_type, entity_id)
+            if start is None:
+                return []
+
+            via_codes = {_TYPE_CODES[t] for t in via_types} if via_types else None
+            target_code = _TYPE_CODES[target_type] if target_type else None
+            distances = {start: 0}
+            queue = deque([start])
+            results = []
+
+            while queue:
+                node = queue.popleft()
+                depth = distances[node]
+                if depth >= max_depth:
+                    continue
+                for neighbour in self._neighbour_nodes(node):
+                    if neighbour in distances:
+                        continue
+                    distances[neighbour] = depth + 1
+                    neighbour_code = self._node_type[neighbour]
+                    if target_code is None or neighbour_code == target_code:
+                        neighbour_type, neighbour_id = self._entity(neighbour)
+                        results.append({'entity_type': neighbour_type, 'entity_id': neighbour_id,
+                                        'distance': depth + 1})
+                        if limit and len(results) >= limit:
+                            return results
+                    # Через промежуточные узлы проходим только по разрешенным типам
+                    if via_codes is None or neighbour_code in via_codes:
+                        queue.append(neighbour)
+
+            return results
+
+    def csr_snapshot(self) -> Dict[str, Any]:
+        """Согласованная копия CSR-массивов (накопленные изменения предварительно сливаются)"""
+        with self._lock:
+            if self._added or self._removed or len(self._offsets) != len(self._node_type) + 1:
+                self._compact()
+            return {
+                'version': self.version,
+                'node_type': array('b', self._node_type),
+                'node_entity': array('q', self._node_entity),
+                'offsets': array('q', self._offsets),
+                'targets': array('i', self._targets)
+            }
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Статистика памяти индекса"""
+        with self._lock:
+            arrays = {
+                'node_type': self._node_type,
+                'node_entity': self._node_entity,
+                'offsets': self._offsets,
+                'targets': self._targets,
+                'degree': self._degree
+            }
+            array_bytes = {name: values.itemsize * len(values) for name, values in arrays.items()}
+            id_map_bytes = sum(sys.getsizeof(ids) for ids in self._node_ids.values())
+            delta_bytes = sum(sys.getsizeof(values) for values in self._added.values()) + \
+                sum(sys.getsizeof(values) for values in self._removed.values())
+
+            return {
+                'nodes': len(self._node_type),
+                'nodes_by_type': {entity_type: len(ids) for entity_type, ids in self._node_ids.items()},
+                'edges': self.edge_count,
+                'delta_edges': self._delta_size,
+                'version': self.version,
+                'build_duration_ms': round(self.build_duration * 1000, 1),
+                'array_bytes': array_bytes,
+                'id_map_bytes': id_map_bytes,
+                'delta_bytes': delta_bytes,
+                'total_bytes': sum(array_bytes.values()) + id_map_bytes + delta_bytes
+            }
+
+# Глобальный индекс графа связей
+relationship_graph = RelationshipGraphIndex()
+
+def _apply_entity_change(entity_type: str, entity_id: int, operation: str, data: Dict[str, Any]) -> None:
+    """Удаление связей удаленной сущности (строки связей в БД удаляются каскадно)"""
+    if operation == 'DELETE' and entity_type in _TYPE_CODES:
+        relationship_graph.remove_entity(entity_type, entity_id)
+
+entity_changes.subscribe(_apply_entity_change)
@@ -0,0 +1,99 @@
+"""
+Подсветка найденных слов за один проход: все термы компилируются в одно регулярное выражение
+"""
+
+import html
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+# Маркеры выделения во фрагментах ts_headline (экранирование HTML выполняется на клиенте)
+MARK_START = '\x02'
+MARK_STOP = '\x03'
+
+HIGHLIGHT_START = "<span style='background-color: #ffff00;'>"
+HIGHLIGHT_STOP = "</span>"
+
+_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+_ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+# Операторы websearch_to_tsquery, которые не являются словами запроса
+_QUERY_OPERATORS = {'or', 'and', 'или', 'и'}
+
+def split_terms(search_text: str) -> List[str]:
+    """Термы запроса: фразы в кавычках и отдельные слова, без операторов и исключенных слов"""
+    terms = []
+    for phrase, word in _TERM_RE.findall(search_text or ''):
+        term = (phrase or word).strip()
+        if not term or term.startswith('-') or term.casefold() in _QUERY_OPERATORS:
+            continue
+        terms.append(term)
+    return terms
+
+def _term_pattern(term: str) -> str:
+    # ё и е считаются одной буквой, пробелы внутри фразы — любым пробельным промежутком
+    parts = []
+    for char in term:
+        if char in 'еёЕЁ':
+            parts.append('[её]')
+        elif char.isspace():
+            if not parts or parts[-1] != r'\s+':
+                parts.append(r'\s+')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+class Highlighter:
+    """Поиск всех термов за один проход без учета регистра
+
+    Термы объединяются в одну альтернативу, более длинные идут первыми: при вложенных термах
+    («Петр» и «Петроград») выделяется самое длинное совпадение, и выделения не пересекаются.
+    """
+
+    def __init__(self, terms: Sequence[str]):
+        unique = {term.casefold(): term for term in terms if term and term.strip()}
+        self.terms = sorted(unique.values(), key=len, reverse=True)
+        self._pattern = (re.compile('|'.join(_term_pattern(term) for term in self.terms), re.IGNORECASE)
+                         if self.terms else None)
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """Позиции (начало, конец) всех совпадений в тексте"""
+        if self._pattern is None or not text:
+            return []
+        return [match.span() for match in self._pattern.finditer(text)]
+
+    def to_html(self, text: str, start_tag: str = HIGHLIGHT_START, stop_tag: str = HIGHLIGHT_STOP) -> str:
+        """Экранированный HTML текста с выделенными совпадениями"""
+        if not text:
+            return ''
+        parts = []
+        position = 0
+        for start, end in self.spans(text):
+            parts.append(html.escape(text[position:start]))
+            parts.append(start_tag + html.escape(text[start:end]) + stop_tag)
+            position = end
+        parts.append(html.escape(text[position:]))
+        return ''.join(parts)
+
+@lru_cache(maxsize=64)
+def _cached_highlighter(terms: Tuple[str, ...]) -> Highlighter:
+    return Highlighter(terms)
+
+def get_highlighter(search_text: str) -> Highlighter:
+    """Скомпилированный подсветчик для поискового запроса (повторные запросы берутся из кэша)"""
+    return _cached_highlighter(tuple(split_terms(search_text)))
+
+def marked_to_html(text: str, start_tag: str = HIGHLIGHT_START, stop_tag: str = HIGHLIGHT_STOP) -> str:
+    """HTML фрагмента с маркерами выделения ts_headline: текст экранируется, маркеры заменяются тегами"""
+    escaped = html.escape(text or '')
+    return escaped.replace(MARK_START, start_tag).replace(MARK_STOP, stop_tag)
+
+def to_utf16_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Перевод позиций строки Python в позиции QTextDocument (UTF-16: символы вне BMP занимают две позиции)"""
+    astral = [match.start() for match in _ASTRAL_RE.finditer(text)]
+    if not astral:
+        return spans
+    return [(start + bisect_left(astral, start), end + bisect_left(astral, end)) for start, end in spans]
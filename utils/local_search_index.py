@@ -0,0 +1,230 @@
+"""
+Локальный полнотекстовый индекс названий сущностей (SQLite FTS5 в профиле пользователя)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config import APP_CONFIG
+from utils.change_feed import entity_changes
+
+logger = logging.getLogger(__name__)
+
+ENTITY_CODES = {'PERSON': 1, 'COUNTRY': 2, 'EVENT': 3, 'DOCUMENT': 4, 'SOURCE': 5}
+
+# rowid строки: код типа в старших разрядах, id сущности в младших
+_ROWID_SHIFT = 40
+
+# Веса колонок FTS для bm25: название, подзаголовок, описание
+_BM25_WEIGHTS = (10.0, 3.0, 1.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    rowid INTEGER PRIMARY KEY,
+    entity_type TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    body TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+    title, subtitle, body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def _fold(text: Optional[str]) -> str:
+    """Текст для индексации: ё не отличается от е (unicode61 их не сводит)"""
+    return (text or '').replace('ё', 'е').replace('Ё', 'Е')
+
+def _rowid(entity_type: str, entity_id: int) -> int:
+    return (ENTITY_CODES[entity_type] << _ROWID_SHIFT) | entity_id
+
+def fts_available() -> bool:
+    """Поддерживает ли встроенный SQLite модуль FTS5"""
+    try:
+        connection = sqlite3.connect(':memory:')
+        try:
+            connection.execute("CREATE VIRTUAL TABLE probe USING fts5(value)")
+            return True
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return False
+
+class LocalSearchIndex:
+    """Зеркало единого поискового индекса сервера (названия, подзаголовки, краткие описания)
+
+    Синхронизируется по отметкам updated_at; запросы выполняются локально, без обращения к серверу.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        # Взводится при изменении сущностей: фоновая синхронизация запускается без ожидания интервала
+        self.changed = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        """Закрытие файла индекса"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # ========================================
+    # СИНХРОНИЗАЦИЯ
+    # ========================================
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Значение состояния синхронизации"""
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        """Сохранение состояния синхронизации"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def ready(self) -> bool:
+        """Выполнялась ли хотя бы одна полная синхронизация"""
+        return self.synced_at is not None
+
+    @property
+    def synced_at(self) -> Optional[datetime]:
+        """Отметка сервера, до которой индекс синхронизирован"""
+        value = self.get_state('synced_at')
+        return datetime.fromisoformat(value) if value else None
+
+    def apply_changes(self, rows: Iterable[Tuple[str, int, str, Optional[str], Optional[str]]],
+                      deleted: Iterable[Tuple[str, int]] = ()) -> int:
+        """Применение пакета изменений (тип, id, название, подзаголовок, описание) и удалений"""
+        applied = 0
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for entity_type, entity_id in deleted:
+                    rowid = _rowid(entity_type, entity_id)
+                    connection.execute("DELETE FROM entities WHERE rowid = ?", (rowid,))
+                    connection.execute("DELETE FROM entities_fts WHERE rowid = ?", (rowid,))
+                    applied += 1
+
+                for entity_type, entity_id, title, subtitle, body in rows:
+                    rowid = _rowid(entity_type, entity_id)
+                    connection.execute(
+                        "INSERT OR REPLACE INTO entities (rowid, entity_type, entity_id, title, subtitle, body) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (rowid, entity_type, entity_id, title, subtitle, body)
+                    )
+                    connection.execute("DELETE FROM entities_fts WHERE rowid = ?", (rowid,))
+                    connection.execute(
+                        "INSERT INTO entities_fts (rowid, title, subtitle, body) VALUES (?, ?, ?, ?)",
+                        (rowid, _fold(title), _fold(subtitle), _fold(body))
+                    )
+                    applied += 1
+        return applied
+
+    def clear(self) -> None:
+        """Удаление всех записей (перед полной синхронизацией)"""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("DELETE FROM entities")
+                connection.execute("DELETE FROM entities_fts")
+                connection.execute("DELETE FROM sync_state")
+
+    # ========================================
+    # ПОИСК
+    # ========================================
+
+    @staticmethod
+    def _match_query(search_text: str) -> str:
+        """Запрос FTS5: все слова как префиксы, без операторов пользовательского текста"""
+        words = [word.replace('"', '') for word in _fold(search_text).split()]
+        return ' '.join(f'"{word}"*' for word in words if word)
+
+    def search(self, search_text: str, entity_type: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Лучшие совпадения одного типа с общим числом найденных"""
+        match = self._match_query(search_text)
+        if not match:
+            return []
+
+        start_time = time.perf_counter()
+        with self._lock:
+            connection = self._connect()
+            rows = connection.execute(f"""
+                SELECT e.entity_id, e.title, e.subtitle, e.body, -bm25(entities_fts, {', '.join(map(str, _BM25_WEIGHTS))}) AS rank
+                FROM entities_fts
+                JOIN entities e ON e.rowid = entities_fts.rowid
+                WHERE entities_fts MATCH ? AND e.entity_type = ?
+                ORDER BY rank DESC, e.title
+                LIMIT ?
+            """, (match, entity_type, limit)).fetchall()
+
+            total_count = len(rows)
+            if total_count == limit:
+                total_count = connection.execute("""
+                    SELECT COUNT(*)
+                    FROM entities_fts
+                    JOIN entities e ON e.rowid = entities_fts.rowid
+                    WHERE entities_fts MATCH ? AND e.entity_type = ?
+                """, (match, entity_type)).fetchone()[0]
+
+        logger.debug(f"Local search {entity_type} \"{search_text}\": {total_count} in "
+                     f"{(time.perf_counter() - start_time) * 1000:.1f} ms")
+        return [
+            {
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'title': title,
+                'subtitle': subtitle,
+                'body': body,
+                'rank': rank,
+                'type_total': total_count
+            }
+            for entity_id, title, subtitle, body, rank in rows
+        ]
+
+    def count(self) -> int:
+        """Число записей в индексе"""
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+def _create_index() -> Optional[LocalSearchIndex]:
+    if not APP_CONFIG.local_search_enabled:
+        return None
+    if not fts_available():
+        logger.warning("SQLite is built without FTS5, local search index is disabled")
+        return None
+    return LocalSearchIndex(APP_CONFIG.local_search_path)
+
+# Глобальный экземпляр локального индекса (None, если отключен настройкой LOCAL_SEARCH)
+local_search_index = _create_index()
+
+if local_search_index is not None:
+    entity_changes.subscribe(lambda *change: local_search_index.changed.set())
@@ -0,0 +1,131 @@
+"""
+Профилирование памяти: снимки tracemalloc вокруг загрузок страниц и жизненного цикла окон
+"""
+
+import logging
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+from config import APP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Служебные кадры, которые не интересны в отчетах
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+class MemoryProfiler:
+    """Снимки памяти до и после действий с отчетом о местах выделения и приросте"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.enabled = False
+            self.output_dir = APP_CONFIG.profile_dir
+            self.top_n = APP_CONFIG.memory_top_n
+            self.frames = APP_CONFIG.memory_trace_frames
+            self.min_growth_kb = APP_CONFIG.memory_min_growth_kb
+            self._local = threading.local()
+            self._write_lock = threading.Lock()
+            self._initialized = True
+            if APP_CONFIG.memory_profiling_enabled:
+                self.enable()
+
+    def enable(self, output_dir: str = None) -> None:
+        """Включение трассировки выделений памяти"""
+        if output_dir:
+            self.output_dir = output_dir
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.enabled = True
+        logger.info(f"Memory profiling enabled, reports are written to {os.path.abspath(self.output_dir)}")
+
+    def disable(self) -> None:
+        """Выключение трассировки"""
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        logger.info("Memory profiling disabled")
+
+    def take_snapshot(self) -> Optional[tracemalloc.Snapshot]:
+        """Снимок памяти без служебных кадров"""
+        if not self.enabled or not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def compare(self, title: str, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> Optional[str]:
+        """Отчет о приросте памяти между снимками (None, если прирост ниже порога)"""
+        line_stats = after.compare_to(before, 'lineno')
+        growth = sum(stat.size_diff for stat in line_stats)
+        if growth < self.min_growth_kb * 1024:
+            return None
+
+        lines = [f"{title}: {growth / 1024:+.1f} KiB retained, "
+                 f"{sum(stat.count_diff for stat in line_stats):+d} blocks"]
+
+        lines.append("  Top allocation sites:")
+        for stat in [s for s in line_stats if s.size_diff > 0][:self.top_n]:
+            frame = stat.traceback[0]
+            lines.append(f"    {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d} blocks  "
+                         f"{frame.filename}:{frame.lineno}")
+
+        # Полные стеки для крупнейших источников прироста
+        traceback_stats = [s for s in after.compare_to(before, 'traceback') if s.size_diff > 0][:3]
+        for stat in traceback_stats:
+            lines.append(f"  {stat.size_diff / 1024:+.1f} KiB allocated at:")
+            lines.extend(f"    {line}" for line in stat.traceback.format(limit=self.frames))
+
+        return '\n'.join(lines)
+
+    def write_report(self, report: str) -> None:
+        """Дописывание отчета в журнал памяти"""
+        logger.info(report.splitlines()[0])
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with self._write_lock:
+                with open(os.path.join(self.output_dir, 'memory.log'), 'a', encoding='utf-8') as f:
+                    f.write(f"[{datetime.now().isoformat(timespec='seconds')}] {report}\n\n")
+        except Exception as e:
+            logger.error(f"Failed to write memory report: {e}")
+
+    @contextmanager
+    def action(self, action_name: str):
+        """Снимки до и после внешнего действия главного потока"""
+        depth = getattr(self._local, 'depth', 0)
+        before = None
+        if depth == 0 and threading.current_thread() is threading.main_thread():
+            before = self.take_snapshot()
+
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if before is not None:
+                after = self.take_snapshot()
+                report = self.compare(action_name, before, after) if after is not None else None
+                if report:
+                    self.write_report(report)
+
+    def current_usage(self) -> List[int]:
+        """Текущий и пиковый объем отслеживаемой памяти в байтах"""
+        if not tracemalloc.is_tracing():
+            return [0, 0]
+        return list(tracemalloc.get_traced_memory())
+
+# Глобальный экземпляр профилировщика памяти
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,204 @@
+"""
+Профилирование действий пользовательского интерфейса
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import types
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from config import APP_CONFIG
+from core.metrics import metrics
+from core import query_recorder
+from utils.memory_profiling import memory_profiler
+
+logger = logging.getLogger(__name__)
+
+# Действия, вокруг которых снимаются снимки памяти
+MEMORY_ACTION_PREFIXES = ('page.', 'window.', 'dialog.')
+
+action_duration = metrics.histogram(
+    'ui_action_duration_seconds', 'Длительность действий UI и вызовов сервисов', ('action',))
+ui_stalls = metrics.counter('ui_stalls_total', 'Зависания GUI-потока')
+n_plus_one_detections = metrics.counter(
+    'db_n_plus_one_total', 'Действия с повторяющимися однотипными запросами', ('action',))
+
+class ActionProfiler:
+    """Профилировщик действий UI: загрузки страниц, открытия диалогов и вызовы сервисов"""
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self.enabled = APP_CONFIG.profiling_enabled
+            self.output_dir = APP_CONFIG.profile_dir
+            self.top_n = APP_CONFIG.profile_top_n
+            self.min_duration_ms = APP_CONFIG.profile_min_duration_ms
+            self.record_queries = APP_CONFIG.query_recording_enabled
+            self.query_threshold = APP_CONFIG.query_repeat_threshold
+            self.query_report_file = APP_CONFIG.query_report_file
+            self._local = threading.local()
+            self._stacks: Dict[int, List[str]] = {}
+            self._write_lock = threading.Lock()
+            self._initialized = True
+
+    def enable(self, output_dir: str = None) -> None:
+        """Включение профилирования"""
+        if output_dir:
+            self.output_dir = output_dir
+        self.enabled = True
+        logger.info(f"Action profiling enabled, dumps are written to {os.path.abspath(self.output_dir)}")
+
+    def disable(self) -> None:
+        """Выключение профилирования"""
+        self.enabled = False
+        logger.info("Action profiling disabled")
+
+    def _stack(self) -> List[str]:
+        """Стек активных действий текущего потока"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            # Стек доступен другим потокам (например, сторожу зависаний GUI)
+            self._stacks[threading.get_ident()] = stack
+        return stack
+
+    def current_action(self, thread_id: int = None) -> Optional[str]:
+        """Имя самого вложенного активного действия потока (по умолчанию текущего)"""
+        stack = self._stack() if thread_id is None else self._stacks.get(thread_id)
+        try:
+            return stack[-1] if stack else None
+        except IndexError:
+            # Действие завершилось между проверкой и чтением
+            return None
+
+    def action_chain(self, thread_id: int = None) -> List[str]:
+        """Цепочка вложенных активных действий потока"""
+        stack = self._stack() if thread_id is None else self._stacks.get(thread_id)
+        return list(stack) if stack else []
+
+    @contextmanager
+    def action(self, action_name: str):
+        """Контекст действия; профилируется только внешнее действие главного потока"""
+        stack = self._stack()
+        profiler = None
+        
+        with ExitStack() as contexts:
+            # Снимки памяти до и после загрузки страниц и открытия окон
+            if memory_profiler.enabled and not stack and action_name.startswith(MEMORY_ACTION_PREFIXES):
+                contexts.enter_context(memory_profiler.action(action_name))
+            
+            # Запросы внешнего действия проверяются на N+1
+            if self.record_queries and not stack:
+                contexts.enter_context(self._query_recording(action_name))
+
+            if (self.enabled and not stack
+                    and threading.current_thread() is threading.main_thread()):
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Уже активен другой профилировщик (например, внешний отладчик)
+                    profiler = None
+
+            stack.append(action_name)
+            start_time = time.perf_counter()
+            try:
+                yield
+            finally:
+                duration = time.perf_counter() - start_time
+                stack.pop()
+                action_duration.observe(duration, action=action_name)
+                if profiler is not None:
+                    profiler.disable()
+                    if duration * 1000 >= self.min_duration_ms:
+                        self._dump(action_name, profiler, duration)
+
+    @contextmanager
+    def _query_recording(self, action_name: str):
+        """Запись запросов действия с отчетом о N+1 по завершении"""
+        with query_recorder.recording(action_name, self.query_threshold) as recorder:
+            try:
+                yield recorder
+            finally:
+                self._report_queries(action_name, recorder)
+
+    def _report_queries(self, action_name: str, recorder: query_recorder.QueryRecorder) -> None:
+        # Ошибка отчета не должна подменять исключение самого действия
+        try:
+            if recorder.detections():
+                n_plus_one_detections.inc(action=action_name)
+                query_recorder.write_report(recorder, self.query_report_file)
+        except Exception as e:
+            logger.error(f"Failed to report N+1 queries for {action_name}: {e}")
+
+    def _dump(self, action_name: str, profiler: cProfile.Profile, duration: float) -> None:
+        """Сохранение дампа профиля и сводки топ-N функций"""
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            safe_name = re.sub(r'[^\w.-]+', '_', action_name)
+            base_path = os.path.join(self.output_dir, f"{timestamp}_{safe_name}")
+
+            profiler.dump_stats(f"{base_path}.prof")
+
+            summary = io.StringIO()
+            summary.write(f"Action: {action_name}\n")
+            summary.write(f"Duration: {duration * 1000:.1f} ms\n\n")
+            stats = pstats.Stats(profiler, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+
+            with open(f"{base_path}.txt", 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+
+            # Общий журнал профилированных действий
+            with self._write_lock:
+                with open(os.path.join(self.output_dir, 'actions.log'), 'a', encoding='utf-8') as f:
+                    f.write(f"{timestamp}\t{duration * 1000:.1f} ms\t{action_name}\t{os.path.basename(base_path)}.prof\n")
+
+            logger.info(f"Profiled {action_name}: {duration * 1000:.1f} ms -> {base_path}.prof")
+        except Exception as e:
+            logger.error(f"Failed to write profile for {action_name}: {e}")
+
+def profile_action(action_name: str = None):
+    """Декоратор для профилирования действия"""
+    def decorator(func: Callable) -> Callable:
+        name = action_name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with action_profiler.action(name):
+                return func(*args, **kwargs)
+
+        wrapper.__profiled_action__ = name
+        return wrapper
+    return decorator
+
+def instrument_methods(cls: type, prefix: str, method_names: Iterable[str] = None) -> None:
+    """Оборачивание методов класса в profile_action (используется базовыми классами)"""
+    if method_names is None:
+        method_names = [name for name, value in vars(cls).items()
+                        if isinstance(value, types.FunctionType) and not name.startswith('_')]
+
+    for name in method_names:
+        method = vars(cls).get(name)
+        if not isinstance(method, types.FunctionType) or hasattr(method, '__profiled_action__'):
+            continue
+        setattr(cls, name, profile_action(f"{prefix}.{name}")(method))
+
+# Глобальный экземпляр профилировщика
+action_profiler = ActionProfiler()
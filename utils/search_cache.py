@@ -0,0 +1,81 @@
+"""
+Кэш результатов поиска и статистика популярности поисковых запросов
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+from config import APP_CONFIG
+from utils.change_feed import entity_changes
+from utils.decorators import SimpleCache
+
+# Результаты поиска живут до TTL или до первого изменения сущностей
+search_cache = SimpleCache(default_ttl=APP_CONFIG.search_cache_ttl_seconds, name='search',
+                           max_entries=APP_CONFIG.search_cache_max_entries)
+
+def normalize_query(search_text: str) -> str:
+    """Ключ запроса: регистр и пробелы не влияют на результат полнотекстового поиска"""
+    return ' '.join(search_text.casefold().split())
+
+def search_cache_key(kind: str, search_text: str, search_types: Iterable[str], limit: int) -> str:
+    """Ключ кэша по нормализованному запросу, набору типов и лимиту"""
+    return f"{kind}:{','.join(sorted(search_types))}:{limit}:{normalize_query(search_text)}"
+
+class QueryStatistics:
+    """Частота поисковых запросов в памяти (начальные значения — из журнала аудита GLOBAL_SEARCH)"""
+
+    def __init__(self, max_queries: int = 5000):
+        self.max_queries = max_queries
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._texts: Dict[str, str] = {}
+        self._found: Dict[str, int] = {}
+
+    def record(self, search_text: str, found: int, count: int = 1) -> None:
+        """Учет выполненного запроса"""
+        key = normalize_query(search_text)
+        if not key:
+            return
+        with self._lock:
+            self._counts[key] += count
+            self._texts.setdefault(key, search_text.strip())
+            self._found[key] = found
+            # Редкие запросы отбрасываются, чтобы статистика не росла без предела
+            if len(self._counts) > self.max_queries:
+                kept = dict(self._counts.most_common(self.max_queries // 2))
+                self._counts = Counter(kept)
+                self._texts = {key: self._texts[key] for key in kept}
+                self._found = {key: self._found[key] for key in kept}
+
+    def load(self, entries: Iterable[Tuple[str, int]]) -> None:
+        """Начальная загрузка пар (запрос, найдено)"""
+        for search_text, found in entries:
+            self.record(search_text, found)
+        self.loaded = True
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        return {'query': self._texts[key], 'count': self._counts[key], 'found': self._found[key]}
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Самые частые запросы, по которым что-то находилось"""
+        with self._lock:
+            return [self._entry(key) for key, _ in self._counts.most_common()
+                    if self._found[key] > 0][:limit]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Частые результативные запросы, начинающиеся с префикса"""
+        prefix = normalize_query(prefix)
+        with self._lock:
+            matches = [key for key in self._counts if key.startswith(prefix) and self._found[key] > 0]
+            matches.sort(key=lambda key: -self._counts[key])
+            return [self._entry(key) for key in matches[:limit]]
+
+# Глобальная статистика запросов
+query_statistics = QueryStatistics()
+
+def _invalidate_search_cache(entity_type: str, entity_id: int, operation: str, data: Dict[str, Any]) -> None:
+    """Сброс кэша результатов при любом изменении сущностей"""
+    search_cache.clear()
+
+entity_changes.subscribe(_invalidate_search_cache)
@@ -0,0 +1,210 @@
+"""
+Префиксный индекс названий сущностей для поисковых подсказок (отсортированный массив + bisect)
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from utils.change_feed import entity_changes
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+')
+_MAX_CHAR = '\U0010ffff'
+
+def normalize_text(text: str) -> str:
+    """Нормализация для сравнения: регистр, ё → е, слова через один пробел"""
+    return ' '.join(_WORD_RE.findall(text.casefold().replace('ё', 'е')))
+
+def entity_display_name(entity_type: str, data: Dict[str, Any]) -> str:
+    """Отображаемое название сущности (для персон — имя, отчество и фамилия)"""
+    if entity_type == 'PERSON':
+        parts = (data.get('name'), data.get('patronymic'), data.get('surname'))
+        return ' '.join(part.strip() for part in parts if part and part.strip())
+    return (data.get('name') or '').strip()
+
+class SuggestionIndex:
+    """Подсказки по префиксу любого слова названия, упорядоченные по популярности
+
+    Для каждого названия хранятся ключи — нормализованный текст, начиная с каждого слова
+    («иван грозный», «грозный»), в отсортированном списке пар (ключ, номер записи).
+    Диапазон префикса находится двумя bisect; для коротких префиксов с большим диапазоном
+    лучшие записи кэшируются до следующего изменения индекса.
+    """
+
+    # Размер диапазона, начиная с которого лучшие записи префикса кэшируются
+    SCAN_LIMIT = 256
+    CACHED_TOP = 50
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.version = 0
+        self.built_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._keys: List[Tuple[str, int]] = []
+        self._entries: Dict[int, Tuple[str, int, str, int]] = {}
+        self._entry_by_entity: Dict[Tuple[str, int], int] = {}
+        self._top_cache: Dict[str, List[int]] = {}
+        self._next_entry = 0
+
+    @property
+    def built(self) -> bool:
+        """Построен ли индекс"""
+        return self.built_at is not None
+
+    def needs_rebuild(self, max_age_seconds: int = None) -> bool:
+        """Нужно ли (пере)строить индекс"""
+        if not self.built:
+            return True
+        return bool(max_age_seconds) and time.monotonic() - self.built_at > max_age_seconds
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_keys(display: str) -> List[str]:
+        words = normalize_text(display).split(' ')
+        return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+    # ========================================
+    # ПОСТРОЕНИЕ И ИЗМЕНЕНИЯ
+    # ========================================
+
+    def build(self, entries: Iterable[Tuple[str, int, str, int]]) -> None:
+        """Полное построение из потока (тип, id, название, вес)"""
+        start_time = time.perf_counter()
+        keys: List[Tuple[str, int]] = []
+        stored: Dict[int, Tuple[str, int, str, int]] = {}
+        entry_by_entity: Dict[Tuple[str, int], int] = {}
+
+        for entry_no, (entity_type, entity_id, display, weight) in enumerate(entries):
+            if not display:
+                continue
+            stored[entry_no] = (entity_type, entity_id, display, weight or 0)
+            entry_by_entity[(entity_type, entity_id)] = entry_no
+            keys.extend((key, entry_no) for key in self._entry_keys(display))
+        keys.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._entries = stored
+            self._entry_by_entity = entry_by_entity
+            self._top_cache = {}
+            self._next_entry = max(stored, default=-1) + 1
+            self.version += 1
+            self.built_at = time.monotonic()
+
+        logger.info(f"Suggestion index built: {len(stored)} names, {len(keys)} keys "
+                    f"in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    def _remove_entry(self, entry_no: int) -> None:
+        entity_type, entity_id, display, _ = self._entries.pop(entry_no)
+        del self._entry_by_entity[(entity_type, entity_id)]
+        for key in self._entry_keys(display):
+            position = bisect_left(self._keys, (key, entry_no))
+            if position < len(self._keys) and self._keys[position] == (key, entry_no):
+                del self._keys[position]
+
+    def upsert(self, entity_type: str, entity_id: int, display: str, weight: int = None) -> None:
+        """Добавление или переименование сущности (вес по умолчанию сохраняется)"""
+        with self._lock:
+            entry_no = self._entry_by_entity.get((entity_type, entity_id))
+            if entry_no is not None:
+                if weight is None:
+                    weight = self._entries[entry_no][3]
+                self._remove_entry(entry_no)
+            if display:
+                entry_no = self._next_entry
+                self._next_entry += 1
+                self._entries[entry_no] = (entity_type, entity_id, display, weight or 0)
+                self._entry_by_entity[(entity_type, entity_id)] = entry_no
+                for key in self._entry_keys(display):
+                    insort(self._keys, (key, entry_no))
+            self._top_cache = {}
+            self.version += 1
+
+    def remove(self, entity_type: str, entity_id: int) -> bool:
+        """Удаление сущности из индекса"""
+        with self._lock:
+            entry_no = self._entry_by_entity.get((entity_type, entity_id))
+            if entry_no is None:
+                return False
+            self._remove_entry(entry_no)
+            self._top_cache = {}
+            self.version += 1
+            return True
+
+    # ========================================
+    # ПОДСКАЗКИ
+    # ========================================
+
+    def _rank_key(self, entry_no: int) -> Tuple[int, int]:
+        _, _, display, weight = self._entries[entry_no]
+        return weight, -len(display)
+
+    def _top_entries(self, lo: int, hi: int, limit: int) -> List[int]:
+        """Лучшие уникальные записи диапазона ключей по весу"""
+        entry_nos = {entry_no for _, entry_no in self._keys[lo:hi]}
+        return heapq.nlargest(limit, entry_nos, key=self._rank_key)
+
+    def suggest(self, prefix: str, limit: int = 10, entity_types: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """Top-k названий, у которых какое-либо слово начинается с префикса"""
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        types = set(entity_types) if entity_types else None
+
+        with self._lock:
+            lo = bisect_left(self._keys, (prefix,))
+            hi = bisect_left(self._keys, (prefix + _MAX_CHAR,), lo)
+
+            if hi - lo > self.SCAN_LIMIT and types is None and limit <= self.CACHED_TOP:
+                top = self._top_cache.get(prefix)
+                if top is None:
+                    top = self._top_cache[prefix] = self._top_entries(lo, hi, self.CACHED_TOP)
+                candidates = top
+            else:
+                candidates = self._top_entries(lo, hi, hi - lo)
+
+            suggestions = []
+            for entry_no in candidates:
+                entity_type, entity_id, display, weight = self._entries[entry_no]
+                if types is not None and entity_type not in types:
+                    continue
+                suggestions.append({
+                    'text': display,
+                    'entity_type': entity_type,
+                    'entity_id': entity_id,
+                    'weight': weight
+                })
+                if len(suggestions) >= limit:
+                    break
+            return suggestions
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Размер индекса"""
+        with self._lock:
+            return {
+                'names': len(self._entries),
+                'keys': len(self._keys),
+                'cached_prefixes': len(self._top_cache),
+                'version': self.version
+            }
+
+# Глобальный экземпляр индекса подсказок
+suggestion_index = SuggestionIndex()
+
+def _apply_entity_change(entity_type: str, entity_id: int, operation: str, data: Dict[str, Any]) -> None:
+    """Инкрементальное обновление индекса по ленте изменений"""
+    if operation == 'DELETE':
+        suggestion_index.remove(entity_type, entity_id)
+    else:
+        suggestion_index.upsert(entity_type, entity_id, entity_display_name(entity_type, data))
+
+entity_changes.subscribe(_apply_entity_change)
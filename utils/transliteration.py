@@ -0,0 +1,35 @@
+"""
+Транслитерация латиницы в кириллицу для поиска по русским названиям
+"""
+
+import re
+
+# Сначала более длинные сочетания, чтобы "shch" не разбиралось как "sh" + "ch"
+_LATIN_TO_CYRILLIC = [
+    ('shch', 'щ'), ('sch', 'щ'),
+    ('yo', 'ё'), ('jo', 'ё'), ('zh', 'ж'), ('kh', 'х'), ('ts', 'ц'), ('ch', 'ч'), ('sh', 'ш'),
+    ('yu', 'ю'), ('ju', 'ю'), ('ya', 'я'), ('ja', 'я'), ('ye', 'е'),
+    ('a', 'а'), ('b', 'б'), ('v', 'в'), ('w', 'в'), ('g', 'г'), ('d', 'д'), ('e', 'е'), ('z', 'з'),
+    ('i', 'и'), ('y', 'ы'), ('j', 'й'), ('k', 'к'), ('l', 'л'), ('m', 'м'), ('n', 'н'), ('o', 'о'),
+    ('p', 'п'), ('r', 'р'), ('s', 'с'), ('t', 'т'), ('u', 'у'), ('f', 'ф'), ('h', 'х'), ('c', 'к'),
+    ('q', 'к'), ('x', 'кс')
+]
+_PATTERN = re.compile('|'.join(latin for latin, _ in _LATIN_TO_CYRILLIC))
+_REPLACEMENTS = dict(_LATIN_TO_CYRILLIC)
+
+# Окончания прилагательных: "Velikiy" → "Великий", "Groznyy" → "Грозный"
+_ENDINGS = [(re.compile(r'i[yj]\b'), 'ий'), (re.compile(r'y[yj]\b'), 'ый'), (re.compile(r'o[yj]\b'), 'ой')]
+
+_CYRILLIC_RE = re.compile('[а-яё]', re.IGNORECASE)
+_LATIN_RE = re.compile('[a-z]', re.IGNORECASE)
+
+def latin_to_cyrillic(text: str) -> str:
+    """Приближенная транслитерация латиницы в кириллицу (регистр не сохраняется)"""
+    text = text.lower()
+    for pattern, replacement in _ENDINGS:
+        text = pattern.sub(replacement, text)
+    return _PATTERN.sub(lambda match: _REPLACEMENTS[match.group(0)], text)
+
+def is_latin_only(text: str) -> bool:
+    """Записан ли текст латиницей без кириллических букв"""
+    return bool(_LATIN_RE.search(text)) and not _CYRILLIC_RE.search(text)